@@ -0,0 +1,120 @@
+import os
+import pickle
+import shutil
+import tempfile
+from models.random_streams import RandomStreams
+
+
+# Seed of every fixture, the cars of a fixture are the same in every run of the benchmarks
+fixtures_seed = 'benchmarks'
+lanes = [0, 1, 2, 3]
+intentions = ['s', 'r', 'l']
+
+
+def fixture_streams(name):
+    """
+    :param name: name of the fixture.
+    :return: RandomStreams of the fixture, they don't depend on the other fixtures.
+    """
+    return RandomStreams(fixtures_seed).spawn(name)
+
+
+# Car with a coordination graph of graph_size cars, and the lane and intention of the car that is added to it
+def graph_fixture(graph_size):
+    from models.car import Car
+    generator = fixture_streams('graph_' + str(graph_size)).get('cars')
+    car = Car(name=0, graphic_flag=False)
+    for name in range(1, graph_size):
+        car.add_new_car(name=name, lane=generator.choice(lanes), intention=generator.choice(intentions))
+    return car, car.get_graph(), (graph_size, generator.choice(lanes), generator.choice(intentions))
+
+
+# Channel with cars_amount cars in it, every car follows the first one, so they all receive its info messages
+def channel_fixture(cars_amount):
+    from models.car import Car
+    from models.channel import Channel
+    from utils.utils import prepare_follow_list
+    generator = fixture_streams('channel_' + str(cars_amount)).get('cars')
+    channel = Channel()
+    cars = []
+    for name in range(cars_amount):
+        car = Car(name=name, lane=generator.choice(lanes), intention=generator.choice(intentions), channel=channel,
+                  graphic_flag=False)
+        channel.add_car(car)
+        if name != 0:
+            car.set_following_cars(prepare_follow_list([0]))
+        cars.append(car)
+    return channel, cars
+
+
+# Car approaching the intersection that follows follow_size cars, it already got an info message from each of them
+def follow_fixture(follow_size):
+    from models.channel import Channel
+    from models.messages import InfoMessage
+    from utils.utils import random_car, prepare_follow_list
+    streams = fixture_streams('follow_' + str(follow_size))
+    channel = Channel()
+    car = random_car(name=0, channel=channel, graphic_flag=False, streams=streams)
+    followed = [random_car(name=name, channel=channel, graphic_flag=False, streams=streams)
+                for name in range(1, follow_size + 1)]
+    car.set_following_cars(prepare_follow_list([other.get_name() for other in followed]))
+    for other in followed:
+        car.receive_info_message(InfoMessage(other))
+    return car
+
+
+# Two cars in the same lane, the sensor of the second one watches the first one
+def distance_sensor_fixture():
+    from models.channel import Channel
+    from utils.utils import random_car
+    streams = fixture_streams('distance_sensor')
+    channel = Channel()
+    cars = [random_car(name=name, initial_speed=20, channel=channel, lane=0, intention='s', graphic_flag=False,
+                       create_sensor_flag=True, streams=streams) for name in range(2)]
+    return cars[1].get_sensor()
+
+
+# A car that doesn't move in front of the entrance of lane 0 and a faster car behind it
+def proximity_sensor_fixture():
+    import pygame
+    from models.channel import Channel
+    from models.sensor import ProximitySensor
+    from utils.utils import random_car
+    streams = fixture_streams('proximity_sensor')
+    full_intersection = pygame.Rect(0, 0, 768, 768)
+    inner_intersection = pygame.Rect(280, 280, 210, 210)
+    channel = Channel()
+    first_car = random_car(name=1, pos_y=inner_intersection.bottom + 30, initial_speed=0, acceleration_rate=0,
+                           full_intersection=full_intersection, channel=channel,
+                           inner_intersection=inner_intersection, lane=0, intention='s', graphic_flag=False,
+                           streams=streams)
+    follower_car = random_car(name=2, initial_speed=40, full_intersection=full_intersection, channel=channel,
+                              inner_intersection=inner_intersection, lane=0, intention='s', graphic_flag=False,
+                              streams=streams)
+    sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
+    follower_car.set_sensor(sensor)
+    return sensor
+
+
+def simulation_state_fixture(tick, car_limit=1000):
+    """
+    State of a headless run of the 1000 ticks scenario when it reaches a tick. It is kept pickled, so every call
+    that is timed starts from a fresh copy of it.
+    :param tick: tick of the run.
+    :param car_limit: maximum number of cars created in the run, by default every car of the scenario.
+    :return: bytes of the pickled SimulationState.
+    """
+    from functions.simulation_functions import run_simulation
+    directory = tempfile.mkdtemp()
+    try:
+        checkpoint_file = os.path.join(directory, 'checkpoint')
+        run_simulation(1000, graphic_display=False, limit=tick + 1, car_limit=car_limit,
+                       checkpoint_file=checkpoint_file, checkpoint_every=tick)
+        with open(checkpoint_file, 'rb') as state_file:
+            return state_file.read()
+    finally:
+        shutil.rmtree(directory)
+
+
+def load_simulation_state(state_bytes):
+    return pickle.loads(state_bytes)
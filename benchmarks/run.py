@@ -0,0 +1,37 @@
+import argparse
+import sys
+from benchmarks.suite import default_benchmarks, run_benchmarks, compare_results, format_results, \
+    format_comparison, save_results, load_results
+
+
+# Runs the benchmarks and compares them with a baseline, the exit status is 1 if any of them got slower.
+# Example: "python -m benchmarks.run --output new.json --baseline old.json"
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the hot paths of the simulation.')
+    parser.add_argument('--output', help='json file where the results are saved')
+    parser.add_argument('--baseline', help='json file with the results of an older run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative change of the median that counts as a regression')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds timed of each benchmark')
+    parser.add_argument('--number', type=int, help='calls of each round, by default the ones of each benchmark')
+    parser.add_argument('--quick', action='store_true', help='only the smallest and largest sizes')
+    parser.add_argument('--filter', help='only the benchmarks whose name contains this text')
+    options = parser.parse_args(arguments)
+
+    results = run_benchmarks(default_benchmarks(quick=options.quick), repeat=options.repeat, number=options.number,
+                             name_filter=options.filter)
+    print(format_results(results))
+    regressions = []
+    if options.baseline is not None:
+        comparison = compare_results(results, load_results(options.baseline), threshold=options.threshold)
+        results['comparison'] = comparison
+        regressions = [entry for entry in comparison if entry['status'] == 'regression']
+        print('')
+        print(format_comparison(comparison))
+    if options.output is not None:
+        save_results(results, options.output)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
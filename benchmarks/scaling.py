@@ -0,0 +1,303 @@
+import io
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from models.channel import Channel
+from models.profiler import PhaseProfiler, round_phases
+
+# Phases of a tick whose time is fitted against the amount of cars
+phases = ['delivery', 'control', 'movement', 'coordination']
+# Amounts of cars the times are fitted against, the cars in the channel, that coordinate, and every car created,
+# the cars that left keep being updated in every tick
+fit_variables = ['concurrent_cars', 'cars']
+# Complexity models fitted to the time of each phase, time = a + b * f(cars)
+complexity_models = {'O(1)': None,
+                     'O(N)': lambda cars: cars,
+                     'O(N log N)': lambda cars: cars * math.log(max(cars, 1)),
+                     'O(N^2)': lambda cars: cars * cars}
+
+
+# Channel that measures the time spent delivering messages, both the ones of the rounds and the ones delivered as
+# soon as they are sent. Receiving a message can send another one that is delivered in the middle, only the
+# outer delivery is timed.
+class TimedChannel(Channel):
+
+    def __init__(self, *args, **kwargs):
+        super(TimedChannel, self).__init__(*args, **kwargs)
+        self.delivery_time = 0.0
+        self.delivered_messages = 0
+        self.delivering = False
+
+    def get_delivery_time(self):
+        return self.delivery_time
+
+    def get_delivered_messages(self):
+        return self.delivered_messages
+
+    def deliver(self, message):
+        self.delivered_messages += 1
+        if self.delivering:
+            super(TimedChannel, self).deliver(message)
+            return
+        self.delivering = True
+        start = time.perf_counter()
+        try:
+            super(TimedChannel, self).deliver(message)
+        finally:
+            self.delivery_time += time.perf_counter() - start
+            self.delivering = False
+
+
+def tick_phases(profiler, delivery_time):
+    """
+    Groups the phases of the last tick measured by the profiler. The deliveries are taken out of the phases that
+    sent the messages, so coordination is the time of the round of the channel, the position checks, building
+    the messages and the coordination checks of the supervisor.
+    :param profiler: PhaseProfiler of the run.
+    :param delivery_time: seconds spent delivering messages in the tick.
+    :return: dictionary with the seconds of each phase of the scaling study.
+    """
+    times = dict((phase, profiler.get_series()[phase][-1]) for phase in round_phases)
+    return {'delivery': delivery_time,
+            'control': times['controller'] + times['sensor'],
+            'movement': times['accelerate'] + times['turn'] + times['move'] + times['draw'],
+            'coordination': times['channel'] + times['check_position'] + times['messages'] - delivery_time}
+
+
+def peak_rss():
+    """
+    :return: peak resident memory of the process in bytes, None where the resource module doesn't exist.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux gives kilobytes and macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def scaling_run(scenario, ticks, car_limit, algorithm_flag=True):
+    """
+    Headless run of a scenario like run_simulation, measuring every tick.
+    :param scenario: path of the scenario.
+    :param ticks: ticks of the run.
+    :param car_limit: maximum number of cars of the run.
+    :param algorithm_flag: if the cars coordinate.
+    :return: dictionary with lists of the values of each tick (wall time, time of each phase, cars updated, cars
+    in the channel, messages delivered and size of the largest graph), the PhaseProfiler of the run and the
+    error that stopped the run or None.
+    """
+    from functions.simulation_functions import spawn_cars
+    from models.scenario import SpawnQueues, open_scenario
+    from utils.utils import do_round
+    timer = time.perf_counter
+    channel = TimedChannel()
+    profiler = PhaseProfiler()
+    spawn_queues = SpawnQueues(open_scenario(scenario))
+    created_cars = {}
+    series = dict((name, []) for name in ['wall_time', 'cars', 'concurrent_cars', 'messages', 'graph_size'] + phases)
+    error = None
+    try:
+        for tick in range(ticks):
+            profiler.set_tick(tick)
+            delivered_messages = channel.get_delivered_messages()
+            delivery_time = channel.get_delivery_time()
+            start = timer()
+            spawn_cars(tick, spawn_queues, created_cars, channel, car_limit, algorithm_flag=algorithm_flag,
+                       graphic_flag=False)
+            do_round(list(created_cars.values()), channel, profiler)
+            series['wall_time'].append(timer() - start)
+            phase_times = tick_phases(profiler, channel.get_delivery_time() - delivery_time)
+            for phase in phases:
+                series[phase].append(phase_times[phase])
+            series['cars'].append(len(created_cars))
+            series['concurrent_cars'].append(len(channel.get_cars()))
+            series['messages'].append(channel.get_delivered_messages() - delivered_messages)
+            series['graph_size'].append(max([len(car.get_graph()) for car in channel.get_cars()] or [0]))
+    except Exception as exception:
+        # Coordination fails in some scenarios, the ticks measured until then are kept
+        error = 'tick ' + str(len(series['wall_time'])) + ': ' + repr(exception)
+    return series, profiler, error
+
+
+def summarize_run(series):
+    ticks = len(series['wall_time'])
+    if ticks == 0:
+        return {'ticks': 0}
+    wall_time = sum(series['wall_time'])
+    summary = {'ticks': ticks, 'wall_time': wall_time,
+               'ticks_per_second': ticks / wall_time if wall_time > 0 else None,
+               'mean_tick_time': wall_time / ticks, 'max_tick_time': max(series['wall_time']),
+               'cars': series['cars'][-1],
+               'mean_concurrent_cars': sum(series['concurrent_cars']) / float(ticks),
+               'max_concurrent_cars': max(series['concurrent_cars']),
+               'mean_messages': sum(series['messages']) / float(ticks), 'max_messages': max(series['messages']),
+               'max_graph_size': max(series['graph_size'])}
+    for phase in phases:
+        summary[phase + '_time'] = sum(series[phase])
+    return summary
+
+
+def measure_point(point):
+    """
+    Runs one point of the sweep, it is meant to run in a process of its own so the peak memory is the one of the
+    run.
+    :param point: dictionary with the scenario, ticks, car_limit, algorithm_flag and if the series are kept.
+    :return: dictionary with the point, the summary, the time of each phase of the profiler and, if they are
+    kept, the series of the run.
+    """
+    initial_rss = peak_rss()
+    with redirect_stdout(io.StringIO()):
+        series, profiler, error = scaling_run(point['scenario'], point['ticks'], point['car_limit'],
+                                              point['algorithm_flag'])
+    result = {'demand': point['demand'], 'car_limit': point['car_limit'], 'summary': summarize_run(series),
+              'profile': profiler.summary(), 'initial_rss': initial_rss, 'peak_rss': peak_rss(), 'error': error}
+    if point['keep_series']:
+        result['series'] = series
+    else:
+        # The fits only need the cars and the time of the phases of each tick
+        result['series'] = dict((name, series[name]) for name in fit_variables + ['wall_time'] + phases)
+    return result
+
+
+def fit_complexity(cars, times):
+    """
+    Fits time = a + b * f(cars) for every complexity model to the mean time of the ticks with the same amount of
+    cars, and the exponent k of time = c * cars ** k in logarithmic scale.
+    :param cars: amount of cars of each tick.
+    :param times: seconds of each tick.
+    :return: dictionary with the coefficients and the R squared of each model, the best model and the exponent.
+    """
+    import numpy as np
+    cars = np.asarray(cars, dtype=float)
+    times = np.asarray(times, dtype=float)
+    amounts = np.unique(cars)
+    if len(amounts) == 0:
+        return {'models': {}, 'best': None, 'exponent': None, 'points': 0}
+    means = np.array([times[cars == amount].mean() for amount in amounts])
+    total = ((means - means.mean()) ** 2).sum()
+    models = {}
+    for name, function in complexity_models.items():
+        if function is None:
+            columns = np.ones((len(amounts), 1))
+        else:
+            columns = np.stack([np.ones(len(amounts)), np.array([function(amount) for amount in amounts])], axis=1)
+        coefficients = np.linalg.lstsq(columns, means, rcond=None)[0]
+        residual = ((columns.dot(coefficients) - means) ** 2).sum()
+        models[name] = {'coefficients': coefficients.tolist(),
+                        'r_squared': 1 - residual / total if total > 0 else 1.0}
+    best = max(models, key=lambda name: models[name]['r_squared'])
+    exponent = None
+    positive = (amounts > 0) & (means > 0)
+    if positive.sum() >= 2:
+        exponent = float(np.polyfit(np.log(amounts[positive]), np.log(means[positive]), 1)[0])
+    return {'models': models, 'best': best, 'exponent': exponent, 'points': len(amounts)}
+
+
+def scaling_study(demands, car_limits, ticks=1000, seed=0, algorithm_flag=True, processes=1, keep_series=False):
+    """
+    Sweeps the arrival rate and the car limit. The scenario of each rate is generated with the seed and every point
+    runs in a new process.
+    :param demands: arrival rates, in cars per tick.
+    :param car_limits: maximum numbers of cars of the runs.
+    :param ticks: ticks of each run.
+    :param seed: seed of the scenarios.
+    :param algorithm_flag: if the cars coordinate.
+    :param processes: points run at the same time, more than one changes the times measured.
+    :param keep_series: if the report keeps every value of every tick of each run.
+    :return: report with the runs and the fits of the wall time and of each phase against each amount of cars.
+    """
+    import multiprocessing
+    import platform
+    from functions.simulation_functions import generate_simulation_file
+    directory = tempfile.mkdtemp()
+    try:
+        points = []
+        for demand in demands:
+            scenario = os.path.join(directory, 'demand_' + str(demand))
+            generate_simulation_file(scenario, ticks, demand=demand, seed=seed)
+            for car_limit in car_limits:
+                points.append({'scenario': scenario, 'demand': demand, 'car_limit': car_limit, 'ticks': ticks,
+                               'algorithm_flag': algorithm_flag, 'keep_series': keep_series})
+        context = multiprocessing.get_context('spawn')
+        pool = context.Pool(processes=processes, maxtasksperchild=1)
+        try:
+            runs = pool.map(measure_point, points, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        shutil.rmtree(directory)
+    fits = {}
+    for variable in fit_variables:
+        cars = sum([run['series'][variable] for run in runs], [])
+        fits[variable] = dict((name, fit_complexity(cars, sum([run['series'][name] for run in runs], [])))
+                              for name in ['wall_time'] + phases)
+    if not keep_series:
+        for run in runs:
+            del run['series']
+    meta = {'python': sys.version.split()[0], 'platform': platform.platform(), 'ticks': ticks, 'seed': seed,
+            'algorithm_flag': algorithm_flag, 'processes': processes, 'time': time.time()}
+    return {'meta': meta, 'runs': runs, 'fits': fits}
+
+
+def format_report(report):
+    lines = ['%8s %6s %10s %10s %8s %8s %8s %8s %10s' % ('demand', 'limit', 'ticks/s', 'tick ms', 'cars',
+                                                        'max N', 'msg/tick', 'graph', 'peak MB')]
+    for run in report['runs']:
+        summary = run['summary']
+        if summary['ticks'] == 0:
+            lines.append('%8s %6d  %s' % (run['demand'], run['car_limit'], run['error']))
+            continue
+        peak = '' if run['peak_rss'] is None else '%.1f' % (run['peak_rss'] / 2.0 ** 20)
+        line = '%8s %6d %10.1f %10.3f %8d %8d %8.1f %8d %10s' % (
+            run['demand'], run['car_limit'], summary['ticks_per_second'], summary['mean_tick_time'] * 1e3,
+            summary['cars'], summary['max_concurrent_cars'], summary['mean_messages'], summary['max_graph_size'],
+            peak)
+        if run['error'] is not None:
+            line += '  stopped at ' + run['error']
+        lines.append(line)
+    for variable in fit_variables:
+        lines.append('')
+        lines.append('%-14s %-12s %9s %9s %9s %9s %9s   (R squared against %s)' % (
+            'phase', 'best', 'exponent', 'O(1)', 'O(N)', 'O(NlogN)', 'O(N^2)', variable))
+        for name, fit in report['fits'][variable].items():
+            if fit['best'] is None:
+                continue
+            exponent = '' if fit['exponent'] is None else '%.2f' % fit['exponent']
+            squares = ['%.3f' % fit['models'][model]['r_squared'] for model in complexity_models]
+            lines.append('%-14s %-12s %9s %9s %9s %9s %9s' % tuple([name, fit['best'], exponent] + squares))
+    return '\n'.join(lines)
+
+
+# Example: "python -m benchmarks.scaling --demands 0.1 0.3 1 --car-limits 50 200 --output scaling.json"
+def main(arguments=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Scaling of the simulation with the amount of cars.')
+    parser.add_argument('--demands', type=float, nargs='+', default=[0.1, 0.2, 0.4, 0.8],
+                        help='arrival rates in cars per tick')
+    parser.add_argument('--car-limits', type=int, nargs='+', default=[25, 50, 100, 200],
+                        help='maximum numbers of cars of the runs')
+    parser.add_argument('--ticks', type=int, default=1000, help='ticks of each run')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the scenarios')
+    parser.add_argument('--processes', type=int, default=1, help='runs at the same time')
+    parser.add_argument('--series', action='store_true', help='keep the values of every tick in the report')
+    parser.add_argument('--output', help='json file where the report is saved')
+    options = parser.parse_args(arguments)
+    report = scaling_study(options.demands, options.car_limits, ticks=options.ticks, seed=options.seed,
+                           processes=options.processes, keep_series=options.series)
+    print(format_report(report))
+    if options.output is not None:
+        with open(options.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
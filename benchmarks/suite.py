@@ -0,0 +1,264 @@
+import io
+import json
+import platform
+import sys
+import time
+from contextlib import redirect_stdout
+from statistics import mean, median
+
+
+# One timed operation. The fixture is built once and it is not timed, setup prepares the state of every call from
+# it, for the operations that change the state they work on, and only the calls to the function are timed.
+class Benchmark(object):
+
+    def __init__(self, name, group, fixture, function, setup=None, params=None, number=100):
+        """
+        :param name: name of the benchmark.
+        :param group: name of the operation, the benchmarks of a group time it against different sizes.
+        :param fixture: function without arguments that builds the fixture.
+        :param function: function timed, it receives the state returned by setup.
+        :param setup: optional function that receives the fixture and returns the state of a call, by default the
+        fixture is the state.
+        :param params: dictionary with the sizes of the fixture.
+        :param number: calls timed in each round.
+        """
+        self.name = name
+        self.group = group
+        self.fixture = fixture
+        self.function = function
+        self.setup = setup
+        self.params = {} if params is None else params
+        self.number = number
+
+    def get_name(self):
+        return self.name
+
+    def get_group(self):
+        return self.group
+
+    def get_params(self):
+        return self.params
+
+    def get_key(self):
+        if not self.params:
+            return self.name
+        return self.name + '[' + ','.join(key + '=' + str(self.params[key]) for key in sorted(self.params)) + ']'
+
+    def run(self, repeat=5, number=None):
+        """
+        :param repeat: rounds timed.
+        :param number: calls timed in each round, by default the ones of the benchmark.
+        :return: dictionary with the seconds per call of the fastest round, the median and the mean of the rounds.
+        """
+        number = self.number if number is None else number
+        fixture = self.fixture()
+        timer = time.perf_counter
+        rounds = []
+        for _ in range(repeat):
+            elapsed = 0.0
+            for _ in range(number):
+                state = fixture if self.setup is None else self.setup(fixture)
+                start = timer()
+                self.function(state)
+                elapsed += timer() - start
+            rounds.append(elapsed / number)
+        return {'group': self.group, 'params': self.params, 'number': number, 'repeat': repeat, 'min': min(rounds),
+                'median': median(rounds), 'mean': mean(rounds), 'unit': 's'}
+
+
+def add_new_car_benchmark(graph_size):
+    from benchmarks.fixtures import graph_fixture
+
+    # The graph of the car is a private copy of the fixture graph, adding the car doesn't change the fixture
+    def setup(fixture):
+        car, graph, new_car = fixture
+        car.set_graph(graph)
+        car.get_graph().own()
+        return car, new_car
+
+    def function(state):
+        car, (name, lane, intention) = state
+        car.add_new_car(name=name, lane=lane, intention=intention)
+    return Benchmark('add_new_car', 'graph', lambda: graph_fixture(graph_size), function, setup=setup,
+                     params={'graph_size': graph_size}, number=200)
+
+
+def channel_deliver_benchmark(cars_amount):
+    from benchmarks.fixtures import channel_fixture
+    from models.messages import InfoMessage
+
+    def fixture():
+        channel, cars = channel_fixture(cars_amount)
+        return channel, InfoMessage(cars[0])
+
+    def function(state):
+        channel, message = state
+        channel.deliver(message)
+    return Benchmark('channel_deliver_info', 'channel', fixture, function, params={'cars': cars_amount},
+                     number=200)
+
+
+def channel_broadcast_benchmark(cars_amount):
+    from benchmarks.fixtures import channel_fixture
+    from models.car import Car
+    from models.messages import NewCarMessage
+
+    def fixture():
+        channel, cars = channel_fixture(cars_amount)
+        return channel, cars, NewCarMessage(Car(name=cars_amount, lane=0, intention='s', graphic_flag=False))
+
+    # Every car adds the new car to its graph, it is removed before the next call
+    def setup(fixture):
+        channel, cars, message = fixture
+        for car in cars:
+            if message.get_sender_name() in car.get_graph():
+                car.get_graph().remove_node(message.get_sender_name())
+        return channel, message
+
+    def function(state):
+        channel, message = state
+        channel.broadcast(message)
+    return Benchmark('channel_broadcast_new_car', 'channel', fixture, function, setup=setup,
+                     params={'cars': cars_amount}, number=50)
+
+
+def get_closest_car_benchmark(follow_size):
+    from benchmarks.fixtures import follow_fixture
+    from models.controller import get_closest_car
+    return Benchmark('get_closest_car', 'controller', lambda: follow_fixture(follow_size), get_closest_car,
+                     params={'follow_size': follow_size}, number=200)
+
+
+def algorithm_controller_benchmark(follow_size):
+    from benchmarks.fixtures import follow_fixture
+    from models.controller import algorithm_controller
+    return Benchmark('algorithm_controller', 'controller', lambda: follow_fixture(follow_size),
+                     algorithm_controller, params={'follow_size': follow_size}, number=200)
+
+
+def distance_sensor_benchmark():
+    from benchmarks.fixtures import distance_sensor_fixture
+    return Benchmark('distance_sensor_watch', 'sensor', distance_sensor_fixture, lambda sensor: sensor.watch(),
+                     number=1000)
+
+
+def proximity_sensor_benchmark():
+    from benchmarks.fixtures import proximity_sensor_fixture
+    return Benchmark('proximity_ticks_to_crash', 'sensor', proximity_sensor_fixture,
+                     lambda sensor: sensor.ticks_to_crash(), number=200)
+
+
+def do_round_benchmark(tick):
+    from benchmarks.fixtures import simulation_state_fixture, load_simulation_state
+    from utils.utils import do_round
+
+    def setup(state_bytes):
+        state = load_simulation_state(state_bytes)
+        return list(state.get_cars().values()), state.get_channel()
+
+    def function(state):
+        cars, channel = state
+        do_round(cars, channel)
+    return Benchmark('do_round', 'simulation', lambda: simulation_state_fixture(tick), function, setup=setup,
+                     params={'tick': tick}, number=20)
+
+
+def default_benchmarks(quick=False):
+    """
+    :param quick: only the smallest and the largest size of each group.
+    :return: list of the Benchmarks of the hot paths of the simulation.
+    """
+    graph_sizes = [10, 200] if quick else [10, 50, 200]
+    cars_amounts = [10, 100] if quick else [10, 30, 100]
+    follow_sizes = [1, 15] if quick else [1, 5, 15]
+    ticks = [100] if quick else [100, 400]
+    benchmarks = [add_new_car_benchmark(size) for size in graph_sizes]
+    benchmarks += [channel_deliver_benchmark(amount) for amount in cars_amounts]
+    benchmarks += [channel_broadcast_benchmark(amount) for amount in cars_amounts]
+    benchmarks += [get_closest_car_benchmark(size) for size in follow_sizes]
+    benchmarks += [algorithm_controller_benchmark(size) for size in follow_sizes]
+    benchmarks += [distance_sensor_benchmark(), proximity_sensor_benchmark()]
+    benchmarks += [do_round_benchmark(tick) for tick in ticks]
+    return benchmarks
+
+
+def run_benchmarks(benchmarks, repeat=5, number=None, name_filter=None):
+    """
+    Runs the benchmarks, what the cars print while they are timed is discarded.
+    :param benchmarks: list of Benchmarks.
+    :param repeat: rounds timed of each benchmark.
+    :param number: calls of each round, by default the ones of each benchmark.
+    :param name_filter: optional text, only the benchmarks whose key contains it are run.
+    :return: dictionary with the machine where they ran and the results by key.
+    """
+    results = {}
+    for benchmark in benchmarks:
+        if name_filter is not None and name_filter not in benchmark.get_key():
+            continue
+        with redirect_stdout(io.StringIO()):
+            results[benchmark.get_key()] = benchmark.run(repeat=repeat, number=number)
+    meta = {'python': sys.version.split()[0], 'implementation': platform.python_implementation(),
+            'machine': platform.machine(), 'platform': platform.platform(), 'time': time.time()}
+    return {'meta': meta, 'benchmarks': results}
+
+
+def compare_results(results, baseline, threshold=0.25):
+    """
+    Compares the median of each benchmark with the one of the baseline.
+    :param results: results returned by run_benchmarks.
+    :param baseline: results of an older run.
+    :param threshold: relative change of the median that is a regression or an improvement.
+    :return: list of dictionaries with the key, both medians, their ratio and the status: 'regression',
+    'improvement', 'same', 'new' if it is not in the baseline or 'missing' if it only is in the baseline.
+    """
+    comparison = []
+    current = results['benchmarks']
+    old = baseline['benchmarks']
+    for key in sorted(set(current) | set(old)):
+        entry = {'name': key, 'baseline': None, 'current': None, 'ratio': None}
+        if key not in old:
+            entry['current'] = current[key]['median']
+            entry['status'] = 'new'
+        elif key not in current:
+            entry['baseline'] = old[key]['median']
+            entry['status'] = 'missing'
+        else:
+            entry['baseline'] = old[key]['median']
+            entry['current'] = current[key]['median']
+            entry['ratio'] = entry['current'] / entry['baseline']
+            if entry['ratio'] > 1 + threshold:
+                entry['status'] = 'regression'
+            elif entry['ratio'] < 1 / (1 + threshold):
+                entry['status'] = 'improvement'
+            else:
+                entry['status'] = 'same'
+        comparison.append(entry)
+    return comparison
+
+
+def format_comparison(comparison):
+    lines = ['%-50s %12s %12s %8s  %s' % ('benchmark', 'baseline us', 'current us', 'ratio', 'status')]
+    for entry in comparison:
+        baseline = '' if entry['baseline'] is None else '%.2f' % (entry['baseline'] * 1e6)
+        current = '' if entry['current'] is None else '%.2f' % (entry['current'] * 1e6)
+        ratio = '' if entry['ratio'] is None else '%.2f' % entry['ratio']
+        lines.append('%-50s %12s %12s %8s  %s' % (entry['name'], baseline, current, ratio, entry['status']))
+    return '\n'.join(lines)
+
+
+def format_results(results):
+    lines = ['%-50s %12s %12s %12s' % ('benchmark', 'min us', 'median us', 'mean us')]
+    for key, result in results['benchmarks'].items():
+        lines.append('%-50s %12.2f %12.2f %12.2f' % (key, result['min'] * 1e6, result['median'] * 1e6,
+                                                     result['mean'] * 1e6))
+    return '\n'.join(lines)
+
+
+def save_results(results, file_name):
+    with open(file_name, 'w') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+
+
+def load_results(file_name):
+    with open(file_name) as results_file:
+        return json.load(results_file)
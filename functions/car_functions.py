@@ -48,7 +48,7 @@ def get_virtual_y_position(origin_direction, origin_x, origin_y, pos_x, pos_y):
 
 
 def next_direction(speed, actual_direction, origin_direction, lane, intention, inner_rectangle, pos_x, pos_y,
-                   origin_x, origin_y):
+                   origin_x, origin_y, time_step=0.1, speed_factor=2):
     from utils.utils import get_right_turn_radio, get_left_turn_radio
 
     new_direction = actual_direction
@@ -58,13 +58,13 @@ def next_direction(speed, actual_direction, origin_direction, lane, intention, i
         if get_virtual_y_position(origin_direction, origin_x, origin_y, pos_x, pos_y) > -right_turn_radio and \
                 distance_to_inner_intersection(lane, inner_rectangle, pos_x, pos_y) <= 0:
             new_direction = turn_direction(speed=speed, radio=right_turn_radio, actual_direction=actual_direction,
-                                           intention=intention)
+                                           intention=intention, time_step=time_step, speed_factor=speed_factor)
     elif intention == "l":
         left_turn_radio = get_left_turn_radio(lane, extra_distance=extra_distance)
         if get_virtual_y_position(origin_direction, origin_x, origin_y, pos_x, pos_y) < left_turn_radio and \
                 distance_to_inner_intersection(lane, inner_rectangle, pos_x, pos_y) + extra_distance <= 0:
             new_direction = turn_direction(speed=speed, radio=left_turn_radio, actual_direction=actual_direction,
-                                           intention=intention)
+                                           intention=intention, time_step=time_step, speed_factor=speed_factor)
     new_direction = correct_direction(actual_direction=new_direction, intention=intention,
                                       origin_direction=origin_direction)
     return new_direction
@@ -102,6 +102,17 @@ def total_distance_curve_fix(closest_point, pos_x, pos_y):
     return x_diff + y_diff
 
 
+# Distance along its path from the position of a car to a point, using the path table of its lane and intention.
+# The position along the path sent by the car is used when it is known, else the position is projected on the path.
+def path_distance_to_point(point, pos_x, pos_y, origin_x, origin_y, origin_direction, lane, intention,
+                           inner_rectangle, path_position=None):
+    from models.paths import get_path_table
+    path = get_path_table(lane, intention, inner_rectangle, origin_x, origin_y, origin_direction)
+    if path_position is None:
+        path_position = path.project(pos_x, pos_y)
+    return path.distance_to_point(path_position, point)
+
+
 def simulate_next_tick(speed, acc_rate, actual_direction, origin_direction, lane, intention, inner_rectangle,
                        pos_x, pos_y, origin_x, origin_y):
     new_speed = next_speed(speed, acc_rate)
@@ -183,40 +194,46 @@ def passed_point(point, speed, acc_rate, actual_direction, origin_direction, lan
 
 # Returns the amount of ticks needed to go through the distance to the specified point from the specified position and
 # some extra distance if it specified. extra_distance = 0 would mean the ticks to reach the point
+# If the distance along the path to the point is known it is used instead of the approximation.
 def ticks_to_reach_point(pos_x, pos_y, origin_x, origin_y, actual_direction, origin_direction, lane, intention,
                          speed, inner_rectangle, point, acc_rate, extra_distance, time_step=0.1,
-                         speed_factor=2):
+                         speed_factor=2, distance=None):
     from utils.utils import instant_ticks_to_crash
-    if reached_point(point, speed, acc_rate, actual_direction, origin_direction, lane, intention,
-                     inner_rectangle, pos_x, pos_y, origin_x, origin_y, extra_distance=(1/2) * extra_distance) or \
-            speed < 0.2 and acc_rate <= 0.0:
+    reached = reached_point(point, speed, acc_rate, actual_direction, origin_direction, lane, intention,
+                            inner_rectangle, pos_x, pos_y, origin_x, origin_y, extra_distance=(1/2) * extra_distance)
+    if reached or speed < 0.2 and acc_rate <= 0.0:
         ticks_to_point = -1
     else:
-        aprox_distance = total_distance_curve_fix(point, pos_x, pos_y)
+        aprox_distance = distance
+        if aprox_distance is None:
+            aprox_distance = total_distance_curve_fix(point, pos_x, pos_y)
         ticks_to_point = instant_ticks_to_crash(aprox_distance, speed, time_step, speed_factor)
-    return ticks_to_point, reached_point(point, speed, acc_rate, actual_direction, origin_direction, lane, intention,
-                     inner_rectangle, pos_x, pos_y, origin_x, origin_y, extra_distance=(1/2) * extra_distance)
+    return ticks_to_point, reached
 
 
 # Returns the amount of ticks needed to go through the distance to the specified point from the specified position and
 # some extra distance if it specified. extra_distance = 0 would mean the ticks to reach the point
+# If the distance along the path to the point is known it is used instead of the approximation.
 def ticks_to_pass_point(pos_x, pos_y, origin_x, origin_y, actual_direction, origin_direction, lane, intention,
                         speed, inner_rectangle, point, acc_rate, extra_distance, time_step=0.1,
-                        speed_factor=2):
+                        speed_factor=2, distance=None):
     from utils.utils import instant_ticks_to_crash
-    if passed_point(point, speed, acc_rate, actual_direction, origin_direction, lane, intention,
-                    inner_rectangle, pos_x, pos_y, origin_x, origin_y, extra_distance=(3/2) * extra_distance) or \
-            speed < 0.2 and acc_rate <= 0.0:
+    passed = passed_point(point, speed, acc_rate, actual_direction, origin_direction, lane, intention,
+                          inner_rectangle, pos_x, pos_y, origin_x, origin_y, extra_distance=(3/2) * extra_distance)
+    if passed or speed < 0.2 and acc_rate <= 0.0:
         ticks_to_point = -1
     else:
-        aprox_distance = total_distance_curve_fix(point, pos_x, pos_y)
+        aprox_distance = distance
+        if aprox_distance is None:
+            aprox_distance = total_distance_curve_fix(point, pos_x, pos_y)
         ticks_to_point = instant_ticks_to_crash(aprox_distance + (3/2) * extra_distance, speed, time_step, speed_factor)
-    return ticks_to_point, passed_point(point, speed, acc_rate, actual_direction, origin_direction, lane, intention,
-                    inner_rectangle, pos_x, pos_y, origin_x, origin_y, extra_distance=(3/2) * extra_distance)
+    return ticks_to_point, passed
 
 
-def collision_free_acceleration(closest_car_ticks_distance, closest_point, speed, pos_x, pos_y):
-    distance_to_point = total_distance_curve_fix(closest_point, pos_x, pos_y)
+def collision_free_acceleration(closest_car_ticks_distance, closest_point, speed, pos_x, pos_y, distance=None):
+    distance_to_point = distance
+    if distance_to_point is None:
+        distance_to_point = total_distance_curve_fix(closest_point, pos_x, pos_y)
     new_acc = 2 * (distance_to_point - speed * closest_car_ticks_distance) / pow(closest_car_ticks_distance, 2)
     return new_acc
 
@@ -5,12 +5,15 @@ from models.controller import accelerating_controller
 
 
 # if I want a car to spawn every 3 ticks i should give 1/3 as an argument
-def next_time(rate_parameter):
-    return -math.log(1.0 - random.random()) / rate_parameter
+# The generator can be a stream of a RandomStreams, by default it is the random module.
+def next_time(rate_parameter, generator=random):
+    return -math.log(1.0 - generator.random()) / rate_parameter
 
 
-def create_simulation_file(ticks=100, spawn_rate=1):
+# With streams, a RandomStreams, the same seed always creates the same file
+def create_simulation_file(ticks=100, spawn_rate=1, streams=None):
     from models.channel import Channel
+    from models.random_streams import get_stream
     from utils.utils import random_car
     import os
     file = os.path.dirname(os.path.abspath(__file__)) + "/../simulation_files/" + str(ticks) + '_ticks'
@@ -19,15 +22,103 @@ def create_simulation_file(ticks=100, spawn_rate=1):
     lanes = [0, 1, 2, 3]
     intentions = ['l', 's', 'r']
     for name in range(ticks):
-        if next_time(spawn_rate) <= spawn_rate:
-            lane = random.choice(lanes)
-            intention = random.choice(intentions)
-            car = random_car(name=name, channel=channel, creation_time=name, lane=lane, intention=intention)
+        if next_time(spawn_rate, get_stream(streams, 'arrivals')) <= spawn_rate:
+            lane = get_stream(streams, 'lanes').choice(lanes)
+            intention = get_stream(streams, 'intentions').choice(intentions)
+            car = random_car(name=name, channel=channel, creation_time=name, lane=lane, intention=intention,
+                             streams=streams)
             cars['cars'].append(car.to_json())
     with open(file, 'w') as outfile:
         json.dump(cars, outfile)
 
 
+# Relative demand of each (lane, intention) pair from a matrix of origin and destination lanes, in the order of the
+# intention codes of the scenarios: left, straight and right
+def od_matrix_weights(od_matrix):
+    import numpy as np
+    od_matrix = np.asarray(od_matrix, dtype=float)
+    if od_matrix.shape != (4, 4):
+        raise ValueError('The origin-destination matrix has to be 4x4, not ' + str(od_matrix.shape))
+    if np.any(np.diag(od_matrix) != 0) or np.any(od_matrix < 0):
+        raise ValueError('The origin-destination matrix needs a zero diagonal and no negative values')
+    lanes = np.arange(4)
+    # Destination of each intention: left goes to lane + 3, straight to lane + 2 and right to lane + 1
+    weights = np.stack([od_matrix[lanes, (lanes + offset) % 4] for offset in [3, 2, 1]], axis=1)
+    if weights.sum() <= 0:
+        raise ValueError('The origin-destination matrix has no demand')
+    return weights / weights.sum()
+
+
+def generate_simulation_file(file_name, ticks, demand=1.0, od_matrix=None, seed=None, chunk_ticks=100000,
+                             streams=None):
+    """
+    Generates a scenario without creating any car. The arrivals of every tick are drawn from a Poisson distribution
+    with the demand of the tick as mean, and the lane and intention of each car from the origin-destination matrix,
+    all in bulk for a chunk of ticks that is written before drawing the next one.
+    :param file_name: path of the scenario, binary unless it ends with .jsonl, then it is line-delimited.
+    :param ticks: amount of ticks of the scenario.
+    :param demand: cars per tick, a number, an array of the demand of each tick, repeated if it is shorter than
+    the scenario, or a function that gives the demand of an array of ticks.
+    :param od_matrix: 4x4 relative demand from each lane of origin to each lane of destination, uniform by default.
+    :param seed: seed of the random generator.
+    :param streams: RandomStreams of the run, if it is given the arrivals and paths are drawn from its streams
+    instead of the seed.
+    :param chunk_ticks: amount of ticks generated at once.
+    :return: number of cars in the scenario.
+    """
+    import numpy as np
+    from models.scenario import BinaryScenarioWriter, scenario_dtype, code_intentions
+    from utils.utils import outside_initial_positions
+    if od_matrix is None:
+        od_matrix = np.ones((4, 4)) - np.eye(4)
+    weights = od_matrix_weights(od_matrix).ravel()
+    spawn_positions = np.array([position[:3] for position in outside_initial_positions], dtype=float)
+    # Separate generators for the arrivals and the paths, so the scenario doesn't depend on the size of the chunks
+    if streams is not None:
+        arrivals_generator, paths_generator = streams.numpy('arrivals'), streams.numpy('paths')
+    else:
+        arrivals_generator, paths_generator = [np.random.default_rng(sequence)
+                                               for sequence in np.random.SeedSequence(seed).spawn(2)]
+    if not callable(demand):
+        demand = np.asarray(demand, dtype=float)
+    line_delimited = file_name.endswith('.jsonl')
+    if line_delimited:
+        writer = open(file_name, 'w')
+    else:
+        writer = BinaryScenarioWriter(file_name)
+    count = 0
+    with writer:
+        for start in range(0, ticks, chunk_ticks):
+            chunk_ticks_array = np.arange(start, min(start + chunk_ticks, ticks))
+            if callable(demand):
+                rates = np.asarray(demand(chunk_ticks_array), dtype=float)
+            elif demand.ndim == 0:
+                rates = np.full(len(chunk_ticks_array), float(demand))
+            else:
+                rates = demand[chunk_ticks_array % len(demand)]
+            arrivals = arrivals_generator.poisson(rates)
+            total = int(arrivals.sum())
+            pairs = paths_generator.choice(len(weights), size=total, p=weights)
+            records = np.zeros(total, dtype=scenario_dtype)
+            records['name'] = np.arange(count, count + total)
+            records['creation_time'] = np.repeat(chunk_ticks_array, arrivals)
+            records['lane'] = pairs // 3
+            records['intention'] = pairs % 3
+            records['x_coordinate'] = spawn_positions[pairs // 3, 0]
+            records['y_coordinate'] = spawn_positions[pairs // 3, 1]
+            records['direction'] = spawn_positions[pairs // 3, 2]
+            if line_delimited:
+                for name, lane, intention, creation_time, pos_x, pos_y, direction in records.tolist():
+                    writer.write(json.dumps({'name': name, 'lane': lane, 'intention': code_intentions[intention],
+                                             'creation_time': creation_time,
+                                             'initial_coordinates': {'x_coordinate': pos_x, 'y_coordinate': pos_y,
+                                                                     'direction': direction}}) + '\n')
+            else:
+                writer.write_records(records)
+            count += total
+    return count
+
+
 def read_simulation_file(ticks, directory='/../simulation_files/'):
     import os
     root = os.path.dirname((os.path.abspath(__file__)))
@@ -37,7 +128,30 @@ def read_simulation_file(ticks, directory='/../simulation_files/'):
         return cars
 
 
-def recreate_car(json_dict, channel, algorithm_flag=False):
+# Writes the cars of a scenario in a line-delimited file that can be read by a ScenarioReader
+def write_scenario_lines(cars, file_name):
+    """
+    :param cars: iterable of cars in json ordered by creation time.
+    :param file_name: path of the file.
+    """
+    with open(file_name, 'w') as outfile:
+        for car in cars:
+            outfile.write(json.dumps(car) + '\n')
+
+
+def convert_simulation_file(ticks, directory='/../simulation_files/'):
+    """
+    Writes the scenario of that amount of ticks as a line-delimited file next to it.
+    :return: path of the new file.
+    """
+    import os
+    root = os.path.dirname((os.path.abspath(__file__)))
+    file_name = root + directory + str(ticks) + '_ticks.jsonl'
+    write_scenario_lines(read_simulation_file(ticks, directory)['cars'], file_name)
+    return file_name
+
+
+def recreate_car(json_dict, channel, algorithm_flag=False, graphic_flag=True, world=None, path_following=False):
     from models.car import Car
     from utils.utils import full_intersection_rect, inner_intersection_rect
     name = int(json_dict['name'])
@@ -51,7 +165,8 @@ def recreate_car(json_dict, channel, algorithm_flag=False):
     return Car(name=name, pos_x=pos_x, pos_y=pos_y, lane=lane, intention=intention, direction=direction,
                channel=channel, algorithm_flag=algorithm_flag, sensor_flag=True, creation_time=creation_time,
                full_intersection=full_intersection_rect, inner_intersection=inner_intersection_rect,
-               controller=accelerating_controller)
+               controller=accelerating_controller, graphic_flag=graphic_flag, world=world,
+               path_following=path_following)
 
 
 def collides_at_spawn(rect, other_car):
@@ -62,68 +177,113 @@ def collides_at_spawn(rect, other_car):
     return collides
 
 
-def run_simulation(ticks, algorithm_flag=True, graphic_display=True, info_display=False, limit=150, car_limit=15):
-    from utils.utils import init_graphic_environment, do_round
+def spawn_cars(tick, spawn_queues, created_cars, channel, car_limit, algorithm_flag=True, graphic_flag=True,
+               world=None, path_following=False):
+    """
+    Creates the cars of the scenario that arrived until the tick and have room to enter their lane. No more cars
+    are created once the run created more than car_limit cars.
+    :param tick: tick of the run.
+    :param spawn_queues: SpawnQueues of the scenario.
+    :param created_cars: dictionary of the created cars by name, the new cars are added to it.
+    :param channel: Channel of the run.
+    :param car_limit: maximum number of cars of the run.
+    """
+    if car_limit >= len(created_cars):
+        spawn_queues.arrive(tick)
+        car = spawn_queues.pop_ready(channel.get_recent_entering())
+        while car is not None:
+            created_cars[int(car['name'])] = recreate_car(car, channel, algorithm_flag=algorithm_flag,
+                                                          graphic_flag=graphic_flag, world=world,
+                                                          path_following=path_following)
+            car = spawn_queues.pop_ready(channel.get_recent_entering())
+
+
+def run_simulation(ticks, algorithm_flag=True, graphic_display=True, info_display=False, limit=150, car_limit=15,
+                   vectorized=False, messages_per_round=None, collision_detector=None, path_following=False,
+                   scenario=None, recorder=None, checkpoint_file=None, checkpoint_every=None, resume_from=None,
+                   profiler=None):
+    from utils.utils import init_graphic_environment, do_round, do_world_round, inner_intersection_rect
     from models.channel import Channel
-    import pygame
-    channel = Channel()
-    cars = read_simulation_file(ticks)
-    created_cars = {}
-    car_queue = []
+    from models.scenario import ScenarioReader, BinaryScenarioIterator, SpawnQueues, open_scenario
+    from models.checkpoint import SimulationState, save_checkpoint, load_checkpoint
+    # With messages_per_round the channel only delivers that amount of messages each round
+    if messages_per_round is None:
+        channel = Channel()
+    else:
+        channel = Channel(messages_per_round=messages_per_round, bandwidth_limited=True)
+    # With vectorized the cars are views of a World and they are all moved in one step per tick
+    world = None
+    if vectorized:
+        from models.world import World
+        world = World(inner_intersection=inner_intersection_rect)
+    # The scenario is the path of a line-delimited file, that is streamed, or of a binary scenario, that is memory
+    # mapped, or an iterable of cars in json. By default it is the json file of that amount of ticks.
+    # The cars wait in the queue of their lane until there is room for them.
+    reader = None
+    first_tick = 0
+    if resume_from is not None:
+        # The run continues from a checkpoint, the cars keep the graphic mode they had when it was saved
+        state = load_checkpoint(resume_from)
+        channel = state.get_channel()
+        created_cars = state.get_cars()
+        spawn_queues = state.get_spawn_queues()
+        world = state.get_world()
+        first_tick = state.get_tick()
+        state.restore_random_state()
+        if isinstance(spawn_queues.get_source(), ScenarioReader):
+            reader = spawn_queues.get_source()
+        elif isinstance(spawn_queues.get_source(), BinaryScenarioIterator):
+            reader = spawn_queues.get_source().get_scenario()
+    else:
+        if scenario is None:
+            scenario = read_simulation_file(ticks)['cars']
+        elif isinstance(scenario, str):
+            # The scenario files opened here, line-delimited or binary, are closed at the end of the run
+            scenario = open_scenario(scenario)
+            reader = scenario
+        spawn_queues = SpawnQueues(scenario)
+        created_cars = {}
+    # The recorder is told about every message the channel delivers
+    if recorder is not None:
+        channel.set_message_listener(recorder.record_message)
+    # Without graphic display the cars are headless and pygame is never used by the simulation loop
     if graphic_display:
+        import pygame
         screen, background, intersection_background, font = init_graphic_environment()
 
-    for tick in range(ticks):
+    for tick in range(first_tick, ticks):
         if tick == limit:
             break
+        # The state is saved before simulating the tick, a run resumed from it starts at that tick
+        if checkpoint_every is not None and tick > first_tick and tick % checkpoint_every == 0:
+            save_checkpoint(SimulationState(tick, channel, created_cars, spawn_queues, world), checkpoint_file)
+        if recorder is not None:
+            recorder.set_tick(tick)
+        # The profiler measures the phases of the ticks while it is enabled
+        if profiler is not None:
+            profiler.set_tick(tick)
         # print(tick)
-        if car_limit >= len(list(created_cars.keys())):
-            for index in range(len(cars['cars'])):
-                if car_queue:
-                    new_queue = []
-                    for ind in range(len(car_queue)):
-                        car = car_queue[ind]
-                        lane = int(car['lane'])
-                        length = 1
-                        if channel.get_recent_entering()[lane] is not None:
-                            length = channel.get_recent_entering()[lane].get_car_length()
-                        coordinates = car['initial_coordinates']
-                        rect = pygame.Rect(float(coordinates['x_coordinate']), float(coordinates['y_coordinate']), length,
-                                           length)
-                        rect.center = (float(coordinates['x_coordinate']), float(coordinates['y_coordinate']))
-                        collides = collides_at_spawn(rect, channel.get_recent_entering()[lane])
-                        if collides:
-                            new_queue.append(car)
-                        else:
-                            created_cars[int(car['name'])] = recreate_car(car, channel, algorithm_flag=algorithm_flag)
-                    car_queue = new_queue
-                lane = int(cars['cars'][index]['lane'])
-                length = 1
-                if channel.get_recent_entering()[lane] is not None:
-                    length = channel.get_recent_entering()[lane].get_car_length()
-                car = cars['cars'][index]
-                if int(car['creation_time']) <= tick:
-                    coordinates = car['initial_coordinates']
-                    rect = pygame.Rect(float(coordinates['x_coordinate']), float(coordinates['y_coordinate']), length, length)
-                    rect.center = (float(coordinates['x_coordinate']), float(coordinates['y_coordinate']))
-                    collides = collides_at_spawn(rect, channel.get_recent_entering()[lane])
-                    #print(channel.get_recent_entering()[lane].get_acceleration())
-                    #print(created_cars)
-                    if collides:
-                        car_queue.append(car)
-                    else:
-                        created_cars[int(car['name'])] = recreate_car(car, channel, algorithm_flag=algorithm_flag)
-                else:
-                    cars['cars'] = cars['cars'][index:]
-                    break
+        spawn_cars(tick, spawn_queues, created_cars, channel, car_limit, algorithm_flag=algorithm_flag,
+                   graphic_flag=graphic_display, world=world, path_following=path_following)
         if graphic_display:
             screen.blit(background, (0, 0))
             screen.blit(intersection_background, (0, 0))
             for car in created_cars.values():
-                screen.blit(car.rotated_image, car.screen_car)
+                screen.blit(car.rotated_image, car.get_image_rect())
             pygame.display.update(screen.get_rect())
 
-        do_round(list(created_cars.values()), channel)
+        if world is not None:
+            do_world_round(world, channel, profiler)
+        else:
+            do_round(list(created_cars.values()), channel, profiler)
+
+        # The detector keeps the collisions found, the caller reads them from it
+        if collision_detector is not None:
+            collision_detector.detect(created_cars.values(), tick)
+
+        # The recorder keeps the state of the cars after the tick
+        if recorder is not None:
+            recorder.record_tick(tick, created_cars.values())
 
         if info_display:
             for car in created_cars.values():
@@ -132,7 +292,13 @@ def run_simulation(ticks, algorithm_flag=True, graphic_display=True, info_displa
                       + ' is_supervisor: ' + str(car.is_supervisor()) + ' is_second: ' + str(car.is_second_at_charge()) +
                       ' inside_full: ' + str(car.inside_full_rectangle))
 
-    pygame.display.quit()
+    if reader is not None:
+        reader.close()
+    if recorder is not None:
+        recorder.close()
+    if graphic_display:
+        pygame.display.quit()
+    return channel
 
 
 if __name__ == '__main__':
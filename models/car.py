@@ -1,9 +1,9 @@
 import os
 from math import pi, cos, sin
-from pygame import image, transform
 from models.messages import *
 from models.node import Node
-import copy
+from models.graph import CoordinationGraph
+from models.geometry import car_footprint
 
 images_directory = os.path.dirname(os.path.abspath(__file__)) + "/../images/"
 
@@ -25,10 +25,24 @@ class Car(object):
     maximum_acceleration = 20.0  # 4.2
     minimum_acceleration = -20.0  # -5.0
 
+    # Cars are created by the thousands, so they don't have a __dict__. Every instance attribute has to be here.
+    # The subclasses used for the roles declare empty slots so __class__ can still be swapped between them.
+    __slots__ = ('graphic_flag', 'image', 'rotated_image', 'image_rect', 'screen_car',
+                 'full_intersection_rectangle', 'inner_intersection_rectangle', 'inside_full_rectangle',
+                 'left_inner_rectangle', 'last_to_leave', 'name', 'initial_speed', 'absolute_speed',
+                 'initial_acceleration', 'acceleration_rate', 'intention',
+                 'pos_x', 'pos_y', 'direction', 'lane', 'origin_x', 'origin_y', 'origin_direction', 'origin_lane',
+                 'time_step', 'speed_factor', 'scale_rate', 'world', 'world_index', 'controller', 'graph',
+                 'following_cars', 'supervisor_car', 'second_at_charge', 'control_law_value',
+                 'last_virtual_distance', 'left_intersection_time', 'creation_time', 'update_ticks', 'counter',
+                 'coordination_counter', 'coordination_ticks', 'channel', 'lie_to_supervisor', 'supervisor_lies',
+                 'supervisor_is_lying', 'sensor', 'algorithm_flag', 'path', 'path_position')
+
     def __init__(self, name, pos_x=0.0, pos_y=0.0, absolute_speed=0.0, acceleration_rate=3.0, direction=0, lane=1,
                  creation_time=None, left_intersection_time=None, channel=None, intention="s", ticks=1,
                  coordination_ticks=2, graph=None, leaf_cars=None, inner_intersection=None, full_intersection=None,
-                 controller=None, sensor_flag=False, algorithm_flag=False):
+                 controller=None, sensor_flag=False, algorithm_flag=False, graphic_flag=True, world=None,
+                 path_following=False):
         """
         :param name: id to identify the car. Integer
         :param pos_x: x value of the car position.
@@ -37,11 +51,19 @@ class Car(object):
         :param direction: direction of the car. Represented in degrees.
         :param lane: lane in which the car is travelling.
         :param direction: direction at which the front of the car is looking.
+        :param graphic_flag: if False the car is headless, it never loads or transforms images and only keeps
+        its geometric footprint.
+        :param world: World object. If it is given the car is added to it and its movement state is kept there.
+        :param path_following: if True the car moves along the precomputed path of its lane and intention, its
+        state is the distance travelled along it. It needs the intersection rectangles.
         """
 
-        # Visualization variables
+        # Visualization variables. They are only used when the car is drawn, the geometry of the car is
+        # always the footprint kept in screen_car.
+        self.graphic_flag = graphic_flag
         self.image = None
         self.rotated_image = None
+        self.image_rect = None
         self.screen_car = None
 
         # Basic parameters
@@ -70,26 +92,41 @@ class Car(object):
 
         # Saves the position, direction and lane. The direction is in degrees. Where the car is pointing to.
         # The lane which the car enters the intersection, South: 0, East: 1, North: 2, West: 3
-        self.initial_coordinates = {'pos_x': pos_x, 'pos_y': pos_y, 'direction': direction, 'lane': lane}
-        self.actual_coordinates = {'pos_x': pos_x, 'pos_y': pos_y, 'direction': direction, 'lane': lane}
+        self.origin_x = pos_x
+        self.origin_y = pos_y
+        self.origin_direction = direction
+        self.origin_lane = lane
+        self.pos_x = pos_x
+        self.pos_y = pos_y
+        self.direction = direction
+        self.lane = lane
+
+        # Time step and speed factor of the movement and rate of the image size. They start with the values of the
+        # class but they can be changed for each car.
+        self.time_step = self.TIME_STEP
+        self.speed_factor = self.SPEED_FACTOR
+        self.scale_rate = self.image_scale_rate
+
+        # World which keeps the position, speed, acceleration and direction of the car when it is not None.
+        # The car is just a view of its position in the arrays of the world.
+        self.world = None
+        self.world_index = None
 
         # Function that takes care of the cars movement
         self.controller = controller
 
         # Follower variables
-        # Dictionary that represents the caravan
-        # It has to be a dictionary of Nodes because you need to store the follow list, the intention and
+        # Graph that represents the caravan
+        # It has to be a graph of Nodes because you need to store the follow list, the intention and
         # origin lane
         # key = id, value = Node(list of cars, intention, lane)
-        self.graph = graph
-        if graph is None:
-            self.graph = {}
-
-        # List of ids, need to start checking from here when a new car is added
-        # When a new car is added it may replace some of the leaves. The BFS search starts from this ids.
-        self.leaf_cars = leaf_cars
-        if leaf_cars is None:
-            self.leaf_cars = set()
+        # It also keeps the leaf cars, the ids that the BFS search starts from when a new car is added
+        if isinstance(graph, CoordinationGraph):
+            self.graph = graph
+        else:
+            self.graph = CoordinationGraph(graph)
+        if leaf_cars is not None:
+            self.graph.set_leaf_cars(leaf_cars)
 
         # Dictionary with the key being the id of the cars that I follow and the content
         # is the info I need to know about it. Current position, speed and acceleration
@@ -134,7 +171,7 @@ class Car(object):
         self.supervisor_lies = False
         self.supervisor_is_lying = False
 
-        # Sets the rectangle that represents the car in pygame
+        # Sets the rectangle that represents the car and, if it is drawn, its image
         self.new_image()
         # It takes care of the movement of the car so it doesn't crash with the car in front of it in the same lane
         self.sensor = None
@@ -143,6 +180,17 @@ class Car(object):
 
         self.algorithm_flag = algorithm_flag
 
+        # Path followed by the car and distance travelled along it, None if the car turns tick by tick
+        self.path = None
+        self.path_position = 0.0
+        if path_following and inner_intersection is not None and full_intersection is not None:
+            from models.paths import get_path_table
+            self.path = get_path_table(lane, intention, inner_intersection, pos_x, pos_y, direction,
+                                       time_step=self.time_step, speed_factor=self.speed_factor)
+
+        if world is not None:
+            world.add_car(self)
+
         # Sets the car as the last car to enter through that lane
         if channel is not None:
             channel.last_to_enter_notification(self)
@@ -173,6 +221,20 @@ class Car(object):
                + " follows + " + ''.join([str(car) for car in self.get_following_cars()]) \
                + " creation time " + str(self.get_creation_time())
 
+    # Checkpoints keep every attribute but the images, which are pygame surfaces, they are taken again from the atlas
+    def __getstate__(self):
+        state = dict((slot, getattr(self, slot)) for slot in Car.__slots__ if hasattr(self, slot))
+        state['image'] = None
+        state['rotated_image'] = None
+        state['image_rect'] = None
+        return state
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        if self.graphic_flag:
+            self.new_image()
+
     def to_json(self):
         """
         Returns a string representing a car in json format, for log use.
@@ -196,16 +258,16 @@ class Car(object):
 
     # Getters and Setters
     def get_time_step(self):
-        return self.TIME_STEP
+        return self.time_step
 
     def set_time_step(self, time_step):
-        self.TIME_STEP = time_step
+        self.time_step = time_step
 
     def get_speed_factor(self):
-        return self.SPEED_FACTOR
+        return self.speed_factor
 
     def set_speed_factor(self, speed_factor):
-        self.SPEED_FACTOR = speed_factor
+        self.speed_factor = speed_factor
 
     def get_sensor(self):
         return self.sensor
@@ -230,13 +292,15 @@ class Car(object):
         """
         :return: returns and int representing the lane of the car
         """
-        return self.actual_coordinates['lane']
+        return self.lane
 
     def set_lane(self, new_lane):
         """
         :param new_lane: int representing the new lane of the car
         """
-        self.actual_coordinates['lane'] = new_lane
+        self.lane = new_lane
+        if self.world is not None:
+            self.world.set_lane(self.world_index, new_lane)
 
     def get_intention(self):
         """
@@ -247,33 +311,50 @@ class Car(object):
     def set_intention(self, new_intention):
         if new_intention in ['s', 'l', 'r']:
             self.intention = new_intention
+            if self.world is not None:
+                self.world.set_intention(self.world_index, new_intention)
 
     def get_direction(self):
-        return self.actual_coordinates['direction']
+        if self.world is not None:
+            return float(self.world.direction[self.world_index])
+        return self.direction
 
     def set_direction(self, new_direction):
-        self.actual_coordinates['direction'] = new_direction
+        if self.world is not None:
+            self.world.direction[self.world_index] = new_direction
+        else:
+            self.direction = new_direction
 
     def get_origin_direction(self):
-        return self.initial_coordinates['direction']
+        return self.origin_direction
 
     def get_x_coordinate(self):
-        return self.actual_coordinates['pos_x']
+        if self.world is not None:
+            return float(self.world.pos_x[self.world_index])
+        return self.pos_x
 
     def set_x_coordinate(self, new_x):
-        self.actual_coordinates['pos_x'] = new_x
+        if self.world is not None:
+            self.world.pos_x[self.world_index] = new_x
+        else:
+            self.pos_x = new_x
 
     def get_origin_x_coordinate(self):
-        return self.initial_coordinates['pos_x']
+        return self.origin_x
 
     def get_y_coordinate(self):
-        return self.actual_coordinates['pos_y']
+        if self.world is not None:
+            return float(self.world.pos_y[self.world_index])
+        return self.pos_y
 
     def set_y_coordinate(self, new_y):
-        self.actual_coordinates['pos_y'] = new_y
+        if self.world is not None:
+            self.world.pos_y[self.world_index] = new_y
+        else:
+            self.pos_y = new_y
 
     def get_origin_y_coordinate(self):
-        return self.initial_coordinates['pos_y']
+        return self.origin_y
 
     def get_position(self):
         return self.get_x_coordinate(), self.get_y_coordinate()
@@ -283,26 +364,35 @@ class Car(object):
         Return the tuple containing the actual coordinates fo a car.
         :return: (<int>, <int>, <int>, <int>) actual coordinates of a car.
         """
-        return self.actual_coordinates
+        return {'pos_x': self.get_x_coordinate(), 'pos_y': self.get_y_coordinate(),
+                'direction': self.get_direction(), 'lane': self.get_lane()}
 
     def get_origin_coordinates(self):
         """
         Return the tuple containing the origin coordinates fo a car.
         :return: (<int>, <int>, <int>, <int>) origin coordinates of a car.
         """
-        return self.initial_coordinates
+        return {'pos_x': self.origin_x, 'pos_y': self.origin_y, 'direction': self.origin_direction,
+                'lane': self.origin_lane}
 
     # Speed
     def get_speed(self):
+        if self.world is not None:
+            return float(self.world.speed[self.world_index])
         return self.absolute_speed
 
     def set_speed(self, new_speed):
-        self.absolute_speed = new_speed
+        if self.world is not None:
+            self.world.speed[self.world_index] = new_speed
+        else:
+            self.absolute_speed = new_speed
 
     def get_initial_speed(self):
         return self.initial_speed
 
     def get_acceleration(self):
+        if self.world is not None:
+            return float(self.world.acceleration[self.world_index])
         return self.acceleration_rate
 
     def set_acceleration(self, new_acceleration):
@@ -314,7 +404,40 @@ class Car(object):
             new_acceleration = self.minimum_acceleration
         elif new_acceleration > self.maximum_acceleration:
             new_acceleration = self.maximum_acceleration
-        self.acceleration_rate = new_acceleration
+        if self.world is not None:
+            self.world.acceleration[self.world_index] = new_acceleration
+        else:
+            self.acceleration_rate = new_acceleration
+
+    # World related
+    def get_world(self):
+        return self.world
+
+    def get_world_index(self):
+        return self.world_index
+
+    def attach_world(self, world, index):
+        """
+        Makes the car a view of its position in the arrays of the world. Used by World.add_car.
+        """
+        self.world = world
+        self.world_index = index
+
+    def detach_world(self):
+        """
+        Copies the state of the car back from the world and stops being a view of it. Used by World.remove_car.
+        """
+        pos_x, pos_y = self.get_position()
+        direction = self.get_direction()
+        speed = self.get_speed()
+        acceleration = self.get_acceleration()
+        self.world = None
+        self.world_index = None
+        self.set_x_coordinate(pos_x)
+        self.set_y_coordinate(pos_y)
+        self.set_direction(direction)
+        self.set_speed(speed)
+        self.acceleration_rate = acceleration
 
     def get_origin_acceleration(self):
         return self.initial_acceleration
@@ -330,7 +453,11 @@ class Car(object):
         return self.graph
 
     def set_graph(self, graph):
-        self.graph = copy.deepcopy(graph)
+        # The graph is shared with the given one until one of them changes
+        if isinstance(graph, CoordinationGraph):
+            self.graph = graph.snapshot()
+        else:
+            self.graph = CoordinationGraph(graph)
 
     def get_following_cars(self):
         return self.following_cars
@@ -341,22 +468,35 @@ class Car(object):
         the speed, acceleration and position of the cars.
         :return:
         """
-        self.following_cars = copy.deepcopy(new_dict_of_cars)
+        # The values only hold numbers and strings, copying each dictionary is enough
+        if self.channel is not None:
+            for name in self.following_cars:
+                self.channel.unsubscribe(self.get_name(), name)
+        self.following_cars = dict((name, dict(info)) for name, info in new_dict_of_cars.items())
+        if self.channel is not None:
+            for name in self.following_cars:
+                self.channel.subscribe(self.get_name(), name)
+
+    # Stops following a car, the channel stops sending its InfoMessages to this car
+    def remove_following_car(self, name):
+        del self.following_cars[name]
+        if self.channel is not None:
+            self.channel.unsubscribe(self.get_name(), name)
 
     def get_leaf_cars(self):
         """
-        :return: returns list of ids that
+        :return: returns set of ids of the cars that no one follows
         """
-        return self.leaf_cars
+        return self.graph.get_leaf_cars()
 
     def set_leaf_cars(self, new_set):
-        self.leaf_cars = copy.deepcopy(new_set)
+        self.graph.set_leaf_cars(new_set)
 
     def add_leaf(self, car):
-        self.leaf_cars.add(car)
+        self.graph.add_leaf(car)
 
     def remove_leaf(self, car):
-        self.leaf_cars.remove(car)
+        self.graph.remove_leaf(car)
 
     # Supervisor related
     def get_supervisor_car(self):
@@ -397,10 +537,10 @@ class Car(object):
 
     # Visualization
     def get_image_scale_rate(self):
-        return self.image_scale_rate
+        return self.scale_rate
 
     def set_image_scale_rate(self, new_rate):
-        self.image_scale_rate = new_rate
+        self.scale_rate = new_rate
 
     # Visualization methods
 
@@ -419,28 +559,54 @@ class Car(object):
         return abs((self.get_rect().right - self.get_rect().left) * sin(self.get_direction() * pi / 180) +
                    (self.get_rect().top - self.get_rect().bottom) * cos(self.get_direction() * pi / 180))
 
-    def new_image(self, scale_rate=image_scale_rate):
+    def new_image(self, scale_rate=None):
+        """
+        Creates the representation of a car. The footprint (the rect) is always created, the image and the rotated
+        image are only taken from the shared sprite atlas when the car is drawn.
         """
-        Creates the image representation of a car, with his rotated image and his screen representation (with the rect).
+        if scale_rate is None:
+            scale_rate = self.get_image_scale_rate()
+        self.update_footprint(scale_rate)
+        if self.graphic_flag:
+            from models.sprites import get_sprite_atlas
+            self.image = get_sprite_atlas(scale_rate).get_image()
+            self.rotate_image(scale_rate)
+
+    def update_footprint(self, scale_rate=None):
         """
-        self.image = image.load(images_directory + "car.png")
-        self.rotated_image = transform.rotate(self.image, self.get_direction())  # image of the car rotated
-        self.rotated_image = transform.scale(self.rotated_image, (  # reduction of the size of the image
-            int(self.rotated_image.get_rect().w * scale_rate),
-            int(self.rotated_image.get_rect().h * scale_rate)))
-        self.screen_car = self.rotated_image.get_rect()  # rectangle representation of the car
-        self.screen_car.center = self.get_position()  # add the position to the rectangle
+        Moves the rectangle which represents the car to its position. It has the same size that the rotated and scaled
+        image would have, but it is computed without pygame.
+        """
+        if scale_rate is None:
+            scale_rate = self.get_image_scale_rate()
+        self.screen_car = car_footprint(self.get_x_coordinate(), self.get_y_coordinate(), self.get_direction(),
+                                        scale_rate)
+
+    def rotate_image(self, scale_rate):
+        """
+        Looks up the pre-rotated image of the car in the sprite atlas and centers it in the position of the car.
+        """
+        from models.sprites import get_sprite_atlas
+        self.rotated_image = get_sprite_atlas(scale_rate).get_rotated_image(self.get_direction())
+        self.image_rect = self.rotated_image.get_rect()
+        self.image_rect.center = self.get_position()
+
+    def get_image_rect(self):
+        """
+        Returns the rectangle where the image of the car has to be drawn. It can differ by a pixel from the footprint
+        because the atlas scales the image before rotating it.
+        :return: rectangle of the image of the car
+        """
+        return self.image_rect
 
     def draw_car(self):
         """
-        Prepares the image of the car to be drawn. The image is rotated, re-escalated and moved.
+        Prepares the car to be drawn. The footprint is moved and, if the car is drawn, the rotated image is taken
+        from the atlas.
         """
-        self.rotated_image = transform.rotate(self.image, self.get_direction())
-        self.rotated_image = transform.scale(self.rotated_image, (
-            int(self.rotated_image.get_rect().w * self.get_image_scale_rate()),
-            int(self.rotated_image.get_rect().h * self.get_image_scale_rate())))
-        self.screen_car = self.rotated_image.get_rect()
-        self.screen_car.center = self.get_position()
+        self.update_footprint()
+        if self.graphic_flag:
+            self.rotate_image(self.get_image_scale_rate())
 
     # Movement methods
     def full_inside_inner_intersection(self):
@@ -491,16 +657,8 @@ class Car(object):
         :param other_car_lane: the lane at which the other car star its way.
         :return: True if the paths does not crosses, False otherwise.
         """
-        self_lane = self.get_lane()
-        self_intention = self.get_intention()
-        lane_to_int_dict = {"l": 0, "s": 1, "r": 2}
-        table0 = [[True, True, True], [True, True, True], [True, True, True]]
-        table1 = [[True, True, False], [True, True, False], [False, True, False]]
-        table2 = [[True, True, True], [True, False, False], [True, False, False]]
-        table3 = [[True, True, False], [True, True, True], [False, False, False]]
-        all_tables = [table0, table1, table2, table3]
-        return all_tables[(self_lane - other_car_lane) % 4][lane_to_int_dict[self_intention]][
-            lane_to_int_dict[other_car_intention]]
+        from utils.utils import cross_path_table
+        return cross_path_table[self.get_lane()][self.get_intention()][other_car_lane][other_car_intention]
 
     # Returns what will be the next speed after accelerating but without making any changes
     def next_speed(self):
@@ -517,7 +675,7 @@ class Car(object):
          to work in milliseconds. Seconds = 1000.
         :return: None
         """
-        self.absolute_speed = self.next_speed()
+        self.set_speed(self.next_speed())
 
     def next_position(self):
         from functions.car_functions import next_position
@@ -536,8 +694,8 @@ class Car(object):
         rad = self.get_direction() * pi / 180
         pos_x = self.get_x_coordinate()
         pos_y = self.get_y_coordinate()
-        pos_x_diff = -sin(rad) * self.get_speed() * self.TIME_STEP * self.SPEED_FACTOR
-        pos_y_diff = -cos(rad) * self.get_speed() * self.TIME_STEP * self.SPEED_FACTOR
+        pos_x_diff = -sin(rad) * self.get_speed() * self.get_time_step() * self.get_speed_factor()
+        pos_y_diff = -cos(rad) * self.get_speed() * self.get_time_step() * self.get_speed_factor()
         self.set_x_coordinate(pos_x + pos_x_diff)
         self.set_y_coordinate(pos_y + pos_y_diff)
         """
@@ -549,33 +707,12 @@ class Car(object):
     # adds then new car to the graph with its follow list, it doesnt add the follow list which contains the
     # important data of the cars, it gets this when they send an info message
     def add_new_car(self, name, lane, intention):
-        from utils.utils import cars_cross_path
         graph = self.get_graph()
-        leaf_cars = self.get_leaf_cars()
-        follow_list = list()
-        visited = set()
-        # list of nodes
-        to_visit = [graph[car] for car in leaf_cars]
         # starts checking the leaves
-        while to_visit:
-            node = to_visit.pop(0)
-            if node.get_name() not in visited:
-                visited.add(node.get_name())
-                if cars_cross_path(lane, intention, node.get_lane(), node.get_intention()):
-                    follow_list.append(node.get_name())
-                    for car in node.get_follow_list():
-                        visited.add(car)
-                else:
-                    # If it doesn't collide then add the follow list of the node to to_visit list
-                    to_visit = to_visit + [graph[car] for car in graph[node.get_name()].get_follow_list()]
-
-        for car in follow_list:
-            if car in self.get_leaf_cars():
-                leaf_cars.remove(car)
-        leaf_cars.add(name)
+        follow_list = graph.find_follow_list(lane, intention)
         if name == self.get_name() and name in follow_list:
             follow_list.remove(name)
-        graph[name] = Node(name=name, follow_list=follow_list, lane=lane, intention=intention)
+        graph.add_node(name=name, lane=lane, intention=intention, follow_list=follow_list)
 
         return follow_list
 
@@ -713,11 +850,19 @@ class Car(object):
     # sends the LeaveIntersectionMessage when it leaves the inner rectangle
     def check_position(self):
         if self.full_intersection_rectangle is not None and self.inner_intersection_rectangle is not None:
+            if self.channel is not None:
+                # A car that passed the car in front of it is moved ahead in its lane
+                self.channel.update_lane_order(self)
+                # The car behind it stops watching it once it crosses the entrance
+                if self.channel.is_approaching(self) and self.crossed_entrance():
+                    self.channel.crossed_entrance_notification(self)
             # If it hasn't changed to being inside the rectangle but it is colliding
             if not self.inside_full_rectangle and self.inside_full_intersection():
                 self.enter_intersection()
             elif self.inside_full_rectangle and not self.inside_full_intersection():
                 self.inside_full_rectangle = False
+                if self.left_inner_rectangle:
+                    self.channel.left_screen_notification(self)
             if self.inside_full_rectangle:
                 if not self.left_inner_rectangle and self.check_left_inner_intersection():
                     self.leave_inner_intersection()
@@ -752,6 +897,9 @@ class Car(object):
             followed['origin_direction'] = message.get_sender_origin_direction()
             followed['origin_x'] = message.get_sender_origin_x()
             followed['origin_y'] = message.get_sender_origin_y()
+            # Only the cars that follow a path send their position along it
+            if message.get_sender_path_position() is not None:
+                followed['path_position'] = message.get_sender_path_position()
             # Maybe do something here or in the update method with this info
 
     def receive_new_car_message(self, message):
@@ -772,32 +920,31 @@ class Car(object):
         if sender_name == self.get_second_at_charge():
             self.set_second_at_charge(None)
         if sender_name in self.get_following_cars():
-            del self.get_following_cars()[sender_name]
-        if sender_name in self.get_leaf_cars():
-            self.get_leaf_cars().remove(sender_name)
+            self.remove_following_car(sender_name)
         # Prevents the case where the car leaves before a car that entered the coop zone is coordinated.
         # In that case the car won't have the leaving car in it's graph
         # Shouldn't happen because of the way messages are handled
         if sender_name in self.get_graph():
-            del self.get_graph()[sender_name]
-        # Removes the car from the follow lists in the graph. Keeps graph info updated
-        for node in self.get_graph().values():
-            if sender_name in node.get_follow_list():
-                #print(sender_name)
-                node.get_follow_list().remove(sender_name)
+            # Also removes the car from the follow lists in the graph and updates the leaves
+            self.get_graph().remove_node(sender_name)
+        elif sender_name in self.get_leaf_cars():
+            self.remove_leaf(sender_name)
 
     # If the supervisor car is None is the base case.
+    # A welcome message that was sent before the supervisor added the car to the graph is ignored, it happens when
+    # the channel delays the messages, the car waits for the welcome message sent to it.
     def receive_welcome_message(self, message):
         from models.controller import algorithm_controller
-        if self.get_name() == message.get_receiver_name() or \
-                (self.get_supervisor_car() is None and message.get_receiver_name() is None):
+        if (self.get_name() == message.get_receiver_name() or
+                (self.get_supervisor_car() is None and message.get_receiver_name() is None)) \
+                and self.get_name() in message.get_graph():
             self.set_supervisor_car(message.get_supervisor())
             self.set_second_at_charge(message.get_second_at_charge())
             # gets the prepared list from the welcome message using its name
             # needed like this later to be able to receive InfoMessages correctly
-            self.set_leaf_cars(message.get_leaf_cars())
             self.set_following_cars(message.get_follow_list(self.get_name()))
-            self.set_graph(copy.deepcopy(message.get_graph()))
+            self.set_graph(message.get_graph())
+            self.set_leaf_cars(message.get_leaf_cars())
             # TODO: SET GRAPH CONTROLLER RIGHT
             if self.algorithm_flag:
                 self.set_controller(algorithm_controller)
@@ -930,7 +1077,8 @@ class Car(object):
             pos_x, pos_y = self.get_position()
             inner_rectangle = self.inner_intersection_rectangle
             return next_direction(speed, actual_direction, origin_direction, lane, intention,
-                                  inner_rectangle, pos_x, pos_y, origin_x, origin_y)
+                                  inner_rectangle, pos_x, pos_y, origin_x, origin_y, time_step=self.get_time_step(),
+                                  speed_factor=self.get_speed_factor())
         else:
             return self.get_direction()
 
@@ -948,22 +1096,80 @@ class Car(object):
         new_x, new_y = self.next_position()
         return new_x, new_y, next_speed, next_direction
 
-    def move_control(self):
+    # The timer, like PhaseProfiler.mark, is called with the name of each phase when it ends
+    def move_control(self, timer=None):
         self.accelerate()
-        self.turn()
-        self.move()
+        if timer is not None:
+            timer('accelerate')
+        if self.path is not None:
+            self.move_along_path()
+        else:
+            self.turn()
+            if timer is not None:
+                timer('turn')
+            self.move()
+        if timer is not None:
+            timer('move')
         self.draw_car()
+        if timer is not None:
+            timer('draw')
+
+    # Path following
+    def get_path(self):
+        return self.path
+
+    def get_path_position(self):
+        return self.path_position
+
+    # Advances along the path the distance of a tick and takes the position and direction from it
+    def move_along_path(self):
+        self.path_position += self.get_speed() * self.get_time_step() * self.get_speed_factor()
+        pos_x, pos_y, direction = self.path.position_at(self.path_position)
+        self.set_x_coordinate(pos_x)
+        self.set_y_coordinate(pos_y)
+        self.set_direction(direction)
+
+    def path_distance_to_point(self, point):
+        """
+        Distance along the path of the car to a point, negative if the car already passed it.
+        """
+        return self.path.distance_to_point(self.path_position, point)
 
     # Minimum process to simulate the coordination system
     # TODO: ADD THE MOVEMENT PART TO SIMULATE A TICK AND MAKE CONTROLLER THAT USES THE INFO FROM THE CARS
-    def update(self):
+    def update(self, timer=None):
+        self.control(timer)
+        self.move_control(timer)
+        self.communicate(timer)
+
+    # First phase of a tick, the controller and the sensor decide the acceleration of the car
+    def control(self, timer=None):
+        self.run_controller()
+        if timer is not None:
+            timer('controller')
+        self.watch_sensor()
+        if timer is not None:
+            timer('sensor')
+
+    def run_controller(self):
         if self.get_controller() is not None:
             self.get_controller()(self)
+
+    def watch_sensor(self):
         if self.sensor is not None:
             self.sensor.watch()
 
-        self.move_control()
+    # Last phase of a tick, after the car moved it checks where it is and sends its messages
+    def communicate(self, timer=None):
         self.check_position()
+        if timer is not None:
+            timer('check_position')
+        self.send_messages()
+        if timer is not None:
+            timer('messages')
+
+    # Sends the info of the car to the cars that follow it and, while it has no supervisor, checks the coordination
+    def send_messages(self):
         if self.get_name() == 15:
             print(list(self.following_cars))
             print([self.get_acceleration(), self.get_speed()])
@@ -986,10 +1192,11 @@ class Car(object):
         return self.is_supervisor()
 
     def delete_self(self):
-        del self.get_graph()[self.get_name()]
+        self.get_graph().remove_node(self.get_name())
 
 
 class SupervisorCar(Car):
+    __slots__ = ()
 
     def test_method(self):
         print("SupervisorCar")
@@ -1024,6 +1231,7 @@ class SupervisorCar(Car):
 
 
 class SecondAtChargeCar(Car):
+    __slots__ = ()
 
     def is_second_at_charge(self):
         return True
@@ -1032,14 +1240,10 @@ class SecondAtChargeCar(Car):
         # print("LeftIntersectionMessageSecond \nSender: ", message.get_sender_name(), " Receiver: ", self.get_name())\
         sender_name = message.get_sender_name()
         if sender_name in self.get_following_cars():
-            del self.get_following_cars()[sender_name]
-        if sender_name in self.get_leaf_cars():
-            self.get_leaf_cars().remove(sender_name)
-        del self.get_graph()[sender_name]
-
-        for node in self.get_graph().values():
-            if sender_name in node.get_follow_list():
-                node.get_follow_list().remove(sender_name)
+            self.remove_following_car(sender_name)
+        # Same as the base case, the car may have left before the second at charge got to coordinate it
+        if sender_name in self.get_graph():
+            self.get_graph().remove_node(sender_name)
 
         if sender_name != self.get_name() and sender_name == self.get_supervisor_car():
             self.set_supervisor_car(self.get_name())
@@ -1,20 +1,64 @@
-import copy
+import heapq
+from itertools import count
+from models.lanes import LaneQueue
+
+
+# Priority of the messages in a bandwidth limited channel, lower goes first. NewCarMessages and
+# LeftIntersectionMessages are never queued, they are delivered when they are sent.
+def message_priority(message):
+    if message.is_welcome_message() or message.is_second_at_charge_message():
+        return 0
+    if message.is_info_message():
+        return 1
+    return 2
 
 
 # Behaviour will be create a Channel and then add cars to it, when added the channel will send NewCarMessage
 class Channel(object):
 
-    def __init__(self, messages_per_round=10, car_list=None, round_messages=None, next_round_messages=None):
+    def __init__(self, messages_per_round=10, car_list=None, round_messages=None, next_round_messages=None,
+                 debug=False, broadcast_delivery=False, bandwidth_limited=False, info_deadline=2):
 
         # Amount of messages that can be sent in a round. Works like a timeout. It's measured in quantity,
         # but the idea is the amount of messages that can be sent in a time interval.
         self.messages_per_round = messages_per_round
         # Counter of messages sent in the current round.
         self.messages_sent = 0
+        # Messages delivered as soon as they were sent since the last round started, they take capacity from the
+        # next round
+        self.immediate_messages = 0
         self.cars = car_list  # It is a list of Car objects
         if car_list is None:
             self.cars = []
 
+        # Delivery index. Messages with a receiver go straight to it and InfoMessages only go to the cars that
+        # follow the sender. The rest of the messages change the state of every car, so they are broadcast.
+        # key = id, value = Car object
+        self.cars_by_name = {}
+        # key = id of the sender, value = set of ids of the cars that follow it
+        self.subscriptions = {}
+        for car in self.cars:
+            self.index_car(car)
+        # If True every message is delivered to every car, like a real broadcast
+        self.broadcast_delivery = broadcast_delivery
+
+        # Bandwidth limited mode. InfoMessages are queued too and at most messages_per_round messages are
+        # delivered each round, by priority of their type, then deadline and then age. The rest carry over to
+        # the next rounds and InfoMessages older than info_deadline rounds are dropped.
+        self.bandwidth_limited = bandwidth_limited
+        self.info_deadline = info_deadline
+        self.round_number = 0
+        # Heap of (priority, deadline, round queued, sequence number, message)
+        self.message_queue = []
+        self.message_sequence = count()
+        # Statistics of the bandwidth limited mode
+        self.queue_depths = []
+        self.queuing_delays = []
+        self.dropped_messages = {}
+
+        # Function called with every message before it is delivered, like TraceRecorder.record_message
+        self.message_listener = None
+
         # List of messages that are going to be sent in the current tick/round
         self.current_round_messages = round_messages
         if round_messages is None:
@@ -26,43 +70,245 @@ class Channel(object):
         if next_round_messages is None:
             self.next_round_messages = []
 
+        # In debug mode every message is fingerprinted when it is queued and checked when the round swaps and
+        # after being delivered to each car, if a message changes after being queued a RuntimeError is raised.
+        self.debug = debug
+        # key = id of a queued message, value = (message, fingerprint when it was queued)
+        self.queued_fingerprints = {}
+
         # Dictionaries that keep the last cars which left the inner intersection by lane of exit
         # and the same for entering the screen
         self.recent_leaving = {0: None, 1: None, 2: None, 3: None}
         self.recent_entering = {0: None, 1: None, 2: None, 3: None}
 
+        # Cars of each lane in order, the ones that haven't crossed the entrance of the inner intersection by lane
+        # of origin and the ones that left it by lane of exit. The sensor of a car watches the car in front of it
+        # and it is told when that car changes, so sensors don't have to check the cars they watch.
+        self.approach_lanes = dict((lane, LaneQueue(lane)) for lane in range(4))
+        self.exit_lanes = dict((lane, LaneQueue(lane, exiting=True)) for lane in range(4))
+
+    # The message listener is not saved in checkpoints, it has to be set again after restoring the channel
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # Reading the counter consumes a value, so it is replaced by one that starts at that value
+        state['message_sequence'] = next(self.message_sequence)
+        self.message_sequence = count(state['message_sequence'])
+        state['message_listener'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.message_sequence = count(state['message_sequence'])
+
     def last_to_leave_notification(self, car):
-        if car.get_sensor() is not None:
-            car.get_sensor().set_closest_car(self.recent_leaving[car.destination_lane()])
+        self.add_to_lane(self.exit_lanes[car.destination_lane()], car)
         self.recent_leaving[car.destination_lane()] = car
 
     def last_to_enter_notification(self, car):
-        if car.get_sensor() is not None:
-            car.get_sensor().set_closest_car(self.recent_entering[car.get_lane()])
+        self.add_to_lane(self.approach_lanes[car.get_lane()], car)
         self.recent_entering[car.get_lane()] = car
 
+    # The car watches the car in front of it and the car behind it, if there is one, watches the new car
+    def add_to_lane(self, lane_queue, car):
+        lane_queue.append(car)
+        self.link_sensors(lane_queue, [car, lane_queue.get_next(car.get_name())])
+
+    # The car moved, if it passed the car in front of it in one of its lanes the cars are put in order again
+    def update_lane_order(self, car):
+        for lane_queue in [self.approach_lanes[car.get_lane()], self.exit_lanes[car.destination_lane()]]:
+            if car.get_name() in lane_queue:
+                self.link_sensors(lane_queue, lane_queue.move_forward(car.get_name()))
+
+    def link_sensors(self, lane_queue, cars):
+        for car in cars:
+            if car is not None:
+                self.set_sensor_car(car, lane_queue.get_previous(car.get_name()))
+
+    # The car crossed the entrance of the inner intersection, it stops being watched in its lane of origin
+    def crossed_entrance_notification(self, car):
+        self.remove_from_lane(self.approach_lanes[car.get_lane()], car)
+
+    # The car left the screen after crossing the intersection
+    def left_screen_notification(self, car):
+        for lanes in [self.approach_lanes, self.exit_lanes]:
+            for lane_queue in lanes.values():
+                if car.get_name() in lane_queue:
+                    self.remove_from_lane(lane_queue, car)
+
+    def is_approaching(self, car):
+        return car.get_name() in self.approach_lanes[car.get_lane()]
+
+    def remove_from_lane(self, lane_queue, car):
+        previous, following = lane_queue.remove(car.get_name())
+        if following is not None and following.get_sensor() is not None \
+                and following.get_sensor().get_closest_car() is car:
+            following.get_sensor().set_closest_car(previous)
+
+    @staticmethod
+    def set_sensor_car(car, closest_car):
+        if car.get_sensor() is not None:
+            car.get_sensor().set_closest_car(closest_car)
+
+    def get_approach_lanes(self):
+        return self.approach_lanes
+
+    def get_exit_lanes(self):
+        return self.exit_lanes
+
     def add_car(self, car):
         self.cars.append(car)
+        self.index_car(car)
+
+    def index_car(self, car):
+        self.cars_by_name[car.get_name()] = car
+        for sender_name in car.get_following_cars():
+            self.subscribe(car.get_name(), sender_name)
+
+    def unindex_car(self, car):
+        if self.cars_by_name.get(car.get_name()) is car:
+            del self.cars_by_name[car.get_name()]
+        for sender_name in car.get_following_cars():
+            self.unsubscribe(car.get_name(), sender_name)
+
+    # The cars call them when they start or stop following a car
+    def subscribe(self, car_name, sender_name):
+        self.subscriptions.setdefault(sender_name, set()).add(car_name)
+
+    def unsubscribe(self, car_name, sender_name):
+        subscribers = self.subscriptions.get(sender_name)
+        if subscribers is not None:
+            subscribers.discard(car_name)
+            if not subscribers:
+                del self.subscriptions[sender_name]
+
+    def get_subscriptions(self):
+        return self.subscriptions
+
+    def receivers(self, message):
+        """
+        Cars that have to receive the message.
+        :param message: message that is going to be delivered.
+        :return: iterable of Car objects.
+        """
+        if self.broadcast_delivery:
+            return self.cars
+        if message.is_info_message():
+            subscribers = self.subscriptions.get(message.get_sender_name())
+            if not subscribers:
+                return ()
+            return [self.cars_by_name[name] for name in subscribers if name in self.cars_by_name]
+        if message.is_welcome_message() and message.get_receiver_name() is not None:
+            receiver = self.cars_by_name.get(message.get_receiver_name())
+            if receiver is None:
+                return ()
+            return receiver,
+        return self.cars
 
     def queue_message(self, message):
-        self.next_round_messages.append(message)
+        if self.debug:
+            self.queued_fingerprints[id(message)] = message, message.fingerprint(sealed=False)
+        if self.bandwidth_limited:
+            deadline = float('inf')
+            if message.is_info_message():
+                deadline = self.round_number + self.info_deadline
+            heapq.heappush(self.message_queue, (message_priority(message), deadline, self.round_number,
+                                                next(self.message_sequence), message))
+        else:
+            self.next_round_messages.append(message)
 
     def deliver(self, message):
-        for car in self.cars:
+        if self.message_listener is not None:
+            self.message_listener(message)
+        if self.debug:
+            self.deliver_checked(message)
+            return
+        for car in self.receivers(message):
             car.receive_message(message)
 
+    def deliver_checked(self, message):
+        fingerprint = message.fingerprint()
+        for car in self.receivers(message):
+            car.receive_message(message)
+            self.check_message(message, fingerprint, car.get_name())
+
+    # Compares the message with the fingerprint taken when it was queued, before it is sealed
+    def check_queued_message(self, message):
+        # The message is kept with its fingerprint so its id isn't reused while it is queued
+        fingerprint = self.queued_fingerprints.pop(id(message), (message, None))[1]
+        if fingerprint is not None:
+            self.check_message(message, fingerprint, sealed=False)
+
+    def check_message(self, message, fingerprint, car_name=None, sealed=True):
+        if message.fingerprint(sealed=sealed) != fingerprint:
+            raise RuntimeError(type(message).__name__ + ' sent by car ' + str(message.get_sender_name())
+                               + ' changed after being queued'
+                               + ('' if car_name is None else ', when car ' + str(car_name) + ' received it'))
+
     def broadcast(self, message):
-        if message.is_info_message() or message.is_new_car_message() \
+        if (message.is_info_message() and not self.bandwidth_limited) or message.is_new_car_message() \
                 or message.is_left_intersection_message():
+            self.messages_sent += 1
+            self.immediate_messages += 1
             self.deliver(message)
             if message.is_left_intersection_message():
                 self.delete_car(message.get_sender_name())
         else:
             self.queue_message(message)
 
+    # Swaps the buffers of the rounds instead of copying the messages. The list of the round that ended is
+    # reused for the next one and the messages are sealed, so they don't change anymore.
     def prepare_round(self):
-        self.current_round_messages = copy.deepcopy(self.next_round_messages)
-        self.next_round_messages = []
+        self.round_number += 1
+        if self.bandwidth_limited:
+            self.prepare_limited_round()
+            return
+        self.current_round_messages, self.next_round_messages = self.next_round_messages, \
+            self.current_round_messages
+        del self.next_round_messages[:]
+        for message in self.current_round_messages:
+            if self.debug:
+                self.check_queued_message(message)
+            message.seal()
+        self.messages_sent = len(self.current_round_messages)
+        self.immediate_messages = 0
+
+    # Takes the messages of the round from the priority queue, as many as the capacity left by the messages that
+    # were delivered immediately in the last round.
+    def prepare_limited_round(self):
+        capacity = max(0, self.messages_per_round - self.immediate_messages)
+        self.immediate_messages = 0
+        del self.current_round_messages[:]
+        while self.message_queue and len(self.current_round_messages) < capacity:
+            priority, deadline, queued_round, sequence, message = heapq.heappop(self.message_queue)
+            if self.debug:
+                self.check_queued_message(message)
+            if deadline < self.round_number:
+                message_type = type(message).__name__
+                self.dropped_messages[message_type] = self.dropped_messages.get(message_type, 0) + 1
+                continue
+            message.seal()
+            self.current_round_messages.append(message)
+            self.queuing_delays.append(self.round_number - queued_round)
+        self.messages_sent = len(self.current_round_messages)
+        self.queue_depths.append(len(self.message_queue))
+
+    def get_statistics(self):
+        """
+        Summary of the bandwidth limited mode.
+        :return: dictionary with the rounds, the delivered and dropped messages, the queuing delay in rounds and
+        the depth of the queue at the end of each round.
+        """
+        delays = self.queuing_delays
+        depths = self.queue_depths
+        return {'rounds': self.round_number,
+                'delivered': len(delays),
+                'dropped': sum(self.dropped_messages.values()),
+                'dropped_by_type': dict(self.dropped_messages),
+                'pending': len(self.message_queue),
+                'mean_delay': sum(delays) / len(delays) if delays else 0,
+                'max_delay': max(delays) if delays else 0,
+                'mean_queue_depth': sum(depths) / len(depths) if depths else 0,
+                'max_queue_depth': max(depths) if depths else 0}
 
     def update_cars(self):
         for car in self.cars:
@@ -71,7 +317,9 @@ class Channel(object):
     def delete_car(self, name):
         for i in range(len(self.cars)):
             if self.cars[i].get_name() == name:
+                car = self.cars[i]
                 del self.cars[i]
+                self.unindex_car(car)
                 break
 
     def deliver_messages(self):
@@ -88,9 +336,21 @@ class Channel(object):
 
     def set_cars(self, car_list):
         self.cars = car_list
+        self.cars_by_name = {}
+        self.subscriptions = {}
+        for car in self.cars:
+            self.index_car(car)
 
     def clean_channel(self):
         self.cars = []
+        self.cars_by_name = {}
+        self.subscriptions = {}
+
+    def get_message_listener(self):
+        return self.message_listener
+
+    def set_message_listener(self, message_listener):
+        self.message_listener = message_listener
 
     def get_current_round_messages(self):
         return self.current_round_messages
@@ -0,0 +1,69 @@
+import os
+import pickle
+import random
+
+
+# Everything a run needs to continue from a tick: the channel, which references every car, the cars by name, the
+# queues of cars waiting to be created with the position of their source, the world of the vectorized runs and the
+# state of the random module. The cars reference each other through the graph, the sensors and the lanes of the
+# channel, all of it is saved together so the references are the same objects when it is restored.
+class SimulationState(object):
+
+    def __init__(self, tick, channel, cars, spawn_queues, world=None, random_state=None):
+        """
+        :param tick: first tick that has to be simulated when the run continues.
+        :param channel: Channel of the run.
+        :param cars: dictionary of the created cars by name.
+        :param spawn_queues: SpawnQueues with the cars that haven't been created.
+        :param world: World of the vectorized runs or None.
+        :param random_state: state of the random module, by default the current one.
+        """
+        self.tick = tick
+        self.channel = channel
+        self.cars = cars
+        self.spawn_queues = spawn_queues
+        self.world = world
+        self.random_state = random.getstate() if random_state is None else random_state
+
+    def get_tick(self):
+        return self.tick
+
+    def get_channel(self):
+        return self.channel
+
+    def get_cars(self):
+        return self.cars
+
+    def get_spawn_queues(self):
+        return self.spawn_queues
+
+    def get_world(self):
+        return self.world
+
+    def get_random_state(self):
+        return self.random_state
+
+    def restore_random_state(self):
+        random.setstate(self.random_state)
+
+
+def save_checkpoint(state, file_name):
+    """
+    Saves the state of a run. It is written to a temporary file that replaces the old checkpoint, so a run that
+    crashes while saving keeps the last one.
+    :param state: SimulationState.
+    :param file_name: path of the checkpoint.
+    """
+    temporary_name = file_name + '.tmp'
+    with open(temporary_name, 'wb') as checkpoint_file:
+        pickle.dump(state, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_name, file_name)
+
+
+def load_checkpoint(file_name):
+    """
+    :param file_name: path of a checkpoint.
+    :return: the SimulationState saved in it.
+    """
+    with open(file_name, 'rb') as checkpoint_file:
+        return pickle.load(checkpoint_file)
@@ -0,0 +1,165 @@
+from math import pi, sin, cos
+from models.geometry import car_image_size
+
+
+# A collision between two cars that started in that tick
+class CollisionEvent(object):
+    __slots__ = ('tick', 'names', 'lanes', 'intentions')
+
+    def __init__(self, tick, first_car, second_car):
+        self.tick = tick
+        self.names = (first_car.get_name(), second_car.get_name())
+        self.lanes = (first_car.get_lane(), second_car.get_lane())
+        self.intentions = (first_car.get_intention(), second_car.get_intention())
+
+    def __repr__(self):
+        return 'CollisionEvent(tick=' + str(self.tick) + ', names=' + str(self.names) + ', lanes=' \
+               + str(self.lanes) + ', intentions=' + str(self.intentions) + ')'
+
+    def get_tick(self):
+        return self.tick
+
+    def get_names(self):
+        return self.names
+
+    def get_lanes(self):
+        return self.lanes
+
+    def get_intentions(self):
+        return self.intentions
+
+    def to_json(self):
+        return {'tick': self.tick, 'names': list(self.names), 'lanes': list(self.lanes),
+                'intentions': list(self.intentions)}
+
+
+# Half of the length and of the width of the body of a car, before rotating it
+def car_half_sizes(scale_rate):
+    width, height = car_image_size()
+    return height * scale_rate / 2.0, width * scale_rate / 2.0
+
+
+# Center, forward axis, side axis and half sizes of the body of a car
+def oriented_box(car):
+    pos_x, pos_y = car.get_position()
+    rad = car.get_direction() * pi / 180
+    half_length, half_width = car_half_sizes(car.get_image_scale_rate())
+    return pos_x, pos_y, (-sin(rad), -cos(rad)), (cos(rad), -sin(rad)), half_length, half_width
+
+
+def boxes_overlap(first_box, second_box):
+    """
+    Separating axis test between the bodies of two cars. Boxes that only touch don't overlap.
+    :param first_box: oriented box of a car, as oriented_box returns it.
+    :param second_box: oriented box of the other car.
+    :return: True if the boxes overlap.
+    """
+    first_x, first_y, first_forward, first_side, first_length, first_width = first_box
+    second_x, second_y, second_forward, second_side, second_length, second_width = second_box
+    distance_x = second_x - first_x
+    distance_y = second_y - first_y
+    for axis in [first_forward, first_side, second_forward, second_side]:
+        distance = abs(distance_x * axis[0] + distance_y * axis[1])
+        first_radius = first_length * abs(first_forward[0] * axis[0] + first_forward[1] * axis[1]) \
+            + first_width * abs(first_side[0] * axis[0] + first_side[1] * axis[1])
+        second_radius = second_length * abs(second_forward[0] * axis[0] + second_forward[1] * axis[1]) \
+            + second_width * abs(second_side[0] * axis[0] + second_side[1] * axis[1])
+        if distance >= first_radius + second_radius:
+            return False
+    return True
+
+
+# Finds the cars whose bodies overlap in every tick. The broadphase sweeps the footprints of the cars along the x
+# axis: the cars are kept sorted by the left side of their footprint, and that order barely changes from one tick
+# to the next, so the insertion sort that keeps it is almost linear. Only the pairs whose footprints overlap are
+# checked with the exact test between the rotated bodies.
+class CollisionDetector(object):
+
+    def __init__(self, on_collision=None, margin=1):
+        """
+        :param on_collision: optional function called with every new CollisionEvent.
+        :param margin: pixels added around the footprints, they are rounded to integers and the body can go past
+        them by a fraction of a pixel.
+        """
+        self.on_collision = on_collision
+        self.margin = margin
+        # Cars sorted by the left side of their footprint in the last tick
+        self.sorted_cars = []
+        # Pairs of names of the cars that were colliding in the last tick
+        self.colliding_pairs = set()
+        # Every collision event found, in order
+        self.events = []
+
+    def get_events(self):
+        return self.events
+
+    def get_colliding_pairs(self):
+        return self.colliding_pairs
+
+    def sort_cars(self, cars):
+        """
+        Updates the order of the cars of the last tick, new cars are added at the end and then moved to their
+        place. The cars that are not in the given list are removed.
+        :param cars: iterable of the Car objects of the tick.
+        :return: list of (left, right, top, bottom, car) sorted by left.
+        """
+        current = dict((id(car), car) for car in cars)
+        ordered = [car for car in self.sorted_cars if id(car) in current]
+        known = set(id(car) for car in ordered)
+        ordered.extend(car for car in current.values() if id(car) not in known)
+        margin = self.margin
+        entries = []
+        for car in ordered:
+            rect = car.get_rect()
+            entries.append((rect.left - margin, rect.right + margin, rect.top - margin, rect.bottom + margin, car))
+        # Insertion sort, almost sorted from the last tick
+        for i in range(1, len(entries)):
+            entry = entries[i]
+            j = i - 1
+            while j >= 0 and entries[j][0] > entry[0]:
+                entries[j + 1] = entries[j]
+                j -= 1
+            entries[j + 1] = entry
+        self.sorted_cars = [entry[4] for entry in entries]
+        return entries
+
+    def candidate_pairs(self, cars):
+        """
+        Broadphase, pairs of cars whose footprints overlap.
+        :param cars: iterable of Car objects.
+        :return: list of pairs of Car objects.
+        """
+        pairs = []
+        active = []
+        for entry in self.sort_cars(cars):
+            left = entry[0]
+            active = [other for other in active if other[1] > left]
+            for other in active:
+                if entry[2] < other[3] and other[2] < entry[3]:
+                    pairs.append((other[4], entry[4]))
+            active.append(entry)
+        return pairs
+
+    def detect(self, cars, tick):
+        """
+        Checks the cars of a tick and reports the collisions that started in it.
+        :param cars: iterable of Car objects.
+        :param tick: tick of the simulation.
+        :return: list of the new CollisionEvents.
+        """
+        colliding_pairs = set()
+        new_events = []
+        for first_car, second_car in self.candidate_pairs(cars):
+            if boxes_overlap(oriented_box(first_car), oriented_box(second_car)):
+                if first_car.get_name() > second_car.get_name():
+                    first_car, second_car = second_car, first_car
+                pair = (first_car.get_name(), second_car.get_name())
+                colliding_pairs.add(pair)
+                if pair not in self.colliding_pairs:
+                    event = CollisionEvent(tick, first_car, second_car)
+                    new_events.append(event)
+                    self.events.append(event)
+                    if self.on_collision is not None:
+                        self.on_collision(event)
+        self.colliding_pairs = colliding_pairs
+        return new_events
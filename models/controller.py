@@ -10,63 +10,77 @@ def accelerating_controller(car):
 # Returns the collision point that is closest to the car that owns the controller,
 # the data of the car that is closest to that point and the ticks that car takes to pass that point
 def get_closest_car(car):
-    from utils.utils import get_distance, collision_points  # car_intention, car_lane, follow_intention, follow_lane
-    from functions.car_functions import ticks_to_pass_point
+    """
+    Goes once through the followed cars keeping the closest collision point, the followed cars are grouped by the
+    collision points they share with the car. Only the cars of the closest point are simulated.
+    :param car: Car object that owns the controller.
+    :return: data of the closest car, ticks it takes to pass the point, closest point and if it already passed it.
+    """
+    from utils.utils import get_distance, collision_points
+    from functions.car_functions import ticks_to_pass_point, path_distance_to_point
     following_list = car.get_following_cars()
-    # get points that are possible collision points
-    possible_points = []
     intention = car.get_intention()
     lane = car.get_lane()
     pos_x, pos_y = car.get_position()
+    path = car.get_path()
+    closest_point = None
+    closest_point_distance = None
+    # key = point, value = ids of the followed cars that go through it
+    cars_by_point = {}
     for key in following_list:
         following_car = following_list[key]
-        if None in list(following_car.values()):
+        if None in following_car.values():
             continue
-        following_intention = following_car['intention']
-        following_lane = following_car['lane']
-        p_set = set(possible_points)
-        f_set = collision_points(car_intention=intention, car_lane=lane, follow_intention=following_intention,
-                                 follow_lane=following_lane)
-        common_points = set(f_set) - p_set
-        possible_points = possible_points + list(common_points)
-    possible_points = sorted(possible_points, key=lambda p: get_distance(p[0], p[1], pos_x, pos_y))
-    closest_point = None
-    if possible_points:
-        closest_point = possible_points[0]
+        for point in collision_points(car_intention=intention, car_lane=lane,
+                                      follow_intention=following_car['intention'],
+                                      follow_lane=following_car['lane']):
+            point_cars = cars_by_point.get(point)
+            if point_cars is None:
+                point_cars = cars_by_point[point] = []
+                if path is not None:
+                    distance = abs(car.path_distance_to_point(point))
+                else:
+                    distance = get_distance(point[0], point[1], pos_x, pos_y)
+                # On a tie the point found first is kept
+                if closest_point_distance is None or distance < closest_point_distance:
+                    closest_point = point
+                    closest_point_distance = distance
+            point_cars.append(key)
     closest_car = {}
     closest_car_distance = None
     inner_rectangle = car.inner_intersection_rectangle
     passed = False
-    for key in following_list:
+    for key in cars_by_point.get(closest_point, []):
         following_car = following_list[key]
-        if None in list(following_car.values()):
-            continue
-        following_intention = following_car['intention']
+        following_x = following_car['pos_x']
+        following_y = following_car['pos_x']
+        following_origin_x = following_car['origin_x']
+        following_origin_y = following_car['origin_y']
         following_lane = following_car['lane']
-        collisions = collision_points(car_intention=intention, car_lane=lane,
-                                      follow_intention=following_intention, follow_lane=following_lane)
-        if closest_point in collisions:
-            following_x = following_car['pos_x']
-            following_y = following_car['pos_x']
-            following_origin_x = following_car['origin_x']
-            following_origin_y = following_car['origin_y']
-            car_length = following_car['car_length']
-            following_speed = following_car['speed']
-            following_acc_rate = following_car['acceleration']
-            following_actual_direction = following_car['direction']
-            following_origin_direction = following_car['origin_direction']
-            ticks_distance, passed_temp = ticks_to_pass_point(point=closest_point, speed=following_speed,
-                                                              actual_direction=following_actual_direction,
-                                                              origin_direction=following_origin_direction,
-                                                              origin_x=following_origin_x, origin_y=following_origin_y,
-                                                              acc_rate=following_acc_rate, lane=following_lane,
-                                                              intention=following_intention,
-                                                              inner_rectangle=inner_rectangle,
-                                                              pos_x=following_x, pos_y=following_y, extra_distance=car_length)
-            if closest_car_distance is None or closest_car_distance > ticks_distance:
-                closest_car = following_list[key]
-                closest_car_distance = ticks_distance
-                passed = passed_temp
+        following_intention = following_car['intention']
+        following_origin_direction = following_car['origin_direction']
+        # Cars that follow paths measure the distance along the path of the other car
+        path_distance = None
+        if path is not None:
+            path_distance = path_distance_to_point(closest_point, following_car['pos_x'], following_car['pos_y'],
+                                                   following_origin_x, following_origin_y,
+                                                   following_origin_direction, following_lane,
+                                                   following_intention, inner_rectangle,
+                                                   path_position=following_car.get('path_position'))
+        ticks_distance, passed_temp = ticks_to_pass_point(point=closest_point, speed=following_car['speed'],
+                                                          actual_direction=following_car['direction'],
+                                                          origin_direction=following_origin_direction,
+                                                          origin_x=following_origin_x, origin_y=following_origin_y,
+                                                          acc_rate=following_car['acceleration'],
+                                                          lane=following_lane, intention=following_intention,
+                                                          inner_rectangle=inner_rectangle,
+                                                          pos_x=following_x, pos_y=following_y,
+                                                          extra_distance=following_car['car_length'],
+                                                          distance=path_distance)
+        if closest_car_distance is None or closest_car_distance > ticks_distance:
+            closest_car = following_car
+            closest_car_distance = ticks_distance
+            passed = passed_temp
     return closest_car, closest_car_distance, closest_point, passed
 
 
@@ -93,11 +107,15 @@ def algorithm_controller(car):
         ticks_in_three_seconds = 3 * (1 / (car.get_time_step() * car.get_speed_factor()))
         if closest_point is None:
             return
+        path_distance = None
+        if car.get_path() is not None:
+            path_distance = car.path_distance_to_point(closest_point)
         ticks_distance, reached = ticks_to_reach_point(point=closest_point, speed=speed, acc_rate=acc_rate,
                                               actual_direction=actual_direction,
                                               origin_direction=origin_direction, lane=lane, intention=intention,
                                               inner_rectangle=inner_rectangle, pos_x=pos_x, pos_y=pos_y,
-                                              origin_x=origin_x, origin_y=origin_y, extra_distance=car_length)
+                                              origin_x=origin_x, origin_y=origin_y, extra_distance=car_length,
+                                              distance=path_distance)
         if closest_car_ticks_distance == -1:
             if passed:
                 print(car.get_name(), 'passed some shit')
@@ -109,5 +127,5 @@ def algorithm_controller(car):
         elif ticks_distance - ticks_in_three_seconds <= closest_car_ticks_distance:
 
             new_acceleration = collision_free_acceleration(closest_car_ticks_distance, closest_point, speed, pos_x,
-                                                           pos_y)
+                                                           pos_y, distance=path_distance)
             car.set_acceleration(new_acceleration)
@@ -0,0 +1,170 @@
+import os
+import struct
+from functools import lru_cache
+from math import sin, cos, fmod, floor
+
+images_directory = os.path.dirname(os.path.abspath(__file__)) + "/../images/"
+
+
+# Pure python replacement of the parts of pygame.Rect that the simulation uses. It follows the same integer
+# semantics, so a car footprint computed here is identical to the rectangle pygame gives to the rotated image.
+# It is also a sequence of four values, so it can be passed to any pygame function that expects a rect.
+class Rect(object):
+    __slots__ = ('x', 'y', 'w', 'h')
+
+    def __init__(self, x, y, w, h):
+        # Like pygame, the values given to the constructor are truncated
+        self.x = int(x)
+        self.y = int(y)
+        self.w = int(w)
+        self.h = int(h)
+
+    def __repr__(self):
+        return '<Rect(' + ', '.join(str(v) for v in self) + ')>'
+
+    def __eq__(self, other):
+        try:
+            return tuple(self) == tuple(other)
+        except TypeError:
+            return False
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.w, self.h)[index]
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.w, self.h))
+
+    def __getstate__(self):
+        return self.x, self.y, self.w, self.h
+
+    def __setstate__(self, state):
+        self.x, self.y, self.w, self.h = state
+
+    def copy(self):
+        return Rect(self.x, self.y, self.w, self.h)
+
+    @property
+    def left(self):
+        return self.x
+
+    @property
+    def top(self):
+        return self.y
+
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @property
+    def width(self):
+        return self.w
+
+    @property
+    def height(self):
+        return self.h
+
+    @property
+    def size(self):
+        return self.w, self.h
+
+    @property
+    def centerx(self):
+        return self.x + self.w // 2
+
+    @property
+    def centery(self):
+        return self.y + self.h // 2
+
+    @property
+    def center(self):
+        return self.centerx, self.centery
+
+    @center.setter
+    def center(self, position):
+        self.x = round_half_away(position[0]) - self.w // 2
+        self.y = round_half_away(position[1]) - self.h // 2
+
+    def colliderect(self, other):
+        if self.w == 0 or self.h == 0 or other.w == 0 or other.h == 0:
+            return False
+        return self.x < other.x + other.w and self.y < other.y + other.h \
+            and self.x + self.w > other.x and self.y + self.h > other.y
+
+    def contains(self, other):
+        return self.x <= other.x and self.y <= other.y \
+            and self.x + self.w >= other.x + other.w and self.y + self.h >= other.y + other.h \
+            and self.x + self.w > other.x and self.y + self.h > other.y
+
+
+# pygame rounds floats assigned to a rect to the nearest integer, halves away from zero
+def round_half_away(value):
+    if value >= 0:
+        return int(floor(value + 0.5))
+    return -int(floor(-value + 0.5))
+
+
+# pygame parses the rotation angle as a C float, the footprint has to do the same to get the same sizes
+def to_float32(value):
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+# Reads the width and height of a png from its IHDR chunk, so there is no need to decode the image
+@lru_cache(maxsize=None)
+def png_size(path):
+    with open(path, 'rb') as png_file:
+        header = png_file.read(24)
+    return struct.unpack('>II', header[16:24])
+
+
+def car_image_size():
+    return png_size(images_directory + "car.png")
+
+
+# Size of the bounding box of an image of size (width, height) rotated by direction degrees.
+# Same computation that pygame.transform.rotate does to size the new surface.
+def rotated_size(width, height, direction):
+    angle = to_float32(direction)
+    if fmod(angle, 90.0) == 0:
+        if int(angle // 90) % 2 == 0:
+            return width, height
+        return height, width
+    rad = angle * .01745329251994329
+    sin_angle = sin(rad)
+    cos_angle = cos(rad)
+    cx = cos_angle * width
+    cy = cos_angle * height
+    sx = sin_angle * width
+    sy = sin_angle * height
+    new_width = int(max(abs(cx + sy), abs(cx - sy), abs(-cx + sy), abs(-cx - sy)))
+    new_height = int(max(abs(sx + cy), abs(sx - cy), abs(-sx + cy), abs(-sx - cy)))
+    return new_width, new_height
+
+
+# Size of the rectangle of a car looking at that direction, after rotating the car image and scaling it down
+@lru_cache(maxsize=4096)
+def footprint_size(direction, scale_rate):
+    width, height = car_image_size()
+    rotated_width, rotated_height = rotated_size(width, height, direction)
+    return int(rotated_width * scale_rate), int(rotated_height * scale_rate)
+
+
+def car_footprint(pos_x, pos_y, direction, scale_rate):
+    """
+    Creates the rectangle that represents a car in the simulation.
+    :param pos_x: x coordinate of the center of the car.
+    :param pos_y: y coordinate of the center of the car.
+    :param direction: direction of the car in degrees.
+    :param scale_rate: rate at which the car image is scaled down.
+    :return: <Rect> bounding box of the car.
+    """
+    width, height = footprint_size(direction, scale_rate)
+    footprint = Rect(0, 0, width, height)
+    footprint.center = (pos_x, pos_y)
+    return footprint
@@ -0,0 +1,188 @@
+from collections import deque
+from models.node import Node
+
+
+# Graph that represents the caravan. It works like the dictionary of Nodes the cars used to keep (key = id,
+# value = Node), but it also keeps the reverse of the follow lists (the cars that follow each car) and the set of
+# leaf cars, so adding or removing a car only touches its neighbours instead of the whole graph.
+# The follow lists of the nodes are dictionaries used as ordered sets, they keep the order in which the cars
+# were found by the search, that is the order the following cars are checked later.
+# Graphs are copied on write: a snapshot shares the nodes and indexes with the graph it comes from, and the
+# first change made to any of them copies the containers. Nodes are never changed once they are in a graph, a
+# changed node is replaced by a new one, so the Node objects stay shared between every copy.
+class CoordinationGraph(object):
+
+    def __init__(self, nodes=None):
+        """
+        :param nodes: optional dictionary of Nodes (key = id) to build the graph from.
+        """
+        # key = id, value = Node
+        self.nodes = {}
+        # key = id, value = set of ids of the cars that follow that car
+        self.followers = {}
+        # Cars that no one follows, the search of the follow list of a new car starts from them
+        self.leaf_cars = set()
+        # True while the containers are shared with other graphs
+        self.shared = False
+        if nodes is not None:
+            for name in nodes:
+                node = nodes[name]
+                self.nodes[name] = Node(name=name, follow_list=dict.fromkeys(node.get_follow_list()),
+                                        intention=node.get_intention(), lane=node.get_lane())
+                self.followers.setdefault(name, set())
+                for car in node.get_follow_list():
+                    self.followers.setdefault(car, set()).add(name)
+            self.leaf_cars = set(name for name in self.nodes if not self.followers[name])
+
+    # Dictionary like interface, so the graph can be used where the dictionary of Nodes was used
+    def __getitem__(self, name):
+        return self.nodes[name]
+
+    def __contains__(self, name):
+        return name in self.nodes
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __eq__(self, other):
+        if isinstance(other, CoordinationGraph):
+            return self.nodes == other.nodes
+        if isinstance(other, dict):
+            return self.nodes == other
+        return False
+
+    def get(self, name, default=None):
+        return self.nodes.get(name, default)
+
+    def keys(self):
+        return self.nodes.keys()
+
+    def values(self):
+        return self.nodes.values()
+
+    def items(self):
+        return self.nodes.items()
+
+    def get_nodes(self):
+        return self.nodes
+
+    def get_followers(self, name):
+        return self.followers.get(name, set())
+
+    def get_leaf_cars(self):
+        # The set may be shared with other graphs, use add_leaf and remove_leaf to change it
+        return self.leaf_cars
+
+    def set_leaf_cars(self, new_set):
+        # Setting the same leaves is common when a car is welcomed, it doesn't need a private copy
+        if new_set != self.leaf_cars:
+            self.own()
+            self.leaf_cars = set(new_set)
+
+    def add_leaf(self, name):
+        self.own()
+        self.leaf_cars.add(name)
+
+    def remove_leaf(self, name):
+        self.own()
+        self.leaf_cars.remove(name)
+
+    def fingerprint(self):
+        return tuple((name, tuple(node.get_follow_list()), node.get_lane(), node.get_intention())
+                     for name, node in self.nodes.items()), frozenset(self.leaf_cars)
+
+    def snapshot(self):
+        """
+        Creates a copy of the graph in constant time, both graphs share their containers until one of them changes.
+        :return: <CoordinationGraph> the copy.
+        """
+        copy = CoordinationGraph()
+        copy.nodes = self.nodes
+        copy.followers = self.followers
+        copy.leaf_cars = self.leaf_cars
+        copy.shared = True
+        self.shared = True
+        return copy
+
+    def own(self):
+        """
+        Makes private copies of the containers if they are shared. The nodes are not copied, they are replaced
+        when they change.
+        """
+        if self.shared:
+            self.nodes = dict(self.nodes)
+            self.followers = dict((name, set(followers)) for name, followers in self.followers.items())
+            self.leaf_cars = set(self.leaf_cars)
+            self.shared = False
+
+    def find_follow_list(self, lane, intention):
+        """
+        Breadth first search from the leaf cars looking for the cars whose path crosses the path of a new car.
+        When a car crosses the path, the cars it follows are not checked, they are already behind it.
+        :param lane: lane of the new car.
+        :param intention: intention of the new car.
+        :return: list of ids of the cars that the new car has to follow.
+        """
+        from utils.utils import cars_cross_path
+        follow_list = []
+        visited = set()
+        to_visit = deque(self.nodes[car] for car in self.leaf_cars)
+        while to_visit:
+            node = to_visit.popleft()
+            name = node.get_name()
+            if name not in visited:
+                visited.add(name)
+                if cars_cross_path(lane, intention, node.get_lane(), node.get_intention()):
+                    follow_list.append(name)
+                    visited.update(node.get_follow_list())
+                else:
+                    # If it doesn't collide then the cars it follows have to be checked
+                    to_visit.extend(self.nodes[car] for car in node.get_follow_list())
+        return follow_list
+
+    def add_node(self, name, lane, intention, follow_list):
+        """
+        Adds a car to the graph. The cars it follows stop being leaves and the new car becomes one.
+        :param name: id of the car.
+        :param lane: lane of the car.
+        :param intention: intention of the car.
+        :param follow_list: ids of the cars that the new car follows.
+        :return: the new Node.
+        """
+        self.own()
+        if name in self.nodes:
+            self.remove_node(name)
+        node = Node(name=name, follow_list=dict.fromkeys(follow_list), intention=intention, lane=lane)
+        self.nodes[name] = node
+        for car in node.get_follow_list():
+            self.followers.setdefault(car, set()).add(name)
+            self.leaf_cars.discard(car)
+        self.followers.setdefault(name, set())
+        self.leaf_cars.add(name)
+        return node
+
+    def remove_node(self, name):
+        """
+        Removes a car from the graph and from the follow lists of the cars that follow it. The cars that it
+        followed and that have no other follower become leaves.
+        :param name: id of the car, it has to be in the graph.
+        """
+        self.own()
+        node = self.nodes.pop(name)
+        for car in self.followers.pop(name, ()):
+            follower = self.nodes.get(car)
+            if follower is not None:
+                follow_list = dict(follower.get_follow_list())
+                follow_list.pop(name, None)
+                self.nodes[car] = Node(name=car, follow_list=follow_list, intention=follower.get_intention(),
+                                       lane=follower.get_lane())
+        for car in node.get_follow_list():
+            followers = self.followers.get(car)
+            if followers is not None:
+                followers.discard(name)
+                if not followers and car in self.nodes:
+                    self.leaf_cars.add(car)
+        self.leaf_cars.discard(name)
@@ -0,0 +1,138 @@
+# Cars of one lane ordered from the first one to the last one by how far they are along the lane, as a doubly
+# linked list over the names of the cars. The car in front of a car is the one that its sensor has to watch, it can
+# be found and removed in constant time. New cars are almost always the last ones of the lane, and a car that
+# passes the car in front of it is moved ahead by move_forward, so keeping the order is constant time too.
+class LaneQueue(object):
+
+    def __init__(self, lane=0, exiting=False):
+        """
+        :param lane: lane of the queue.
+        :param exiting: True for the cars that leave the intersection through the lane, False for the ones that
+        come through it.
+        """
+        self.lane = lane
+        self.exiting = exiting
+        # key = id, value = Car object
+        self.cars = {}
+        # key = id, value = id of the car in front of it or None
+        self.previous = {}
+        # key = id, value = id of the car behind it or None
+        self.next = {}
+        self.first = None
+        self.last = None
+
+    def __contains__(self, name):
+        return name in self.cars
+
+    def __len__(self):
+        return len(self.cars)
+
+    def __iter__(self):
+        name = self.first
+        while name is not None:
+            yield self.cars[name]
+            name = self.next[name]
+
+    def progress(self, car):
+        """
+        Distance travelled by the car along the lane from a fixed line, it grows as the car advances. The cars come
+        through lane 0 going up, lane 1 going left, lane 2 going down and lane 3 going right, and leave through a
+        lane in the opposite direction.
+        """
+        pos_x, pos_y = car.get_position()
+        progress = [-pos_y, -pos_x, pos_y, pos_x][self.lane]
+        return -progress if self.exiting else progress
+
+    def get_first(self):
+        return None if self.first is None else self.cars[self.first]
+
+    def get_last(self):
+        return None if self.last is None else self.cars[self.last]
+
+    def get_previous(self, name):
+        previous = self.previous.get(name)
+        return None if previous is None else self.cars[previous]
+
+    def get_next(self, name):
+        following = self.next.get(name)
+        return None if following is None else self.cars[following]
+
+    def find_place(self, progress, ahead):
+        """
+        :param progress: progress of a car.
+        :param ahead: id of a car from where the search goes to the front of the lane, None for the last car.
+        :return: id of the last car that is not behind that progress or None if every car is behind it.
+        """
+        while ahead is not None and progress > self.progress(self.cars[ahead]):
+            ahead = self.previous[ahead]
+        return ahead
+
+    def insert_after(self, car, ahead):
+        """
+        Links the car behind the car ahead, or as the first car if ahead is None.
+        :param car: Car object that is not in the lane.
+        :param ahead: id of the car in front of it or None.
+        """
+        name = car.get_name()
+        following = self.first if ahead is None else self.next[ahead]
+        self.cars[name] = car
+        self.previous[name] = ahead
+        self.next[name] = following
+        if ahead is None:
+            self.first = name
+        else:
+            self.next[ahead] = name
+        if following is None:
+            self.last = name
+        else:
+            self.previous[following] = name
+
+    def append(self, car):
+        """
+        Adds the car to the lane behind the cars that are ahead of it, usually at the end.
+        :param car: Car object.
+        :return: the car in front of it or None.
+        """
+        name = car.get_name()
+        if name in self.cars:
+            self.remove(name)
+        self.insert_after(car, self.find_place(self.progress(car), self.last))
+        return self.get_previous(name)
+
+    def move_forward(self, name):
+        """
+        Moves a car ahead of the cars of the lane that it passed.
+        :param name: id of a car of the lane.
+        :return: list of the cars whose car in front changed, empty if the car didn't pass the car in front of it.
+        """
+        car = self.cars[name]
+        previous = self.previous[name]
+        progress = self.progress(car)
+        if previous is None or progress <= self.progress(self.cars[previous]):
+            return []
+        following = self.get_next(name)
+        self.remove(name)
+        self.insert_after(car, self.find_place(progress, self.previous[previous]))
+        changed = [car, self.get_next(name)]
+        if following is not None:
+            changed.append(following)
+        return changed
+
+    def remove(self, name):
+        """
+        Removes a car from the lane and links the cars that were in front and behind it.
+        :param name: id of the car.
+        :return: the cars that were in front and behind it, both can be None.
+        """
+        previous = self.previous.pop(name)
+        following = self.next.pop(name)
+        del self.cars[name]
+        if previous is not None:
+            self.next[previous] = following
+        else:
+            self.first = following
+        if following is not None:
+            self.previous[following] = previous
+        else:
+            self.last = previous
+        return None if previous is None else self.cars[previous], None if following is None else self.cars[following]
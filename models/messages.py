@@ -1,6 +1,10 @@
 
 
+# Messages are created every tick by every car, so they use slots instead of a __dict__
 class Message(object):
+    __slots__ = ('sender_name',)
+    # Fields that keep seeing the state of the sender until the message is sealed
+    live_fields = ()
 
     def __init__(self, sender_car):
         self.sender_name = sender_car.get_name()
@@ -33,8 +37,21 @@ class Message(object):
     def is_second_at_charge_message(self):
         return False
 
+    # The channel calls it when the round swaps, from then on the message must not change
+    def seal(self):
+        pass
+
+    # Values of every field of the message, used by the debug mode of the channel to find changed messages.
+    # Before the message is sealed the live fields can still change, so they are left out.
+    def fingerprint(self, sealed=True):
+        return tuple(freeze_value(getattr(self, name, None))
+                     for cls in type(self).__mro__ for name in getattr(cls, '__slots__', ())
+                     if sealed or name not in self.live_fields)
+
 
 class InfoMessage(Message):
+    __slots__ = ('sender_position', 'sender_lane', 'sender_direction', 'sender_speed', 'sender_acceleration',
+                 'sender_intention', 'car_length', 'origin_direction', 'origin_x', 'origin_y', 'path_position')
 
     def __init__(self, sender_car):
         super(InfoMessage, self).__init__(sender_car)
@@ -48,6 +65,8 @@ class InfoMessage(Message):
         self.origin_direction = sender_car.get_origin_direction()
         self.origin_x = sender_car.get_origin_x_coordinate()
         self.origin_y = sender_car.get_origin_y_coordinate()
+        # Distance travelled along its path, None if the sender doesn't follow a path
+        self.path_position = sender_car.get_path_position() if sender_car.get_path() is not None else None
 
     def is_info_message(self):
         return True
@@ -109,11 +128,15 @@ class InfoMessage(Message):
     def get_sender_origin_y(self):
         return self.origin_y
 
+    def get_sender_path_position(self):
+        return self.path_position
+
     def set_sender_origin_y(self, y):
         self.origin_y = y
 
 
 class NewCarMessage(Message):
+    __slots__ = ('sender_position', 'sender_lane', 'sender_intention', 'sender_speed', 'sender_acceleration')
     
     def __init__(self, sender_car):
         super(NewCarMessage, self).__init__(sender_car)
@@ -160,14 +183,30 @@ class NewCarMessage(Message):
 # Going to leave the checking of special cases to the car. Special cases like
 # when the supervisor leaves the intersection or the second at charge.
 class LeftIntersectionMessage(Message):
+    __slots__ = ()
 
     def is_left_intersection_message(self):
         return True
 
 
+# Hashable copy of a value that can be compared later to know if the value changed
+def freeze_value(value):
+    if hasattr(value, 'fingerprint'):
+        return value.fingerprint()
+    if isinstance(value, dict):
+        return tuple((key, freeze_value(value[key])) for key in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze_value(item) for item in value)
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_value(item) for item in value)
+    return value
+
+
 # The supervisor sends this message to new cars. It is assumed that the supervisor
 # modifies the graph before it sends this message
 class WelcomeMessage(Message):
+    __slots__ = ('receiver_name', 'graph', 'leaf_cars', 'supervisor_name', 'second_at_charge_name', 'follow_list')
+    live_fields = ('graph', 'leaf_cars')
 
     def __init__(self, sender_car, receiver_name=None):
         super(WelcomeMessage, self).__init__(sender_car)
@@ -181,6 +220,13 @@ class WelcomeMessage(Message):
     def is_welcome_message(self):
         return True
 
+    # Until the round swaps the message sees the live graph of the supervisor, then it keeps a snapshot of it.
+    # Taking the snapshot doesn't copy anything, the graph is copied on write.
+    def seal(self):
+        if hasattr(self.graph, 'snapshot'):
+            self.graph = self.graph.snapshot()
+            self.leaf_cars = self.graph.get_leaf_cars()
+
     def get_receiver_name(self):
         return self.receiver_name
 
@@ -209,6 +255,7 @@ class WelcomeMessage(Message):
 
 # It is used to tell a car that it is the second at charge
 class SecondAtChargeMessage(Message):
+    __slots__ = ('receiver_name',)
 
     def __init__(self, sender_car, receiver_name=None):
         super(SecondAtChargeMessage, self).__init__(sender_car)
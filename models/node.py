@@ -1,5 +1,6 @@
 
 class Node(object):
+    __slots__ = ('name', 'follow_list', 'intention', 'lane')
 
     def __init__(self, name, follow_list, intention, lane):
         self.name = name
@@ -9,7 +10,7 @@ class Node(object):
 
     def __eq__(self, other):
         if isinstance(other, Node):
-            if self.name == other.get_name() and self.follow_list == other.get_follow_list() \
+            if self.name == other.get_name() and list(self.follow_list) == list(other.get_follow_list()) \
                     and self.intention == other.get_intention() and self.lane == other.get_lane():
                 return True
         return False
@@ -0,0 +1,116 @@
+from bisect import bisect_left
+import numpy as np
+
+
+# Path of a car through the intersection as a polyline parameterised by arc length. There is one path for each
+# lane and intention, they are computed once by driving a car with very small steps through the same turning
+# rules that cars use, so the path has the same shape as the one the cars follow, and then every point keeps its
+# position, its direction and the distance travelled from the origin.
+class PathTable(object):
+
+    def __init__(self, lane, intention, inner_rectangle, origin_x, origin_y, origin_direction, step=0.5,
+                 length=2000.0, time_step=None, speed_factor=None):
+        """
+        :param lane: lane where the path starts.
+        :param intention: intention of the cars that follow the path.
+        :param inner_rectangle: rectangle where the cars turn.
+        :param origin_x: x coordinate where the path starts.
+        :param origin_y: y coordinate where the path starts.
+        :param origin_direction: direction at the start of the path.
+        :param step: distance between two points of the path.
+        :param length: length of the path, after it the path continues straight.
+        :param time_step: time step of the cars, by default the one of Car.
+        :param speed_factor: speed factor of the cars, by default the one of Car.
+        """
+        from functions.car_functions import next_direction, next_position
+        from models.car import Car
+        self.lane = lane
+        self.intention = intention
+        self.step = step
+        self.time_step = Car.TIME_STEP if time_step is None else time_step
+        self.speed_factor = Car.SPEED_FACTOR if speed_factor is None else speed_factor
+        # The turning rules depend on the distance moved in a tick, speed * time_step * speed_factor
+        speed = step / (self.time_step * self.speed_factor)
+        pos_x, pos_y, direction = origin_x, origin_y, origin_direction
+        xs, ys, directions, distances = [pos_x], [pos_y], [direction], [0.0]
+        travelled = 0.0
+        while travelled < length:
+            direction = next_direction(speed, direction, origin_direction, lane, intention, inner_rectangle, pos_x,
+                                       pos_y, origin_x, origin_y, self.time_step, self.speed_factor)
+            pos_x, pos_y = next_position(speed, direction, pos_x, pos_y, self.time_step, self.speed_factor)
+            travelled += step
+            xs.append(pos_x)
+            ys.append(pos_y)
+            directions.append(direction)
+            distances.append(travelled)
+        self.xs = xs
+        self.ys = ys
+        self.directions = directions
+        self.distances = distances
+        self.points = np.array([xs, ys]).T
+        # key = point, value = distance of the point of the path closest to it
+        self.point_distances = {}
+
+    def get_length(self):
+        return self.distances[-1]
+
+    def position_at(self, distance):
+        """
+        Position and direction after travelling that distance along the path.
+        :param distance: distance from the start of the path.
+        :return: x coordinate, y coordinate and direction.
+        """
+        if distance <= 0:
+            return self.xs[0], self.ys[0], self.directions[0]
+        if distance >= self.distances[-1]:
+            # After the end the path is a straight line
+            from functions.car_functions import next_position
+            direction = self.directions[-1]
+            extra = distance - self.distances[-1]
+            pos_x, pos_y = next_position(extra / (self.time_step * self.speed_factor), direction, self.xs[-1],
+                                         self.ys[-1], self.time_step, self.speed_factor)
+            return pos_x, pos_y, direction
+        index = bisect_left(self.distances, distance) - 1
+        rate = (distance - self.distances[index]) / (self.distances[index + 1] - self.distances[index])
+        pos_x = self.xs[index] + (self.xs[index + 1] - self.xs[index]) * rate
+        pos_y = self.ys[index] + (self.ys[index + 1] - self.ys[index]) * rate
+        # Directions change at the end of every step, the direction of a segment is the one of its end
+        return pos_x, pos_y, self.directions[index + 1]
+
+    def project(self, pos_x, pos_y):
+        """
+        Distance along the path of the point of the path closest to the position. It searches every point of the
+        path, the cars that follow a path send their position along it instead.
+        """
+        index = int(np.argmin(np.sum((self.points - (pos_x, pos_y)) ** 2, axis=1)))
+        return self.distances[index]
+
+    def distance_to_point(self, distance, point):
+        """
+        Distance along the path from a position of the path to a point, negative if the point was already passed.
+        :param distance: distance from the start of the path.
+        :param point: (x, y) point close to the path, like a collision point.
+        """
+        point_distance = self.point_distances.get(point)
+        if point_distance is None:
+            point_distance = self.project(point[0], point[1])
+            self.point_distances[point] = point_distance
+        return point_distance - distance
+
+
+# Paths shared by every car, key = (lane, intention, inner rectangle, origin, time step, speed factor)
+path_tables = {}
+
+
+def get_path_table(lane, intention, inner_rectangle, origin_x, origin_y, origin_direction, time_step=None,
+                   speed_factor=None):
+    from models.car import Car
+    time_step = Car.TIME_STEP if time_step is None else time_step
+    speed_factor = Car.SPEED_FACTOR if speed_factor is None else speed_factor
+    key = (lane, intention, tuple(inner_rectangle), origin_x, origin_y, origin_direction, time_step, speed_factor)
+    table = path_tables.get(key)
+    if table is None:
+        table = PathTable(lane, intention, inner_rectangle, origin_x, origin_y, origin_direction,
+                          time_step=time_step, speed_factor=speed_factor)
+        path_tables[key] = table
+    return table
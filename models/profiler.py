@@ -0,0 +1,132 @@
+import json
+from time import perf_counter
+
+# Phases of a tick in the order they run. The channel phase is the round of the channel, the messages queued in the
+# last tick are delivered in it, and the messages phase is the info the cars send, the coordination checks and the
+# messages delivered as soon as they are sent.
+round_phases = ['channel', 'controller', 'sensor', 'accelerate', 'turn', 'move', 'draw', 'check_position',
+                'messages']
+
+
+# Wall time of each phase of the ticks, added up over every car of the tick. do_round and do_world_round only
+# check once per tick if the profiler is enabled, then they pass mark as the timer of the cars, which calls it at
+# the end of each phase of the tick. While it is disabled they run without timer, so it can stay in a run and be
+# switched on for the ticks that have to be measured. Each profiled tick adds one value per phase to the time
+# series, with the tick it belongs to and the amount of cars.
+class PhaseProfiler(object):
+
+    def __init__(self, enabled=True, timer=perf_counter):
+        """
+        :param enabled: if the ticks are profiled from the start.
+        :param timer: function that returns the time in seconds.
+        """
+        self.enabled = enabled
+        self.timer = timer
+        # Tick of the run that is being simulated, if it isn't set the ticks are numbered in order
+        self.tick = None
+        # Seconds of each phase in the tick that is being profiled and the time of the last mark
+        self.tick_times = None
+        self.last_mark = None
+        self.reset()
+
+    def reset(self):
+        self.totals = dict.fromkeys(round_phases, 0.0)
+        # key = phase, value = list of the seconds of each profiled tick
+        self.series = dict((phase, []) for phase in round_phases)
+        self.ticks = []
+        self.cars = []
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def is_enabled(self):
+        return self.enabled
+
+    def set_tick(self, tick):
+        self.tick = tick
+
+    def get_totals(self):
+        return self.totals
+
+    def get_series(self):
+        return self.series
+
+    def get_ticks(self):
+        return self.ticks
+
+    def get_cars(self):
+        return self.cars
+
+    def add_tick(self, cars_amount, times):
+        """
+        :param cars_amount: cars updated in the tick.
+        :param times: seconds of each phase, in the order of round_phases.
+        """
+        self.ticks.append(len(self.ticks) if self.tick is None else self.tick)
+        self.cars.append(cars_amount)
+        for phase, seconds in zip(round_phases, times):
+            self.totals[phase] += seconds
+            self.series[phase].append(seconds)
+
+    def start_tick(self):
+        """
+        Starts timing a tick.
+        :return: the function that the round calls at the end of each phase.
+        """
+        self.tick_times = dict.fromkeys(round_phases, 0.0)
+        self.last_mark = self.timer()
+        return self.mark
+
+    def mark(self, phase):
+        """
+        Adds the time since the last mark to a phase of the tick.
+        :param phase: name of the phase that ended, one of round_phases.
+        """
+        now = self.timer()
+        self.tick_times[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def end_tick(self, cars_amount):
+        """
+        :param cars_amount: cars updated in the tick.
+        """
+        self.add_tick(cars_amount, [self.tick_times[phase] for phase in round_phases])
+        self.tick_times = None
+
+    def summary(self):
+        """
+        :return: list with a dictionary for each phase with the total seconds, the share of the time of the
+        profiled ticks, the mean and maximum seconds per tick and the mean seconds per car.
+        """
+        total = sum(self.totals.values())
+        updates = sum(self.cars)
+        rows = []
+        for phase in round_phases:
+            series = self.series[phase]
+            rows.append({'phase': phase, 'total': self.totals[phase],
+                         'share': self.totals[phase] / total if total > 0 else 0.0,
+                         'mean_per_tick': self.totals[phase] / len(series) if series else 0.0,
+                         'max_per_tick': max(series) if series else 0.0,
+                         'mean_per_car': self.totals[phase] / updates if updates else 0.0})
+        return rows
+
+    def format_summary(self):
+        lines = ['%-16s %10s %8s %12s %12s %12s' % ('phase', 'total s', 'share', 'ms/tick', 'max ms/tick',
+                                                    'us/car')]
+        for row in self.summary():
+            lines.append('%-16s %10.4f %7.1f%% %12.4f %12.4f %12.2f' % (
+                row['phase'], row['total'], row['share'] * 100, row['mean_per_tick'] * 1e3,
+                row['max_per_tick'] * 1e3, row['mean_per_car'] * 1e6))
+        lines.append('%d ticks profiled, %d car updates' % (len(self.ticks), sum(self.cars)))
+        return '\n'.join(lines)
+
+    def to_json(self):
+        return {'phases': list(round_phases), 'ticks': self.ticks, 'cars': self.cars, 'series': self.series,
+                'summary': self.summary()}
+
+    def save(self, file_name):
+        with open(file_name, 'w') as profile_file:
+            json.dump(self.to_json(), profile_file)
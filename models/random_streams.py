@@ -0,0 +1,60 @@
+import hashlib
+import random
+
+
+# Random generators of a run, one for each stream of random values (arrivals, lanes, intentions, speeds...). The
+# seed of each stream is derived from the seed of the run and the name of the stream, so a stream gives the same
+# values whatever the other streams draw and whatever else runs in the process.
+class RandomStreams(object):
+
+    def __init__(self, seed):
+        """
+        :param seed: seed of the run, an int or a string.
+        """
+        self.seed = seed
+        # key = name, value = random.Random of the stream
+        self.streams = {}
+
+    def get_seed(self):
+        return self.seed
+
+    def stream_seed(self, name):
+        digest = hashlib.sha256((repr(self.seed) + '/' + name).encode()).digest()
+        return int.from_bytes(digest[:8], 'little')
+
+    def get(self, name):
+        """
+        :param name: name of the stream.
+        :return: random.Random of the stream, it has the same methods as the random module.
+        """
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = random.Random(self.stream_seed(name))
+            self.streams[name] = stream
+        return stream
+
+    def numpy(self, name):
+        """
+        :param name: name of the stream.
+        :return: new numpy Generator seeded for the stream, for the draws done in bulk.
+        """
+        import numpy as np
+        return np.random.default_rng(self.stream_seed(name))
+
+    def spawn(self, name):
+        """
+        :param name: name of the run.
+        :return: RandomStreams of a run derived from this one, for example one of a pool of runs.
+        """
+        return RandomStreams(self.stream_seed(name))
+
+
+def get_stream(streams, name):
+    """
+    :param streams: RandomStreams or None.
+    :param name: name of the stream.
+    :return: the stream or, without streams, the random module.
+    """
+    if streams is None:
+        return random
+    return streams.get(name)
@@ -0,0 +1,201 @@
+import os
+import json
+import threading
+from queue import Queue
+import numpy as np
+
+# Roles of the cars in the traces
+role_codes = {'none': 0, 'supervisor': 1, 'second_at_charge': 2}
+message_types = ['InfoMessage', 'NewCarMessage', 'LeftIntersectionMessage', 'WelcomeMessage',
+                 'SecondAtChargeMessage']
+car_columns = [('tick', np.int32), ('name', np.int64), ('pos_x', np.float32), ('pos_y', np.float32),
+               ('speed', np.float32), ('acceleration', np.float32), ('direction', np.float32), ('role', np.int8),
+               ('controller', np.int16)]
+message_columns = [('tick', np.int32), ('type', np.int8), ('sender', np.int64), ('receiver', np.int64)]
+
+
+# Records the state of the cars after every tick and the messages delivered by the channel. The values are kept in columns and every
+# chunk of ticks is given to a background thread that compresses it to a .npz file, so the simulation never waits
+# for the disk. The names of the cars have to be integers, receivers of None are written as -1.
+class TraceRecorder(object):
+
+    def __init__(self, directory, chunk_ticks=1000, max_pending_chunks=8):
+        """
+        :param directory: directory of the trace, it is created if it doesn't exist.
+        :param chunk_ticks: amount of ticks of each chunk.
+        :param max_pending_chunks: chunks that can wait to be written before the simulation waits for the writer.
+        """
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.chunk_ticks = chunk_ticks
+        self.car_buffers = dict((column, []) for column, _ in car_columns)
+        self.message_buffers = dict((column, []) for column, _ in message_columns)
+        self.first_tick = None
+        self.last_tick = None
+        # Tick of the messages that are delivered
+        self.tick = 0
+        # Names of the controllers, the index is the code written in the trace
+        self.controllers = []
+        self.controller_codes = {}
+        # (first tick, last tick, file name) of every chunk
+        self.chunks = []
+        self.closed = False
+        self.error = None
+        self.pending = Queue(maxsize=max_pending_chunks)
+        self.writer = threading.Thread(target=self.write_chunks, name='trace-writer')
+        self.writer.daemon = True
+        self.writer.start()
+
+    def get_directory(self):
+        return self.directory
+
+    def get_chunks(self):
+        return self.chunks
+
+    def controller_code(self, controller):
+        name = None if controller is None else controller.__name__
+        code = self.controller_codes.get(name)
+        if code is None:
+            code = len(self.controllers)
+            self.controllers.append(name)
+            self.controller_codes[name] = code
+        return code
+
+    def record_tick(self, tick, cars):
+        """
+        :param tick: tick of the simulation.
+        :param cars: iterable of the Car objects after the tick.
+        """
+        self.set_tick(tick)
+        buffers = self.car_buffers
+        for car in cars:
+            buffers['tick'].append(tick)
+            buffers['name'].append(car.get_name())
+            buffers['pos_x'].append(car.get_x_coordinate())
+            buffers['pos_y'].append(car.get_y_coordinate())
+            buffers['speed'].append(car.get_speed())
+            buffers['acceleration'].append(car.get_acceleration())
+            buffers['direction'].append(car.get_direction())
+            if car.is_supervisor():
+                buffers['role'].append(role_codes['supervisor'])
+            elif car.is_second_at_charge():
+                buffers['role'].append(role_codes['second_at_charge'])
+            else:
+                buffers['role'].append(role_codes['none'])
+            buffers['controller'].append(self.controller_code(car.get_controller()))
+
+    def set_tick(self, tick):
+        """
+        :param tick: tick of the messages recorded from now on, the chunk is written when the tick is out of it.
+        """
+        if self.first_tick is not None and tick - self.first_tick >= self.chunk_ticks:
+            self.flush()
+        if self.first_tick is None:
+            self.first_tick = tick
+        self.last_tick = tick
+        self.tick = tick
+
+    def record_message(self, message):
+        """
+        :param message: message delivered by the channel in the current tick.
+        """
+        buffers = self.message_buffers
+        receiver = None
+        if hasattr(message, 'get_receiver_name'):
+            receiver = message.get_receiver_name()
+        buffers['tick'].append(self.tick)
+        buffers['type'].append(message_types.index(type(message).__name__))
+        buffers['sender'].append(message.get_sender_name())
+        buffers['receiver'].append(-1 if receiver is None else receiver)
+
+    def flush(self):
+        """
+        Gives the ticks recorded since the last chunk to the writer.
+        """
+        if self.first_tick is None:
+            return
+        arrays = {}
+        for column, dtype in car_columns:
+            arrays['cars_' + column] = np.array(self.car_buffers[column], dtype=dtype)
+            self.car_buffers[column] = []
+        for column, dtype in message_columns:
+            arrays['messages_' + column] = np.array(self.message_buffers[column], dtype=dtype)
+            self.message_buffers[column] = []
+        file_name = 'chunk_' + str(len(self.chunks)).zfill(6) + '.npz'
+        self.chunks.append((self.first_tick, self.last_tick, file_name))
+        self.first_tick = None
+        self.pending.put((file_name, arrays))
+
+    def write_chunks(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            file_name, arrays = item
+            try:
+                np.savez_compressed(os.path.join(self.directory, file_name), **arrays)
+            except Exception as error:
+                self.error = error
+
+    def close(self):
+        """
+        Writes the last chunk and the index of the trace and waits for the writer.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self.pending.put(None)
+        self.writer.join()
+        if self.error is not None:
+            raise self.error
+        index = {'chunk_ticks': self.chunk_ticks, 'controllers': self.controllers, 'roles': role_codes,
+                 'message_types': message_types, 'chunks': self.chunks}
+        with open(os.path.join(self.directory, 'index.json'), 'w') as index_file:
+            json.dump(index, index_file)
+
+
+def load_chunk(directory, file_name):
+    """
+    :return: dictionary with the 'cars' and 'messages' columns of a chunk of a trace.
+    """
+    with np.load(os.path.join(directory, file_name)) as chunk:
+        return {'cars': dict((column, chunk['cars_' + column]) for column, _ in car_columns),
+                'messages': dict((column, chunk['messages_' + column]) for column, _ in message_columns)}
+
+
+def load_trace_index(directory):
+    with open(os.path.join(directory, 'index.json'), 'r') as index_file:
+        return json.load(index_file)
+
+
+def load_trace(directory, first_tick=None, last_tick=None):
+    """
+    Loads the columns of a trace, only the chunks that have ticks in the range are read.
+    :param directory: directory of the trace.
+    :param first_tick: first tick loaded, by default the first one of the trace.
+    :param last_tick: last tick loaded, by default the last one of the trace.
+    :return: dictionary with the index of the trace and the 'cars' and 'messages' columns as arrays.
+    """
+    index = load_trace_index(directory)
+    cars = dict((column, [np.zeros(0, dtype=dtype)]) for column, dtype in car_columns)
+    messages = dict((column, [np.zeros(0, dtype=dtype)]) for column, dtype in message_columns)
+    for chunk_first_tick, chunk_last_tick, file_name in index['chunks']:
+        if first_tick is not None and chunk_last_tick < first_tick or \
+                last_tick is not None and chunk_first_tick > last_tick:
+            continue
+        chunk = load_chunk(directory, file_name)
+        for key, columns in [('cars', cars), ('messages', messages)]:
+            ticks = chunk[key]['tick']
+            selected = np.ones(len(ticks), dtype=bool)
+            if first_tick is not None:
+                selected &= ticks >= first_tick
+            if last_tick is not None:
+                selected &= ticks <= last_tick
+            for column in columns:
+                columns[column].append(chunk[key][column][selected])
+    trace = dict(index)
+    trace['cars'] = dict((column, np.concatenate(values)) for column, values in cars.items())
+    trace['messages'] = dict((column, np.concatenate(values)) for column, values in messages.items())
+    return trace
@@ -0,0 +1,85 @@
+from bisect import bisect_right
+from collections import OrderedDict
+import numpy as np
+from models.recorder import load_chunk, load_trace_index, car_columns, message_columns
+
+
+# Gives the frames of a recorded trace by tick. Only the chunks around the ticks that are asked for are loaded, so a
+# long trace can be opened and moved through at once. The rows of a tick are contiguous in their chunk and they are
+# found with a binary search.
+class TraceReplay(object):
+
+    def __init__(self, directory, cached_chunks=3):
+        """
+        :param directory: directory of a trace written by a TraceRecorder.
+        :param cached_chunks: amount of chunks kept loaded.
+        """
+        self.directory = directory
+        self.index = load_trace_index(directory)
+        self.chunks = self.index['chunks']
+        self.chunk_first_ticks = [chunk[0] for chunk in self.chunks]
+        self.cached_chunks = cached_chunks
+        # key = file name, value = columns of the chunk, in least recently used order
+        self.loaded = OrderedDict()
+
+    def get_first_tick(self):
+        return self.chunks[0][0] if self.chunks else 0
+
+    def get_last_tick(self):
+        return self.chunks[-1][1] if self.chunks else 0
+
+    def get_controllers(self):
+        return self.index['controllers']
+
+    def get_chunk(self, tick):
+        """
+        :return: columns of the chunk that has the tick or None if it is out of the trace.
+        """
+        position = bisect_right(self.chunk_first_ticks, tick) - 1
+        if position < 0 or tick > self.chunks[position][1]:
+            return None
+        file_name = self.chunks[position][2]
+        chunk = self.loaded.get(file_name)
+        if chunk is None:
+            chunk = load_chunk(self.directory, file_name)
+            self.loaded[file_name] = chunk
+            if len(self.loaded) > self.cached_chunks:
+                self.loaded.popitem(last=False)
+        else:
+            self.loaded.move_to_end(file_name)
+        return chunk
+
+    def rows(self, tick, key):
+        """
+        :param tick: tick of the trace.
+        :param key: 'cars' or 'messages'.
+        :return: dictionary with the columns of the rows of the tick, they are empty out of the trace.
+        """
+        chunk = self.get_chunk(tick)
+        if chunk is None:
+            columns = car_columns if key == 'cars' else message_columns
+            return dict((column, np.zeros(0, dtype=dtype)) for column, dtype in columns)
+        columns = chunk[key]
+        start = np.searchsorted(columns['tick'], tick, side='left')
+        end = np.searchsorted(columns['tick'], tick, side='right')
+        return dict((column, values[start:end]) for column, values in columns.items())
+
+    def frame(self, tick):
+        return self.rows(tick, 'cars')
+
+    def messages(self, tick):
+        return self.rows(tick, 'messages')
+
+
+def playback_tick(tick, elapsed, ticks_per_second, first_tick, last_tick):
+    """
+    Position of the replay after some time. Ticks that don't get a frame in that time are skipped, so fast-forwarding
+    or slow drawing don't slow down the replay.
+    :param tick: tick of the replay, it can be fractional.
+    :param elapsed: seconds since the last frame.
+    :param ticks_per_second: speed of the replay, negative to go backwards.
+    :param first_tick: first tick of the trace.
+    :param last_tick: last tick of the trace.
+    :return: the new tick, inside the trace.
+    """
+    return min(max(tick + elapsed * ticks_per_second, first_tick), last_tick)
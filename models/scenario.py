@@ -0,0 +1,347 @@
+import json
+import os
+from collections import deque
+import numpy as np
+
+# Binary scenarios start with this header, followed by the records of the cars ordered by creation time
+scenario_magic = b'SCNB'
+scenario_version = 1
+scenario_header_dtype = np.dtype([('magic', 'S4'), ('version', '<u4'), ('count', '<u8')])
+scenario_dtype = np.dtype([('name', '<i8'), ('lane', 'u1'), ('intention', 'u1'), ('creation_time', '<i8'),
+                           ('x_coordinate', '<f8'), ('y_coordinate', '<f8'), ('direction', '<f8')])
+intention_codes = {'l': 0, 's': 1, 'r': 2}
+code_intentions = ['l', 's', 'r']
+
+
+# Reads a scenario from a line-delimited file, one car in json per line in order of creation time. Only the line
+# of the car that is read is kept in memory, so scenarios with millions of cars can be replayed. The position in
+# the file can be saved with tell and restored with seek.
+class ScenarioReader(object):
+
+    def __init__(self, file_name):
+        """
+        :param file_name: path of the line-delimited scenario.
+        """
+        self.file_name = file_name
+        # Binary mode so the positions given by tell can be used by seek
+        self.file = open(file_name, 'rb')
+        self.last_creation_time = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        while line and not line.strip():
+            line = self.file.readline()
+        if not line:
+            raise StopIteration
+        car = json.loads(line)
+        creation_time = int(car['creation_time'])
+        if self.last_creation_time is not None and creation_time < self.last_creation_time:
+            raise ValueError('Car ' + str(car['name']) + ' of ' + self.file_name + ' is created at ' +
+                             str(creation_time) + ' after a car created at ' + str(self.last_creation_time))
+        self.last_creation_time = creation_time
+        return car
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Checkpoints keep the position in the file, the file is opened again when the reader is restored
+    def __getstate__(self):
+        return {'file_name': self.file_name, 'position': self.tell(), 'last_creation_time': self.last_creation_time}
+
+    def __setstate__(self, state):
+        self.file_name = state['file_name']
+        self.file = open(self.file_name, 'rb')
+        self.file.seek(state['position'])
+        self.last_creation_time = state['last_creation_time']
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, position):
+        """
+        :param position: position returned by tell, the next car read is the one that was next at that point.
+        """
+        self.file.seek(position)
+        self.last_creation_time = None
+
+    def close(self):
+        self.file.close()
+
+
+# Cars of a scenario waiting to be created, one queue by lane. The cars arrive from the source when their creation
+# time is reached and they wait in the queue of their lane until the last car that entered that lane leaves room
+# for them, so each tick only looks at the first car of every lane.
+class SpawnQueues(object):
+
+    def __init__(self, source, number_of_lanes=4):
+        """
+        :param source: iterable of cars in json ordered by creation time, like a ScenarioReader.
+        :param number_of_lanes: number of lanes of the intersection.
+        """
+        self.source = iter(source)
+        self.next_car = next(self.source, None)
+        # key = lane, value = deque of (order of arrival, car in json)
+        self.lanes = dict((lane, deque()) for lane in range(number_of_lanes))
+        self.arrivals = 0
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.lanes.values())
+
+    def get_lanes(self):
+        return self.lanes
+
+    def get_source(self):
+        return self.source
+
+    def is_exhausted(self):
+        return self.next_car is None and len(self) == 0
+
+    def arrive(self, tick):
+        """
+        Moves the cars created until that tick from the source to the queues of their lanes.
+        """
+        while self.next_car is not None and int(self.next_car['creation_time']) <= tick:
+            self.lanes[int(self.next_car['lane'])].append((self.arrivals, self.next_car))
+            self.arrivals += 1
+            self.next_car = next(self.source, None)
+
+    def pop_ready(self, recent_entering):
+        """
+        Takes the car that arrived first among the first cars of the lanes that don't collide at spawn.
+        :param recent_entering: dictionary with the last car that entered each lane, as the channel keeps it.
+        :return: the car in json or None if every lane is empty or blocked.
+        """
+        ready_queue = None
+        for lane, queue in self.lanes.items():
+            if queue and not self.blocked(queue[0][1], recent_entering[lane]):
+                if ready_queue is None or queue[0][0] < ready_queue[0][0]:
+                    ready_queue = queue
+        if ready_queue is None:
+            return None
+        return ready_queue.popleft()[1]
+
+    @staticmethod
+    def blocked(car, recent_car):
+        """
+        :param car: car in json waiting to be created.
+        :param recent_car: last Car object that entered the lane of the car or None.
+        :return: True if the car would collide with the other one where it spawns.
+        """
+        from models.geometry import Rect
+        from functions.simulation_functions import collides_at_spawn
+        if recent_car is None:
+            return False
+        length = recent_car.get_car_length()
+        coordinates = car['initial_coordinates']
+        rect = Rect(float(coordinates['x_coordinate']), float(coordinates['y_coordinate']), length, length)
+        rect.center = (float(coordinates['x_coordinate']), float(coordinates['y_coordinate']))
+        return collides_at_spawn(rect, recent_car)
+
+
+# Scenario in the fixed-width binary format, the records are memory mapped and never parsed or copied, so many
+# processes can share the pages of the same file. The cars are given in json like the other scenario sources.
+# The size of the file has to match the amount of cars of the header, so a truncated file is found when it is
+# opened instead of when its last cars are read.
+class BinaryScenario(object):
+
+    def __init__(self, file_name):
+        """
+        :param file_name: path of the binary scenario.
+        """
+        self.file_name = file_name
+        with open(file_name, 'rb') as scenario_file:
+            header_bytes = scenario_file.read(scenario_header_dtype.itemsize)
+        if header_bytes[:len(scenario_magic)] != scenario_magic:
+            raise ValueError(file_name + ' is not a binary scenario')
+        if len(header_bytes) < scenario_header_dtype.itemsize:
+            raise ValueError(file_name + ' is truncated, its header is incomplete')
+        header = np.frombuffer(header_bytes, dtype=scenario_header_dtype)
+        if header['version'][0] != scenario_version:
+            raise ValueError(file_name + ' has version ' + str(header['version'][0]) + ' of the binary scenarios')
+        count = int(header['count'][0])
+        size = os.path.getsize(file_name)
+        expected_size = scenario_header_dtype.itemsize + count * scenario_dtype.itemsize
+        if size < expected_size:
+            raise ValueError(file_name + ' is truncated, its header has ' + str(count) + ' cars that take '
+                             + str(expected_size) + ' bytes but the file has ' + str(size) + ' bytes')
+        if size > expected_size:
+            raise ValueError(file_name + ' has ' + str(size - expected_size) + ' bytes after the ' + str(count)
+                             + ' cars of its header')
+        if count == 0:
+            self.records = np.zeros(0, dtype=scenario_dtype)
+        else:
+            self.records = np.memmap(file_name, dtype=scenario_dtype, mode='r',
+                                     offset=scenario_header_dtype.itemsize, shape=(count,))
+
+    def __len__(self):
+        return len(self.get_records())
+
+    def __getitem__(self, index):
+        return record_to_json(self.get_records()[index])
+
+    def __iter__(self):
+        return BinaryScenarioIterator(self)
+
+    # Checkpoints only keep the name of the file, it is mapped again when the scenario is restored
+    def __getstate__(self):
+        return {'file_name': self.file_name}
+
+    def __setstate__(self, state):
+        self.__init__(state['file_name'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_records(self):
+        if self.records is None:
+            raise ValueError(self.file_name + ' is closed')
+        return self.records
+
+    def get_file_name(self):
+        return self.file_name
+
+    # The file is unmapped once the arrays taken from get_records are gone too
+    def close(self):
+        self.records = None
+
+    def is_closed(self):
+        return self.records is None
+
+
+# Goes through the cars of a binary scenario, it can be saved in a checkpoint with its position
+class BinaryScenarioIterator(object):
+
+    def __init__(self, scenario, position=0):
+        self.scenario = scenario
+        self.position = position
+
+    def get_scenario(self):
+        return self.scenario
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.position >= len(self.scenario):
+            raise StopIteration
+        car = self.scenario[self.position]
+        self.position += 1
+        return car
+
+
+def record_to_json(record):
+    """
+    :param record: record of scenario_dtype.
+    :return: the car in json, with the fields read by recreate_car.
+    """
+    coordinates = {'x_coordinate': float(record['x_coordinate']), 'y_coordinate': float(record['y_coordinate']),
+                   'direction': float(record['direction'])}
+    return {'name': int(record['name']), 'lane': int(record['lane']),
+            'intention': code_intentions[record['intention']], 'creation_time': int(record['creation_time']),
+            'initial_coordinates': coordinates}
+
+
+# Writes a binary scenario a block of records at a time, the amount of cars is written in the header when it is closed
+class BinaryScenarioWriter(object):
+
+    def __init__(self, file_name):
+        self.file = open(file_name, 'wb')
+        self.header = np.zeros(1, dtype=scenario_header_dtype)
+        self.header['magic'] = scenario_magic
+        self.header['version'] = scenario_version
+        self.header.tofile(self.file)
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_count(self):
+        return self.count
+
+    def write_records(self, records):
+        """
+        :param records: array of scenario_dtype, ordered by creation time after the ones already written.
+        """
+        records.tofile(self.file)
+        self.count += len(records)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.header['count'] = self.count
+        self.file.seek(0)
+        self.header.tofile(self.file)
+        self.file.close()
+
+
+def write_binary_scenario(cars, file_name, chunk_size=65536):
+    """
+    Writes the cars in the binary format, a chunk of records at a time so the source can be streamed.
+    :param cars: iterable of cars in json ordered by creation time.
+    :param file_name: path of the file.
+    :param chunk_size: amount of records written at once.
+    :return: number of cars written.
+    """
+    chunk = np.zeros(chunk_size, dtype=scenario_dtype)
+    with BinaryScenarioWriter(file_name) as writer:
+        filled = 0
+        for car in cars:
+            coordinates = car['initial_coordinates']
+            chunk[filled] = (int(car['name']), int(car['lane']), intention_codes[car['intention']],
+                             int(car['creation_time']), float(coordinates['x_coordinate']),
+                             float(coordinates['y_coordinate']), float(coordinates['direction']))
+            filled += 1
+            if filled == chunk_size:
+                writer.write_records(chunk)
+                filled = 0
+        writer.write_records(chunk[:filled])
+    return writer.get_count()
+
+
+def json_to_binary_scenario(json_file_name, file_name):
+    """
+    Converts a json scenario, like the ones in simulation_files, or a line-delimited one to the binary format.
+    """
+    if json_file_name.endswith('.jsonl'):
+        with ScenarioReader(json_file_name) as reader:
+            return write_binary_scenario(reader, file_name)
+    with open(json_file_name, 'r') as json_file:
+        return write_binary_scenario(json.load(json_file)['cars'], file_name)
+
+
+def binary_to_json_scenario(file_name, json_file_name):
+    """
+    Converts a binary scenario to the json format of simulation_files.
+    """
+    cars = []
+    for car in BinaryScenario(file_name):
+        coordinates = dict((key, str(value)) for key, value in car['initial_coordinates'].items())
+        cars.append({'name': str(car['name']), 'lane': str(car['lane']), 'creation_time': str(car['creation_time']),
+                     'intention': car['intention'], 'actual_coordinates': dict(coordinates),
+                     'initial_coordinates': coordinates})
+    with open(json_file_name, 'w') as outfile:
+        json.dump({'cars': cars}, outfile)
+
+
+def open_scenario(file_name):
+    """
+    Opens a scenario file, binary scenarios are recognised by their header and the rest are read as line-delimited.
+    :return: a BinaryScenario or a ScenarioReader.
+    """
+    with open(file_name, 'rb') as scenario_file:
+        magic = scenario_file.read(len(scenario_magic))
+    if magic == scenario_magic:
+        return BinaryScenario(file_name)
+    return ScenarioReader(file_name)
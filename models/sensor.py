@@ -1,4 +1,4 @@
-from math import pi, cos, sin
+from math import pi, cos, sin, sqrt, ceil
 
 
 # Simulates having a sensor which tells you to stop close to the cars in the same lane
@@ -44,6 +44,60 @@ class ProximitySensor(object):
         return distance > self.limit_distance
 
     def ticks_to_crash(self):
+        """
+        Ticks that the owner car needs to get closer than the limit distance to the closest car if both keep their
+        speeds and directions, in any direction, so cars in a turn are solved in closed form too.
+        :return: ticks left to crash, or -1 if the gap never closes.
+        """
+        return self.analytic_ticks_to_crash()
+
+    # Under constant speeds and directions the vector between the back of the owner car and the front of the
+    # closest car changes linearly with the ticks, so the first tick at which its length falls under the limit
+    # distance is the first integer between the roots of a quadratic.
+    def analytic_ticks_to_crash(self):
+        pos_x, pos_y = self.owner_car.get_position()
+        other_x, other_y = self.closest_car.get_position()
+        rad = self.owner_car.get_direction() * pi / 180
+        other_rad = self.closest_car.get_direction() * pi / 180
+        speed_factor = self.owner_car.get_speed_factor()
+        time_step = self.owner_car.get_time_step()
+        back_car_length = self.get_owner_car().get_car_length() / 2.0
+        front_car_length = self.get_closest_car().get_car_length() / 2.0
+        gap_x = (other_x + sin(other_rad) * front_car_length) - (pos_x - sin(rad) * back_car_length)
+        gap_y = (other_y + cos(other_rad) * front_car_length) - (pos_y - cos(rad) * back_car_length)
+        # Change of the gap in one tick
+        step_x = (-sin(other_rad) * self.closest_car.get_speed() + sin(rad) * self.owner_car.get_speed()) \
+            * time_step * speed_factor
+        step_y = (-cos(other_rad) * self.closest_car.get_speed() + cos(rad) * self.owner_car.get_speed()) \
+            * time_step * speed_factor
+
+        def closes(ticks):
+            return sqrt((gap_x + step_x * ticks) ** 2 + (gap_y + step_y * ticks) ** 2) <= self.limit_distance
+
+        if closes(0):
+            return 0
+        a = step_x ** 2 + step_y ** 2
+        b = 2 * (gap_x * step_x + gap_y * step_y)
+        c = gap_x ** 2 + gap_y ** 2 - self.limit_distance ** 2
+        discriminant = b ** 2 - 4 * a * c
+        if a == 0 or discriminant < 0:
+            return -1
+        first_root = (-b - sqrt(discriminant)) / (2 * a)
+        second_root = (-b + sqrt(discriminant)) / (2 * a)
+        if second_root < 0:
+            return -1
+        ticks = max(1, int(ceil(first_root)))
+        # The roots are rounded, the limits are checked like the simulation does
+        while ticks > 1 and closes(ticks - 1):
+            ticks -= 1
+        while ticks <= second_root + 1 and not closes(ticks):
+            ticks += 1
+        if not closes(ticks):
+            return -1
+        return ticks
+
+    # Moves the cars tick by tick keeping their directions, same result as analytic_ticks_to_crash when the gap closes
+    def iterative_ticks_to_crash(self):
         pos_x, pos_y = self.owner_car.get_position()
         other_x, other_y = self.closest_car.get_position()
         rad = self.owner_car.get_direction() * pi / 180
@@ -85,7 +139,10 @@ class ProximitySensor(object):
                 self.owner_car.set_speed(other_speed)
             elif other_speed < speed:
                 tick_left_to_crash = self.ticks_to_crash()  # if ticks left to crash is 0 then it's already doomed
-                if tick_left_to_crash == 0.0:
+                if tick_left_to_crash == -1:
+                    # The gap never closes
+                    pass
+                elif tick_left_to_crash == 0.0:
                     # print([self.closest_car.get_position(), self.closest_car.get_speed(),
                     #       self.closest_car.get_acceleration()])
                     # print([self.owner_car.get_position(), self.owner_car.get_speed(), self.owner_car.get_acceleration()])
@@ -112,7 +169,7 @@ class DistanceSensor(object):
         self.acceleration_change_rate = 0.3
 
         # How many ticks there are in a second
-        self.one_second_ticks = 1 / (owner_car.TIME_STEP * owner_car.SPEED_FACTOR)
+        self.one_second_ticks = 1 / (owner_car.get_time_step() * owner_car.get_speed_factor())
 
     def get_owner_car(self):
         return self.owner_car
@@ -197,14 +254,10 @@ class DistanceSensor(object):
             condition = True
         return condition
 
+    # The channel keeps the closest car updated, it changes when the car in front crosses the entrance of the
+    # intersection or leaves the screen
     def watch(self):
         from utils.utils import n_seconds_fix
-        if self.closest_car is not None:
-            if self.closest_car.crossed_entrance():
-                self.set_closest_car(None)
-            elif not self.closest_car.inside_full_rectangle and self.closest_car.left_inner_rectangle and not \
-                    self.closest_car.inside_full_intersection():
-                self.set_closest_car(None)
         if self.closest_car is not None:
             current_distance = self.get_back_front_distance()
             safe_distance = current_distance + self.limit_distance
@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from pygame import image, transform
+from models.geometry import images_directory
+
+
+# Process wide cache of the car images. The image is loaded and scaled down only once, then every rotated
+# version is kept by angle bucket. The buckets of the directions cars drive in most of the time (the four lanes)
+# are always kept, the rest of them are evicted following the least recently used order.
+class SpriteAtlas(object):
+
+    def __init__(self, scale_rate, image_name="car.png", angle_step=1.0, max_rotations=128,
+                 pinned_angles=(0, 90, 180, 270)):
+        # Degrees covered by each bucket of rotated images
+        self.angle_step = angle_step
+        # Amount of not pinned rotated images kept at the same time
+        self.max_rotations = max_rotations
+        original_image = image.load(images_directory + image_name)
+        self.image = transform.scale(original_image, (int(original_image.get_width() * scale_rate),
+                                                      int(original_image.get_height() * scale_rate)))
+        self.pinned = {}
+        for angle in pinned_angles:
+            bucket = self.get_bucket(angle)
+            self.pinned[bucket] = transform.rotate(self.image, bucket * self.angle_step)
+        self.rotations = OrderedDict()
+
+    def get_image(self):
+        return self.image
+
+    def get_bucket(self, direction):
+        return int(round(direction / self.angle_step)) % int(round(360 / self.angle_step))
+
+    def get_rotated_image(self, direction):
+        """
+        Returns the image of the car rotated to the given direction, rounded to the closest bucket.
+        :param direction: direction of the car in degrees.
+        :return: <Surface> rotated image.
+        """
+        bucket = self.get_bucket(direction)
+        rotated_image = self.pinned.get(bucket)
+        if rotated_image is not None:
+            return rotated_image
+        rotated_image = self.rotations.get(bucket)
+        if rotated_image is None:
+            rotated_image = transform.rotate(self.image, bucket * self.angle_step)
+            self.rotations[bucket] = rotated_image
+            if len(self.rotations) > self.max_rotations:
+                self.rotations.popitem(last=False)
+        else:
+            self.rotations.move_to_end(bucket)
+        return rotated_image
+
+    def clear(self):
+        self.rotations.clear()
+
+
+# Atlases shared by every car of the process, one for each scale rate
+sprite_atlases = {}
+
+
+def get_sprite_atlas(scale_rate):
+    atlas = sprite_atlases.get(scale_rate)
+    if atlas is None:
+        atlas = SpriteAtlas(scale_rate)
+        sprite_atlases[scale_rate] = atlas
+    return atlas
@@ -0,0 +1,166 @@
+import numpy as np
+from math import pi
+
+# Codes used to keep the intention of the cars in an array
+intention_codes = {'l': 0, 's': 1, 'r': 2}
+
+
+# Keeps the kinematic state of every car of a simulation in arrays, one position per car (struct of arrays).
+# A car added to the world stops keeping its own position, speed, acceleration and direction, its getters and
+# setters read and write the arrays instead. The step method moves all the cars at the same time doing the same
+# as Car.move_control: accelerate, turn and then move.
+class World(object):
+
+    def __init__(self, inner_intersection=None, capacity=64, time_step=0.1, speed_factor=2, max_speed=60.0):
+        """
+        :param inner_intersection: rectangle where the cars turn. Cars of the world have to share this rectangle.
+        :param capacity: initial size of the arrays, they grow when needed.
+        :param time_step: time step used to accelerate and move the cars.
+        :param speed_factor: speed factor used to move the cars.
+        :param max_speed: maximum speed that the cars can reach.
+        """
+        from utils.utils import get_right_turn_radio, get_left_turn_radio
+        self.inner_intersection_rectangle = inner_intersection
+        self.time_step = time_step
+        self.speed_factor = speed_factor
+        self.max_speed = max_speed
+        # Turn radios by lane, the same that next_direction uses
+        self.right_turn_radios = np.array([get_right_turn_radio(lane) for lane in range(4)], dtype=np.float64)
+        self.left_turn_radios = np.array([get_left_turn_radio(lane) for lane in range(4)], dtype=np.float64)
+
+        self.size = 0
+        self.cars = []
+        self.pos_x = np.zeros(capacity, dtype=np.float64)
+        self.pos_y = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.acceleration = np.zeros(capacity, dtype=np.float64)
+        self.direction = np.zeros(capacity, dtype=np.float64)
+        self.origin_x = np.zeros(capacity, dtype=np.float64)
+        self.origin_y = np.zeros(capacity, dtype=np.float64)
+        self.origin_direction = np.zeros(capacity, dtype=np.float64)
+        self.lane = np.zeros(capacity, dtype=np.int8)
+        self.intention = np.zeros(capacity, dtype=np.int8)
+        # Cars without intersection rectangles never turn, like in Car.next_direction
+        self.turns = np.zeros(capacity, dtype=np.bool_)
+
+    def array_names(self):
+        return ['pos_x', 'pos_y', 'speed', 'acceleration', 'direction', 'origin_x', 'origin_y', 'origin_direction',
+                'lane', 'intention', 'turns']
+
+    def get_cars(self):
+        return self.cars
+
+    def get_size(self):
+        return self.size
+
+    def grow(self):
+        for array_name in self.array_names():
+            array = getattr(self, array_name)
+            new_array = np.zeros(2 * len(array), dtype=array.dtype)
+            new_array[:self.size] = array[:self.size]
+            setattr(self, array_name, new_array)
+
+    def add_car(self, car):
+        """
+        Copies the state of the car into the arrays and makes the car a view of them.
+        :param car: Car object that is not in another world.
+        :return: index of the car in the arrays.
+        """
+        if car.get_path() is not None:
+            raise ValueError('Cars that follow a path can not be moved by a World')
+        if self.size == len(self.pos_x):
+            self.grow()
+        index = self.size
+        self.pos_x[index] = car.get_x_coordinate()
+        self.pos_y[index] = car.get_y_coordinate()
+        self.speed[index] = car.get_speed()
+        self.acceleration[index] = car.get_acceleration()
+        self.direction[index] = car.get_direction()
+        self.origin_x[index] = car.get_origin_x_coordinate()
+        self.origin_y[index] = car.get_origin_y_coordinate()
+        self.origin_direction[index] = car.get_origin_direction()
+        self.lane[index] = car.get_lane()
+        self.intention[index] = intention_codes[car.get_intention()]
+        self.turns[index] = car.inner_intersection_rectangle is not None \
+            and car.full_intersection_rectangle is not None
+        self.cars.append(car)
+        self.size += 1
+        car.attach_world(self, index)
+        return index
+
+    def remove_car(self, car):
+        """
+        Gives the car its state back and fills its place in the arrays with the last car.
+        """
+        index = car.get_world_index()
+        car.detach_world()
+        last = self.size - 1
+        if index != last:
+            for array_name in self.array_names():
+                array = getattr(self, array_name)
+                array[index] = array[last]
+            moved_car = self.cars[last]
+            self.cars[index] = moved_car
+            moved_car.world_index = index
+        self.cars.pop()
+        self.size -= 1
+
+    def set_lane(self, index, lane):
+        self.lane[index] = lane
+
+    def set_intention(self, index, intention):
+        self.intention[index] = intention_codes[intention]
+
+    def next_directions(self, speed, direction, pos_x, pos_y, lane, intention, origin_direction, origin_x, origin_y,
+                        turns):
+        """
+        Vectorized version of car_functions.next_direction followed by correct_direction.
+        """
+        rectangle = self.inner_intersection_rectangle
+        origin_rad = origin_direction * pi / 180
+        virtual_y = -1 * (pos_x - origin_x) * np.cos(origin_rad) + (pos_y - origin_y) * np.sin(origin_rad)
+        if rectangle is not None:
+            distance = np.select([lane == 0, lane == 1, lane == 2],
+                                 [pos_y - (rectangle.top + rectangle.h), pos_x - (rectangle.left + rectangle.w),
+                                  rectangle.top - pos_y],
+                                 rectangle.left - pos_x)
+        else:
+            distance = np.ones_like(pos_x)
+        right_radio = self.right_turn_radios[lane]
+        left_radio = self.left_turn_radios[lane]
+        # Same operations as turn_direction, in the same order, so the results are the same
+        turn_step = 90 * speed * self.time_step * self.speed_factor
+
+        new_direction = direction.copy()
+        turning_right = turns & (intention == intention_codes['r']) & (virtual_y > -right_radio) & (distance <= 0)
+        new_direction[turning_right] -= turn_step[turning_right] / (pi / 2 * right_radio[turning_right])
+        turning_left = turns & (intention == intention_codes['l']) & (virtual_y < left_radio) & (distance <= 0)
+        new_direction[turning_left] += turn_step[turning_left] / (pi / 2 * left_radio[turning_left])
+
+        # correct_direction, left turns compare with the target direction and the rest with its opposite
+        is_left = intention == intention_codes['l']
+        target_direction = np.where(is_left, (origin_direction + 90) % 360, np.abs(360 - origin_direction - 90) % 360)
+        compared = np.where(is_left, np.abs(new_direction), np.abs(360 - np.abs(new_direction)))
+        difference = np.abs(target_direction - compared)
+        corrected = turns & (difference != 0.0) & (difference < 2.0)
+        new_direction[corrected] = target_direction[corrected]
+        return new_direction
+
+    def step(self):
+        """
+        Accelerates, turns and moves every car of the world in one vectorized call.
+        """
+        size = self.size
+        if size == 0:
+            return
+        speed = np.clip(self.speed[:size] + self.acceleration[:size] * self.time_step, 0, self.max_speed)
+        pos_x = self.pos_x[:size]
+        pos_y = self.pos_y[:size]
+        direction = self.next_directions(speed, self.direction[:size], pos_x, pos_y, self.lane[:size],
+                                         self.intention[:size], self.origin_direction[:size], self.origin_x[:size],
+                                         self.origin_y[:size], self.turns[:size])
+        rad = direction * pi / 180
+        self.speed[:size] = speed
+        self.direction[:size] = direction
+        self.pos_x[:size] = pos_x + -np.sin(rad) * speed * self.time_step * self.speed_factor
+        self.pos_y[:size] = pos_y + -np.cos(rad) * speed * self.time_step * self.speed_factor
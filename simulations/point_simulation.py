@@ -22,7 +22,7 @@ def simulate_stop_before_crash(first_car_speed=10.0, first_lane=0,
     for i in range(iterations):
         screen.blit(background, (0, 0))
         screen.blit(intersection_background, (0, 0))
-        screen.blit(simulation_car.rotated_image, simulation_car.screen_car)
+        screen.blit(simulation_car.rotated_image, simulation_car.get_image_rect())
         pygame.display.update(screen.get_rect())
         simulation_car.update()
         if simulation_car.collision_with_point(collision_x, collision_y):
@@ -0,0 +1,113 @@
+import pygame
+from models.replay import TraceReplay, playback_tick
+from models.sprites import get_sprite_atlas
+from models.car import Car
+from utils.utils import init_graphic_environment, draw_collision_points, images_directory, black
+
+
+# Draws a recorded trace instead of simulating it again. Only the parts of the screen where cars were or are drawn
+# are updated. Keys: space pauses, right and left arrows seek one second of ticks, up and down change the speed,
+# backspace plays backwards and escape closes the replay.
+class ReplayViewer(object):
+
+    def __init__(self, directory, frames_per_second=30, ticks_per_second=30, start_tick=None,
+                 collision_points=True):
+        """
+        :param directory: directory of a trace written by a TraceRecorder.
+        :param frames_per_second: maximum amount of frames drawn each second.
+        :param ticks_per_second: ticks of the trace replayed each second, ticks without a frame are skipped.
+        :param start_tick: tick where the replay starts, by default the first one.
+        :param collision_points: if True the collision points of the intersection are drawn.
+        """
+        self.replay = TraceReplay(directory)
+        self.frames_per_second = frames_per_second
+        self.ticks_per_second = ticks_per_second
+        self.tick = self.replay.get_first_tick() if start_tick is None else start_tick
+        self.paused = False
+        self.running = True
+        self.screen, background, intersection_background, self.font = init_graphic_environment()
+        # The static part of the screen is drawn once
+        self.background = background.copy()
+        self.background.blit(intersection_background, (0, 0))
+        if collision_points:
+            draw_collision_points(self.background)
+        self.atlas = get_sprite_atlas(Car.image_scale_rate)
+        self.role_markers = [None, self.marker('yellow_light.png'), self.marker('red_light.png')]
+        self.dirty_rects = []
+        self.screen.blit(self.background, (0, 0))
+
+    @staticmethod
+    def marker(image_name):
+        return pygame.transform.scale(pygame.image.load(images_directory + image_name), (6, 6))
+
+    def get_tick(self):
+        return self.tick
+
+    def seek(self, tick):
+        self.tick = min(max(tick, self.replay.get_first_tick()), self.replay.get_last_tick())
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    self.paused = not self.paused
+                elif event.key == pygame.K_RIGHT:
+                    self.seek(self.tick + abs(self.ticks_per_second))
+                elif event.key == pygame.K_LEFT:
+                    self.seek(self.tick - abs(self.ticks_per_second))
+                elif event.key == pygame.K_UP:
+                    self.ticks_per_second *= 2
+                elif event.key == pygame.K_DOWN:
+                    self.ticks_per_second /= 2.0
+                elif event.key == pygame.K_BACKSPACE:
+                    self.ticks_per_second = -self.ticks_per_second
+
+    def draw(self):
+        """
+        Draws the frame of the current tick and returns the parts of the screen that changed.
+        """
+        tick = int(self.tick)
+        frame = self.replay.frame(tick)
+        # The parts where something was drawn in the last frame are cleaned
+        changed = self.dirty_rects
+        for rect in changed:
+            self.screen.blit(self.background, rect, rect)
+        self.dirty_rects = []
+        for pos_x, pos_y, direction, role in zip(frame['pos_x'].tolist(), frame['pos_y'].tolist(),
+                                                 frame['direction'].tolist(), frame['role'].tolist()):
+            image = self.atlas.get_rotated_image(direction)
+            rect = image.get_rect()
+            rect.center = (pos_x, pos_y)
+            self.dirty_rects.append(self.screen.blit(image, rect))
+            if self.role_markers[role] is not None:
+                marker_rect = self.role_markers[role].get_rect()
+                marker_rect.center = (pos_x, pos_y)
+                self.dirty_rects.append(self.screen.blit(self.role_markers[role], marker_rect))
+        text = self.font.render('tick ' + str(tick) + ' x' + str(self.ticks_per_second / 30.0)
+                                + (' paused' if self.paused else ''), True, black)
+        self.dirty_rects.append(self.screen.blit(text, (5, 5)))
+        return changed + self.dirty_rects
+
+    def run(self, max_frames=None):
+        """
+        Replays the trace until it is closed or, if it is given, until max_frames frames are drawn.
+        """
+        clock = pygame.time.Clock()
+        pygame.display.update()
+        frames = 0
+        while self.running and (max_frames is None or frames < max_frames):
+            self.handle_events()
+            pygame.display.update(self.draw())
+            frames += 1
+            elapsed = clock.tick(self.frames_per_second) / 1000.0
+            if not self.paused:
+                self.tick = playback_tick(self.tick, elapsed, self.ticks_per_second, self.replay.get_first_tick(),
+                                          self.replay.get_last_tick())
+        pygame.display.quit()
+
+
+if __name__ == '__main__':
+    import sys
+    ReplayViewer(sys.argv[1]).run()
@@ -40,7 +40,7 @@ def simulate_stop_before_crash(first_car_speed=10.0, follower_car_speed=40.0, fi
         screen.blit(intersection_background, (0, 0))
         draw_collision_points(screen)
         for car in [first_car, follower_car]:
-            screen.blit(car.rotated_image, car.screen_car)
+            screen.blit(car.rotated_image, car.get_image_rect())
         pygame.display.update(screen.get_rect())
         do_round([first_car, follower_car], channel)
     pygame.display.quit()
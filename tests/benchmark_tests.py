@@ -0,0 +1,39 @@
+import unittest
+from benchmarks.suite import Benchmark, default_benchmarks, run_benchmarks, compare_results
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def results(self, medians):
+        return {'meta': {}, 'benchmarks': dict((key, {'median': median}) for key, median in medians.items())}
+
+    # The medians are compared with the ones of the baseline
+    def test_compare_results(self):
+        baseline = self.results({'a': 1.0, 'b': 1.0, 'c': 1.0, 'd': 1.0})
+        results = self.results({'a': 1.5, 'b': 0.5, 'c': 1.1, 'e': 1.0})
+        comparison = dict((entry['name'], entry) for entry in compare_results(results, baseline, threshold=0.25))
+        self.assertEqual('regression', comparison['a']['status'])
+        self.assertEqual(1.5, comparison['a']['ratio'])
+        self.assertEqual('improvement', comparison['b']['status'])
+        self.assertEqual('same', comparison['c']['status'])
+        self.assertEqual('missing', comparison['d']['status'])
+        self.assertEqual('new', comparison['e']['status'])
+
+    # The fixture is built once, the setup runs before every call and only the function is timed
+    def test_run(self):
+        calls = []
+        benchmark = Benchmark('append', 'list', lambda: [], lambda state: calls.append(state),
+                              setup=lambda fixture: len(calls), params={'size': 3}, number=4)
+        self.assertEqual('append[size=3]', benchmark.get_key())
+        result = benchmark.run(repeat=2)
+        self.assertEqual(list(range(8)), calls)
+        self.assertEqual(8, result['number'] * result['repeat'])
+        self.assertTrue(0 <= result['min'] <= result['median'])
+
+    # Every benchmark of the suite runs on its fixture
+    def test_default_benchmarks(self):
+        benchmarks = default_benchmarks(quick=True)
+        results = run_benchmarks([benchmark for benchmark in benchmarks if benchmark.get_group() != 'simulation'],
+                                 repeat=1, number=2)
+        self.assertEqual(len(benchmarks) - 1, len(results['benchmarks']))
+        self.assertTrue(all(result['median'] > 0 for result in results['benchmarks'].values()))
@@ -1,7 +1,7 @@
 import unittest
 from models.car import *
 from models.channel import Channel
-from random import randint, choice
+from models.random_streams import RandomStreams
 from utils.utils import do_round, random_car, graph_to_string
 import pygame
 
@@ -12,12 +12,13 @@ import pygame
 # outside_initial_positions = [(435, 868, 0, 0), (868, 345, 90, 1), (345, -98, 180, 2), (-98, 435, 270, 3)]
 class TestCarMethods(unittest.TestCase):
     def setUp(self):
+        self.streams = RandomStreams(self.id())
         self.full_intersection_rect = pygame.Rect(0, 0, 768, 768)
         self.inner_intersection_rect = pygame.Rect(280, 280, 210, 210)
         self.default_channel = Channel()
         self.default_car = random_car(name=1, initial_speed=20, full_intersection=self.full_intersection_rect,
                                       channel=self.default_channel, inner_intersection=self.inner_intersection_rect,
-                                      lane=0, intention='s')
+                                      lane=0, intention='s', streams=self.streams)
 
     def test_enter_leave_method(self):
         self.default_car.enter_intersection()
@@ -30,11 +31,11 @@ class TestCarMethods(unittest.TestCase):
     def test_destination_lane(self):
         channel = Channel()
         car1 = random_car(name=1, initial_speed=20, full_intersection=self.full_intersection_rect, channel=channel,
-                          inner_intersection=self.inner_intersection_rect, lane=0, intention='s')
+                          inner_intersection=self.inner_intersection_rect, lane=0, intention='s', streams=self.streams)
         car2 = random_car(name=1, initial_speed=20, full_intersection=self.full_intersection_rect, channel=channel,
-                          inner_intersection=self.inner_intersection_rect, lane=0, intention='l')
+                          inner_intersection=self.inner_intersection_rect, lane=0, intention='l', streams=self.streams)
         car3 = random_car(name=1, initial_speed=20, full_intersection=self.full_intersection_rect, channel=channel,
-                          inner_intersection=self.inner_intersection_rect, lane=0, intention='r')
+                          inner_intersection=self.inner_intersection_rect, lane=0, intention='r', streams=self.streams)
         self.assertEqual(2, car1.destination_lane())
         self.assertEqual(3, car2.destination_lane())
         self.assertEqual(1, car3.destination_lane())
@@ -43,7 +44,7 @@ class TestCarMethods(unittest.TestCase):
     def test_enter_intersection(self):
         channel = Channel()
         car = random_car(name=1, initial_speed=20, full_intersection=self.full_intersection_rect, channel=channel,
-                         inner_intersection=self.inner_intersection_rect, lane=0, intention='s')
+                         inner_intersection=self.inner_intersection_rect, lane=0, intention='s', streams=self.streams)
         self.assertFalse(car.get_inside_full_rectangle())
         self.assertFalse(car.inside_full_intersection())
         self.assertTrue(car not in channel.get_cars())
@@ -57,7 +58,7 @@ class TestCarMethods(unittest.TestCase):
     def test_inner_intersection(self):
         channel = Channel()
         car = random_car(name=1, initial_speed=20, full_intersection=self.full_intersection_rect, channel=channel,
-                         inner_intersection=self.inner_intersection_rect, lane=0, intention='s')
+                         inner_intersection=self.inner_intersection_rect, lane=0, intention='s', streams=self.streams)
         self.assertFalse(car.inside_inner_intersection())
         for _ in range(91):
             do_round([car], channel)
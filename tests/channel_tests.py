@@ -0,0 +1,200 @@
+import unittest
+from models.car import *
+from models.channel import Channel
+from models.messages import WelcomeMessage, InfoMessage, NewCarMessage
+from utils.utils import do_round, random_car
+from functions.simulation_functions import run_simulation
+
+
+class TestChannel(unittest.TestCase):
+
+    def coordinate_cars(self, channel):
+        cars = []
+        lanes = [0, 2, 1, 2, 3]
+        intentions = ['s', 's', 'r', 's', 'l']
+        for i in range(5):
+            car = Car(name=(i + 1), lane=lanes[i], intention=intentions[i], channel=channel)
+            cars.append(car)
+            do_round(cars, channel)
+            car.enter_intersection()
+        do_round(cars, channel)
+        return cars
+
+    # The welcome message keeps the graph it had when the round swapped, even if the sender changes its graph later
+    def test_sealed_welcome_message(self):
+        channel = Channel()
+        cars = self.coordinate_cars(channel)
+        supervisor = cars[0]
+        message = WelcomeMessage(supervisor, receiver_name=5)
+        channel.queue_message(message)
+        next_round = channel.get_next_round_messages()
+        channel.prepare_round()
+        self.assertIs(next_round, channel.get_current_round_messages())
+        self.assertEqual([], channel.get_next_round_messages())
+        graph = dict(message.get_graph().items())
+        supervisor.add_new_car(name=6, lane=1, intention='s')
+        self.assertTrue(6 in supervisor.get_graph())
+        self.assertEqual(graph, message.get_graph())
+        self.assertEqual({5}, message.get_leaf_cars())
+
+    # Coordinating with the checks of the debug mode gives the same graphs
+    def test_debug_mode(self):
+        cars = self.coordinate_cars(Channel())
+        debug_cars = self.coordinate_cars(Channel(debug=True))
+        for car, debug_car in zip(cars, debug_cars):
+            self.assertEqual(car.get_graph(), debug_car.get_graph())
+            self.assertEqual(car.get_leaf_cars(), debug_car.get_leaf_cars())
+
+    def test_debug_mode_detects_changes(self):
+        channel = Channel(debug=True)
+        cars = self.coordinate_cars(channel)
+        message = WelcomeMessage(cars[0], receiver_name='changing')
+
+        # Receiver that changes the messages it gets
+        class ChangingReceiver(object):
+            def get_name(self):
+                return 'changing'
+
+            def get_following_cars(self):
+                return {}
+
+            def receive_message(self, received_message):
+                received_message.get_leaf_cars().add(1)
+        channel.add_car(ChangingReceiver())
+        channel.queue_message(message)
+        channel.prepare_round()
+        self.assertRaises(RuntimeError, channel.deliver_messages)
+
+    # A message changed by its sender after it was queued is found when the round swaps, the graph of a welcome
+    # message is the live one of the supervisor until then
+    def test_debug_mode_detects_changes_after_send(self):
+        for bandwidth_limited in [False, True]:
+            channel = Channel(debug=True, bandwidth_limited=bandwidth_limited)
+            cars = self.coordinate_cars(channel)
+            message = WelcomeMessage(cars[0], receiver_name=cars[1].get_name())
+            channel.queue_message(message)
+            cars[0].add_new_car(name=10, lane=0, intention='s')
+            channel.prepare_round()
+            channel.deliver_messages()
+            message = WelcomeMessage(cars[0], receiver_name=cars[1].get_name())
+            channel.queue_message(message)
+            message.second_at_charge_name = 10
+            self.assertRaises(RuntimeError, channel.prepare_round)
+
+    # Info messages only reach the cars that follow the sender and welcome messages only reach their receiver
+    def test_delivery_index(self):
+        channel = Channel()
+        cars = self.coordinate_cars(channel)
+        for car in cars:
+            for name in car.get_following_cars():
+                self.assertTrue(car.get_name() in channel.get_subscriptions()[name])
+        subscribers = set(channel.get_subscriptions()[3])
+        self.assertEqual(set(car.get_name() for car in cars if 3 in car.get_following_cars()), subscribers)
+        self.assertEqual(subscribers, set(car.get_name() for car in channel.receivers(InfoMessage(cars[2]))))
+        self.assertEqual([cars[4]], list(channel.receivers(WelcomeMessage(cars[0], receiver_name=5))))
+        self.assertEqual(cars, channel.receivers(NewCarMessage(cars[4])))
+
+        # Same coordination when every message is broadcast
+        broadcast_cars = self.coordinate_cars(Channel(broadcast_delivery=True))
+        for car, broadcast_car in zip(cars, broadcast_cars):
+            self.assertEqual(car.get_graph(), broadcast_car.get_graph())
+            self.assertEqual(car.get_following_cars(), broadcast_car.get_following_cars())
+
+        # A car that leaves is removed from the index
+        for car in cars:
+            car.leave_inner_intersection()
+            do_round(cars, channel)
+        for car in cars:
+            self.assertTrue(car.get_name() not in channel.cars_by_name)
+        self.assertEqual({}, channel.get_subscriptions())
+
+    # At most messages_per_round messages are delivered, welcome messages go first and old info messages are dropped
+    def test_bandwidth_limited_round(self):
+        cars = self.coordinate_cars(Channel())
+        channel = Channel(messages_per_round=2, bandwidth_limited=True, info_deadline=2)
+        for car in cars:
+            channel.broadcast(InfoMessage(car))
+        welcome = WelcomeMessage(cars[0], receiver_name=5)
+        channel.broadcast(welcome)
+        channel.prepare_round()
+        self.assertEqual(welcome, channel.get_current_round_messages()[0])
+        self.assertEqual(2, len(channel.get_current_round_messages()))
+        channel.prepare_round()
+        self.assertEqual(2, len(channel.get_current_round_messages()))
+        channel.prepare_round()
+        statistics = channel.get_statistics()
+        self.assertEqual({'InfoMessage': 2}, statistics['dropped_by_type'])
+        self.assertEqual(0, statistics['pending'])
+        self.assertEqual(2, statistics['max_delay'])
+
+        # With enough capacity the cars coordinate like with the unlimited channel
+        limited_cars = self.coordinate_cars(Channel(messages_per_round=50, bandwidth_limited=True))
+        for car, limited_car in zip(self.coordinate_cars(Channel()), limited_cars):
+            self.assertEqual(car.get_graph(), limited_car.get_graph())
+
+    # With a small budget the messages are late, a car ignores a welcome message sent before it was in the graph
+    def test_bandwidth_limited_late_welcome(self):
+        cars = self.coordinate_cars(Channel())
+        late_car = Car(name=6, lane=0, intention='s', graphic_flag=False)
+        late_car.receive_welcome_message(WelcomeMessage(cars[0]))
+        self.assertIsNone(late_car.get_supervisor_car())
+        channel = run_simulation(100, graphic_display=False, limit=80, messages_per_round=2)
+        self.assertTrue(channel.get_statistics()['delivered'] > 0)
+
+    # The sensor of each car watches the car in front of it in its lane until that car crosses the entrance
+    def test_lane_queues(self):
+        channel = Channel()
+        cars = [random_car(name=name, initial_speed=20, channel=channel, lane=0, intention='s', graphic_flag=False,
+                           create_sensor_flag=True, initial_acceleration_rate=0) for name in range(3)]
+        self.assertEqual(cars, list(channel.get_approach_lanes()[0]))
+        self.assertIsNone(cars[0].get_sensor().get_closest_car())
+        self.assertIs(cars[0], cars[1].get_sensor().get_closest_car())
+        self.assertIs(cars[1], cars[2].get_sensor().get_closest_car())
+        channel.crossed_entrance_notification(cars[0])
+        self.assertEqual(cars[1:], list(channel.get_approach_lanes()[0]))
+        self.assertIsNone(cars[1].get_sensor().get_closest_car())
+        self.assertIs(cars[1], cars[2].get_sensor().get_closest_car())
+        # A car that leaves the middle of the lane links the cars around it
+        channel.left_screen_notification(cars[1])
+        self.assertEqual([cars[2]], list(channel.get_approach_lanes()[0]))
+        self.assertIsNone(cars[2].get_sensor().get_closest_car())
+        for car in cars:
+            channel.last_to_leave_notification(car)
+        self.assertEqual(cars, list(channel.get_exit_lanes()[cars[0].destination_lane()]))
+        channel.left_screen_notification(cars[1])
+        self.assertIs(cars[0], cars[2].get_sensor().get_closest_car())
+
+    def test_lane_queues_overtake(self):
+        channel = Channel()
+        cars = [random_car(name=name, initial_speed=20, channel=channel, lane=0, intention='s', graphic_flag=False,
+                           create_sensor_flag=True, initial_acceleration_rate=0, pos_y=700 + 30 * name)
+                for name in range(3)]
+        self.assertEqual(cars, list(channel.get_approach_lanes()[0]))
+        # The last car passes the two cars in front of it, lane 0 goes up
+        cars[2].set_y_coordinate(cars[0].get_y_coordinate() - 10)
+        channel.update_lane_order(cars[2])
+        self.assertEqual([cars[2], cars[0], cars[1]], list(channel.get_approach_lanes()[0]))
+        self.assertIsNone(cars[2].get_sensor().get_closest_car())
+        self.assertIs(cars[2], cars[0].get_sensor().get_closest_car())
+        self.assertIs(cars[0], cars[1].get_sensor().get_closest_car())
+        # A car that didn't pass anyone keeps its place
+        channel.update_lane_order(cars[1])
+        self.assertEqual([cars[2], cars[0], cars[1]], list(channel.get_approach_lanes()[0]))
+        # A new car that is ahead of the last car is put in its place
+        new_car = random_car(name=3, initial_speed=20, channel=channel, lane=0, intention='s', graphic_flag=False,
+                             create_sensor_flag=True, initial_acceleration_rate=0,
+                             pos_y=cars[0].get_y_coordinate() + 5)
+        self.assertEqual([cars[2], cars[0], new_car, cars[1]], list(channel.get_approach_lanes()[0]))
+        self.assertIs(cars[0], new_car.get_sensor().get_closest_car())
+        self.assertIs(new_car, cars[1].get_sensor().get_closest_car())
+        # The cars leave in the order they are along the lane, whatever the order of the notifications
+        exit_lane = cars[0].destination_lane()
+        for car in cars:
+            channel.last_to_leave_notification(car)
+        self.assertEqual([cars[2], cars[0], cars[1]], list(channel.get_exit_lanes()[exit_lane]))
+        cars[1].set_y_coordinate(cars[2].get_y_coordinate() - 10)
+        channel.update_lane_order(cars[1])
+        self.assertEqual([cars[1], cars[2], cars[0]], list(channel.get_exit_lanes()[exit_lane]))
+        self.assertIsNone(cars[1].get_sensor().get_closest_car())
+        self.assertIs(cars[1], cars[2].get_sensor().get_closest_car())
+        self.assertIs(cars[2], cars[0].get_sensor().get_closest_car())
@@ -0,0 +1,50 @@
+import unittest
+import os
+import shutil
+import tempfile
+from models.checkpoint import load_checkpoint
+from functions.simulation_functions import run_simulation, read_simulation_file, write_scenario_lines
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint_file = os.path.join(self.directory, 'checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def car_states(self, channel):
+        return [(car.get_name(), car.get_position(), car.get_speed(), car.get_direction(), type(car).__name__,
+                 sorted(car.get_following_cars()), car.get_supervisor_car()) for car in channel.get_cars()]
+
+    # A run resumed from a checkpoint ends like the run that was never stopped
+    def test_resumed_run(self):
+        scenario = os.path.join(self.directory, '100_ticks.jsonl')
+        write_scenario_lines(read_simulation_file(100)['cars'], scenario)
+        for kwargs in [{}, {'scenario': scenario}]:
+            channel = run_simulation(100, graphic_display=False, limit=80, **kwargs)
+            run_simulation(100, graphic_display=False, limit=50, checkpoint_file=self.checkpoint_file,
+                           checkpoint_every=20, **kwargs)
+            self.assertEqual(40, load_checkpoint(self.checkpoint_file).get_tick())
+            resumed_channel = run_simulation(100, graphic_display=False, limit=80,
+                                             resume_from=self.checkpoint_file, **kwargs)
+            self.assertEqual(self.car_states(channel), self.car_states(resumed_channel))
+
+    # The cars reference the same restored objects
+    def test_restored_references(self):
+        run_simulation(100, graphic_display=False, limit=50, checkpoint_file=self.checkpoint_file,
+                       checkpoint_every=40)
+        state = load_checkpoint(self.checkpoint_file)
+        cars = state.get_cars()
+        channel = state.get_channel()
+        # Cars that left the intersection are no longer in the channel
+        self.assertTrue(set(car.get_name() for car in channel.get_cars()) < set(cars))
+        for car in channel.get_cars():
+            self.assertIs(car, cars[car.get_name()])
+            self.assertIs(channel, car.channel)
+            self.assertIsNone(car.image)
+            if car.get_sensor() is not None and car.get_sensor().get_closest_car() is not None:
+                self.assertIs(car.get_sensor().get_closest_car(), cars[car.get_sensor().get_closest_car().get_name()])
+        self.assertTrue(any(car.is_supervisor() for car in cars.values()))
@@ -0,0 +1,51 @@
+import unittest
+import random
+from models.car import *
+from models.channel import Channel
+from models.collisions import CollisionDetector, oriented_box, boxes_overlap
+
+
+class TestCollisions(unittest.TestCase):
+
+    def create_car(self, name, pos_x, pos_y, direction, channel):
+        return Car(name=name, pos_x=pos_x, pos_y=pos_y, direction=direction, lane=0, intention='s', channel=channel,
+                   graphic_flag=False)
+
+    # The broadphase finds the same collisions as checking every pair
+    def test_same_collisions_as_every_pair(self):
+        generator = random.Random(5)
+        channel = Channel()
+        cars = [self.create_car(name, generator.uniform(0, 300), generator.uniform(0, 300),
+                                generator.uniform(0, 360), channel) for name in range(40)]
+        detector = CollisionDetector()
+        for tick in range(5):
+            expected = set()
+            for i in range(len(cars)):
+                for j in range(i + 1, len(cars)):
+                    if boxes_overlap(oriented_box(cars[i]), oriented_box(cars[j])):
+                        expected.add((cars[i].get_name(), cars[j].get_name()))
+            detector.detect(cars, tick)
+            self.assertEqual(expected, detector.get_colliding_pairs())
+            for car in cars:
+                car.set_x_coordinate(car.get_x_coordinate() + generator.uniform(-10, 10))
+                car.new_image()
+
+    # Diagonal cars whose footprints overlap but whose bodies don't
+    def test_rotated_bodies(self):
+        channel = Channel()
+        first_car = self.create_car(1, 100, 100, 45, channel)
+        second_car = self.create_car(2, 100 + first_car.get_rect().w * 0.7, 100 + first_car.get_rect().h * 0.7, 45,
+                                     channel)
+        self.assertTrue(first_car.get_rect().colliderect(second_car.get_rect()))
+        detector = CollisionDetector()
+        self.assertEqual([], detector.detect([first_car, second_car], 0))
+        second_car.set_x_coordinate(110)
+        second_car.set_y_coordinate(110)
+        second_car.new_image()
+        events = detector.detect([first_car, second_car], 1)
+        self.assertEqual(1, len(events))
+        self.assertEqual((1, 2), events[0].get_names())
+        self.assertEqual(1, events[0].get_tick())
+        # Only new collisions are reported
+        self.assertEqual([], detector.detect([first_car, second_car], 2))
+        self.assertEqual(1, len(detector.get_events()))
@@ -0,0 +1,73 @@
+import unittest
+from models.car import *
+from models.channel import Channel
+from models.controller import get_closest_car
+from models.messages import InfoMessage
+from utils.utils import cars_cross_path, collision_points, intersection_matrix, random_car, do_round, get_distance, \
+    inner_intersection_rect
+
+
+class TestConflictTables(unittest.TestCase):
+    def setUp(self):
+        self.intention_list = ['l', 's', 'r']
+        self.lane_to_int_dict = {"l": 0, "s": 1, "r": 2}
+        self.tables = [[[True, True, True], [True, True, True], [True, True, True]],
+                       [[True, True, False], [True, True, False], [False, True, False]],
+                       [[True, True, True], [True, False, False], [True, False, False]],
+                       [[True, True, False], [True, True, True], [False, False, False]]]
+
+    def all_pairs(self):
+        for lane in range(4):
+            for intention in self.intention_list:
+                for other_lane in range(4):
+                    for other_intention in self.intention_list:
+                        yield lane, intention, other_lane, other_intention
+
+    # The precomputed tables give the same results as computing them for each call
+    def test_cross_path_table(self):
+        channel = Channel()
+        for lane, intention, other_lane, other_intention in self.all_pairs():
+            expected = self.tables[(lane - other_lane) % 4][self.lane_to_int_dict[intention]][
+                self.lane_to_int_dict[other_intention]]
+            self.assertEqual(expected, cars_cross_path(lane, intention, other_lane, other_intention))
+            car = random_car(name=1, channel=channel, lane=lane, intention=intention, graphic_flag=False)
+            self.assertEqual(expected, car.cross_path(other_lane, other_intention))
+
+    def test_collision_points_table(self):
+        for lane, intention, other_lane, other_intention in self.all_pairs():
+            first_points = intersection_matrix[lane][intention]
+            follower_points = intersection_matrix[other_lane][other_intention]
+            expected = [p for p in first_points if p in follower_points]
+            self.assertEqual(expected, list(collision_points(car_intention=intention, car_lane=lane,
+                                                             follow_intention=other_intention,
+                                                             follow_lane=other_lane)))
+
+    # The closest conflict is the closest collision point shared with a followed car
+    def test_closest_conflict(self):
+        channel = Channel()
+        cars = []
+        lanes = [0, 2, 1, 2, 3]
+        intentions = ['s', 's', 'r', 's', 'l']
+        for i in range(5):
+            car = Car(name=(i + 1), lane=lanes[i], intention=intentions[i], channel=channel)
+            cars.append(car)
+            do_round(cars, channel)
+            car.enter_intersection()
+        do_round(cars, channel)
+        car = cars[4]
+        car.inner_intersection_rectangle = inner_intersection_rect
+        self.assertTrue(car.get_following_cars())
+        pos_x, pos_y = car.get_position()
+        points = set()
+        for followed in car.get_following_cars().values():
+            points.update(collision_points(car_intention=car.get_intention(), car_lane=car.get_lane(),
+                                           follow_intention=followed['intention'], follow_lane=followed['lane']))
+        closest_car, ticks, closest_point, passed = get_closest_car(car)
+        self.assertEqual(min(get_distance(p[0], p[1], pos_x, pos_y) for p in points),
+                         get_distance(closest_point[0], closest_point[1], pos_x, pos_y))
+        self.assertTrue(closest_point in collision_points(car_intention=car.get_intention(), car_lane=car.get_lane(),
+                                                          follow_intention=closest_car['intention'],
+                                                          follow_lane=closest_car['lane']))
+        followed_car = [other for other in cars if other.get_name() in car.get_following_cars()][0]
+        car.receive_info_message(InfoMessage(followed_car))
+        self.assertEqual((closest_car, ticks, closest_point, passed), get_closest_car(car))
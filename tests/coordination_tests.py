@@ -1,13 +1,14 @@
 import unittest
 from models.car import *
 from models.channel import Channel
-from random import randint, choice
+from models.random_streams import RandomStreams
 from utils.utils import do_round
 
 
 class TestCoordination(unittest.TestCase):
     def setUp(self):
         self.intention_list = ['l', 's', 'r']
+        self.random = RandomStreams(self.id()).get('cars')
         self.ticks = 15
         self.channel = Channel()
         self.test_case = {1: {'lane': 0, 'intention': 's', 'tick': 0},
@@ -19,8 +20,8 @@ class TestCoordination(unittest.TestCase):
     # Car enters intersection, sends NewCarMessage, next tick it is the supervisor
     def test_coordination_ticks(self):
         channel = Channel()
-        car = Car(name=1, lane=randint(0, 3), intention=choice(self.intention_list),
-                  channel=channel, pos_x=randint(0, 3), pos_y=randint(0, 3))
+        car = Car(name=1, lane=self.random.randint(0, 3), intention=self.random.choice(self.intention_list),
+                  channel=channel, pos_x=self.random.randint(0, 3), pos_y=self.random.randint(0, 3))
         self.assertEqual(None, car.get_supervisor_car())
         do_round(cars=[car], channel=channel)
         car.enter_intersection()
@@ -34,10 +35,10 @@ class TestCoordination(unittest.TestCase):
     # it becomes the second at charge in that tick or next, depending on the management of the messages
     def test_second_at_charge_message(self):
         channel = Channel()
-        sup_car = Car(name=1, lane=randint(0, 3), intention=choice(self.intention_list),
-                      channel=channel, pos_x=randint(0, 3), pos_y=randint(0, 3))
-        second_car = Car(name=2, lane=randint(0, 3), intention=choice(self.intention_list),
-                         channel=channel, pos_x=randint(0, 3), pos_y=randint(0, 3))
+        sup_car = Car(name=1, lane=self.random.randint(0, 3), intention=self.random.choice(self.intention_list),
+                      channel=channel, pos_x=self.random.randint(0, 3), pos_y=self.random.randint(0, 3))
+        second_car = Car(name=2, lane=self.random.randint(0, 3), intention=self.random.choice(self.intention_list),
+                         channel=channel, pos_x=self.random.randint(0, 3), pos_y=self.random.randint(0, 3))
         do_round([sup_car], channel)
         sup_car.enter_intersection()
         self.assertEqual(None, sup_car.get_supervisor_car())
@@ -52,12 +53,12 @@ class TestCoordination(unittest.TestCase):
 
     def test_three_car_coordination(self):
         channel = Channel()
-        sup_car = Car(name=1, lane=randint(0, 3), intention=choice(self.intention_list),
-                      channel=channel, pos_x=randint(0, 3), pos_y=randint(0, 3))
-        second_car = Car(name=2, lane=randint(0, 3), intention=choice(self.intention_list),
-                         channel=channel, pos_x=randint(0, 3), pos_y=randint(0, 3))
-        normal_car = Car(name=3, lane=randint(0, 3), intention=choice(self.intention_list),
-                         channel=channel, pos_x=randint(0, 3), pos_y=randint(0, 3))
+        sup_car = Car(name=1, lane=self.random.randint(0, 3), intention=self.random.choice(self.intention_list),
+                      channel=channel, pos_x=self.random.randint(0, 3), pos_y=self.random.randint(0, 3))
+        second_car = Car(name=2, lane=self.random.randint(0, 3), intention=self.random.choice(self.intention_list),
+                         channel=channel, pos_x=self.random.randint(0, 3), pos_y=self.random.randint(0, 3))
+        normal_car = Car(name=3, lane=self.random.randint(0, 3), intention=self.random.choice(self.intention_list),
+                         channel=channel, pos_x=self.random.randint(0, 3), pos_y=self.random.randint(0, 3))
         do_round([sup_car], channel)
         sup_car.enter_intersection()
         do_round([sup_car, second_car], channel)
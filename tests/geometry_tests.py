@@ -0,0 +1,80 @@
+import unittest
+from models.car import *
+from models.channel import Channel
+from models.geometry import Rect, car_footprint
+from utils.utils import do_round, random_car
+import pygame
+
+
+class TestGeometry(unittest.TestCase):
+    def setUp(self):
+        self.full_intersection_rect = Rect(0, 0, 768, 768)
+        self.inner_intersection_rect = Rect(280, 280, 210, 210)
+
+    # The footprint has to be the same rect pygame gives to the rotated and scaled image
+    def test_footprint_matches_pygame(self):
+        car_image = pygame.image.load(images_directory + "car.png")
+        for direction in [0, 90, 180, 270, 45, 12.3, -3.7, 359.9, 90.00001, 376.6333805118129]:
+            for position in [(437.5, 868.9), (-100.5, 332.5), (0.5, -0.5)]:
+                rotated_image = pygame.transform.rotate(car_image, direction)
+                rotated_image = pygame.transform.scale(rotated_image, (
+                    int(rotated_image.get_rect().w * Car.image_scale_rate),
+                    int(rotated_image.get_rect().h * Car.image_scale_rate)))
+                screen_car = rotated_image.get_rect()
+                screen_car.center = position
+                footprint = car_footprint(position[0], position[1], direction, Car.image_scale_rate)
+                self.assertEqual(tuple(screen_car), tuple(footprint))
+
+    def test_rect_methods(self):
+        pygame_rect = pygame.Rect(280, 280, 210, 210)
+        for x, y, w, h in [(300, 300, 10, 10), (275, 300, 10, 10), (270, 300, 10, 10), (480, 480, 10, 10),
+                           (490, 300, 10, 10), (300, 300, 0, 10)]:
+            rect = Rect(x, y, w, h)
+            other = pygame.Rect(x, y, w, h)
+            self.assertEqual(pygame_rect.colliderect(other), self.inner_intersection_rect.colliderect(rect))
+            self.assertEqual(pygame_rect.contains(other), self.inner_intersection_rect.contains(rect))
+            self.assertEqual(pygame_rect.contains(other), pygame_rect.contains(rect))
+
+    # A headless car has no image but moves and sees the intersection as a car that is drawn
+    def test_headless_car(self):
+        channel = Channel()
+        headless_car = random_car(name=1, initial_speed=20, full_intersection=self.full_intersection_rect,
+                                  channel=channel, inner_intersection=self.inner_intersection_rect,
+                                  lane=1, intention='l', graphic_flag=False)
+        graphic_channel = Channel()
+        graphic_car = random_car(name=1, initial_speed=20, full_intersection=self.full_intersection_rect,
+                                 channel=graphic_channel, inner_intersection=self.inner_intersection_rect,
+                                 lane=1, intention='l', initial_acceleration_rate=headless_car.get_acceleration())
+        self.assertIsNone(headless_car.image)
+        self.assertIsNone(headless_car.rotated_image)
+        for _ in range(150):
+            do_round([headless_car], channel)
+            do_round([graphic_car], graphic_channel)
+            self.assertEqual(tuple(graphic_car.get_rect()), tuple(headless_car.get_rect()))
+            self.assertEqual(graphic_car.get_car_length(), headless_car.get_car_length())
+            self.assertEqual(graphic_car.inside_full_intersection(), headless_car.inside_full_intersection())
+            self.assertEqual(graphic_car.inside_inner_intersection(), headless_car.inside_inner_intersection())
+        self.assertIsNone(headless_car.rotated_image)
+
+
+class TestSpriteAtlas(unittest.TestCase):
+
+    # Rotated images are shared by bucket and the odd angles are evicted when there are too many of them
+    def test_rotated_images_cache(self):
+        from models.sprites import SpriteAtlas
+        atlas = SpriteAtlas(Car.image_scale_rate, max_rotations=2)
+        self.assertIs(atlas.get_rotated_image(90), atlas.get_rotated_image(90.2))
+        self.assertIs(atlas.get_rotated_image(0), atlas.get_rotated_image(360))
+        first = atlas.get_rotated_image(10)
+        atlas.get_rotated_image(20)
+        self.assertIs(first, atlas.get_rotated_image(10.4))
+        atlas.get_rotated_image(30)
+        self.assertEqual([10, 30], list(atlas.rotations.keys()))
+        self.assertEqual(len(atlas.pinned), 4)
+
+    def test_car_uses_shared_images(self):
+        channel = Channel()
+        first_car = random_car(name=1, initial_speed=20, channel=channel, lane=0, intention='s')
+        second_car = random_car(name=2, initial_speed=20, channel=channel, lane=0, intention='s')
+        self.assertIs(first_car.rotated_image, second_car.rotated_image)
+        self.assertEqual(first_car.get_rect().center, first_car.get_image_rect().center)
@@ -0,0 +1,84 @@
+import unittest
+import random
+from models.graph import CoordinationGraph
+from models.node import Node
+from utils.utils import cars_cross_path
+
+
+class TestCoordinationGraph(unittest.TestCase):
+
+    # The follow lists have to be the ones the search over the plain dictionary of Nodes used to give
+    def test_follow_lists_match_dictionary_search(self):
+        def dictionary_search(graph, leaf_cars, lane, intention):
+            follow_list = []
+            visited = set()
+            to_visit = [graph[car] for car in leaf_cars]
+            while to_visit:
+                node = to_visit.pop(0)
+                if node.get_name() not in visited:
+                    visited.add(node.get_name())
+                    if cars_cross_path(lane, intention, node.get_lane(), node.get_intention()):
+                        follow_list.append(node.get_name())
+                        for car in node.get_follow_list():
+                            visited.add(car)
+                    else:
+                        to_visit = to_visit + [graph[car] for car in graph[node.get_name()].get_follow_list()]
+            return follow_list
+
+        generator = random.Random(3)
+        graph = CoordinationGraph()
+        dictionary = {}
+        leaf_cars = set()
+        for name in range(60):
+            lane = generator.randint(0, 3)
+            intention = generator.choice(['l', 's', 'r'])
+            follow_list = dictionary_search(dictionary, leaf_cars, lane, intention)
+            self.assertEqual(follow_list, graph.find_follow_list(lane, intention))
+            graph.add_node(name=name, lane=lane, intention=intention, follow_list=follow_list)
+            dictionary[name] = Node(name=name, follow_list=follow_list, lane=lane, intention=intention)
+            for car in follow_list:
+                leaf_cars.discard(car)
+            leaf_cars.add(name)
+            self.assertEqual(leaf_cars, graph.get_leaf_cars())
+        self.assertEqual(dictionary, graph)
+
+    def test_remove_node(self):
+        graph = CoordinationGraph()
+        graph.add_node(name=1, lane=0, intention='s', follow_list=[])
+        graph.add_node(name=2, lane=1, intention='s', follow_list=[1])
+        graph.add_node(name=3, lane=2, intention='s', follow_list=[2])
+        graph.add_node(name=4, lane=0, intention='l', follow_list=[2])
+        self.assertEqual({3, 4}, graph.get_leaf_cars())
+        graph.remove_node(2)
+        self.assertTrue(2 not in graph)
+        for node in graph.values():
+            self.assertTrue(2 not in node.get_follow_list())
+        # Car 1 lost its only follower, so the next car has to be checked against it
+        self.assertEqual({1, 3, 4}, graph.get_leaf_cars())
+        graph.remove_node(4)
+        self.assertEqual({1, 3}, graph.get_leaf_cars())
+
+    def test_build_from_dictionary(self):
+        nodes = {1: Node(name=1, follow_list=[], lane=0, intention='s'),
+                 2: Node(name=2, follow_list=[1], lane=1, intention='r'),
+                 3: Node(name=3, follow_list=[], lane=3, intention='r')}
+        graph = CoordinationGraph(nodes)
+        self.assertEqual(nodes, graph)
+        self.assertEqual({2, 3}, graph.get_leaf_cars())
+        self.assertEqual({2}, graph.get_followers(1))
+
+    # A snapshot shares everything until one of the graphs changes, then they become independent
+    def test_snapshot_copy_on_write(self):
+        graph = CoordinationGraph()
+        graph.add_node(name=1, lane=0, intention='s', follow_list=[])
+        graph.add_node(name=2, lane=1, intention='s', follow_list=[1])
+        snapshot = graph.snapshot()
+        self.assertIs(graph.get_nodes(), snapshot.get_nodes())
+        snapshot.add_node(name=3, lane=2, intention='s', follow_list=[2])
+        self.assertTrue(3 in snapshot and 3 not in graph)
+        self.assertEqual({2}, graph.get_leaf_cars())
+        self.assertIs(graph[1], snapshot[1])
+        graph.remove_node(1)
+        self.assertEqual([1], list(snapshot[2].get_follow_list()))
+        self.assertEqual([], list(graph[2].get_follow_list()))
+        self.assertEqual({2, 3}, set(snapshot.get_followers(1)) | set(snapshot.get_followers(2)))
@@ -3,7 +3,7 @@ from models.car import *
 from models.sensor import ProximitySensor
 from models.controller import accelerating_controller
 from models.channel import Channel
-from random import randint, choice
+from models.random_streams import RandomStreams
 from utils.utils import do_round, random_car, create_sensor
 import pygame
 
@@ -14,6 +14,7 @@ import pygame
 # outside_initial_positions = [(435, 868, 0, 0), (868, 345, 90, 1), (345, -98, 180, 2), (-98, 435, 270, 3)]
 class TestMovement(unittest.TestCase):
     def setUp(self):
+        self.streams = RandomStreams(self.id())
         self.full_intersection_rect = pygame.Rect(0, 0, 768, 768)
         self.inner_intersection_rect = pygame.Rect(280, 280, 210, 210)
 
@@ -28,12 +29,13 @@ class TestMovement(unittest.TestCase):
                                pos_y=before_intersection_y, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
                                inner_intersection=self.inner_intersection_rect, lane=0, intention='s',
-                               create_sensor_flag=True, controller=accelerating_controller)
+                               create_sensor_flag=True, controller=accelerating_controller, streams=self.streams)
         do_round([first_car], channel)
         self.assertEqual(first_car, channel.get_recent_entering()[0])
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=0, intention='s', create_sensor_flag=True, controller=accelerating_controller)
+                                  lane=0, intention='s', create_sensor_flag=True, controller=accelerating_controller,
+                                  streams=self.streams)
         do_round([first_car, follower_car], channel)
         for i in range(1000):
             do_round([first_car, follower_car], channel)
@@ -0,0 +1,82 @@
+import unittest
+from models.car import *
+from models.channel import Channel
+from models.paths import PathTable, get_path_table
+from models.messages import InfoMessage
+from functions.car_functions import next_direction, next_position, path_distance_to_point
+from utils.utils import outside_initial_positions, inner_intersection_rect, full_intersection_rect, \
+    entry_collision_points, intersection_matrix
+
+
+class TestPaths(unittest.TestCase):
+
+    # The points of the table are the positions of a car that moves the step of the table in every tick
+    def test_same_path_as_turning(self):
+        for lane in range(4):
+            for intention in ['l', 's', 'r']:
+                pos_x, pos_y, direction, lane = outside_initial_positions[lane]
+                table = PathTable(lane, intention, inner_intersection_rect, pos_x, pos_y, direction, step=2,
+                                  length=400)
+                origin_x, origin_y, origin_direction = pos_x, pos_y, direction
+                for i in range(1, len(table.xs)):
+                    direction = next_direction(10, direction, origin_direction, lane, intention,
+                                               inner_intersection_rect, pos_x, pos_y, origin_x, origin_y)
+                    pos_x, pos_y = next_position(10, direction, pos_x, pos_y)
+                    self.assertEqual((pos_x, pos_y, direction), table.position_at(table.distances[i]))
+
+    # Before the turns the path is straight, so the distances are exact
+    def test_straight_distances(self):
+        for lane in range(4):
+            pos_x, pos_y, direction, lane = outside_initial_positions[lane]
+            table = get_path_table(lane, 'l', inner_intersection_rect, pos_x, pos_y, direction)
+            self.assertIs(table, get_path_table(lane, 'l', inner_intersection_rect, pos_x, pos_y, direction))
+            entry = entry_collision_points[lane]
+            expected = abs(entry[0] - pos_x) + abs(entry[1] - pos_y)
+            self.assertAlmostEqual(expected, table.distance_to_point(0, entry), delta=table.step)
+            self.assertAlmostEqual(expected - 30, table.distance_to_point(30, entry), delta=table.step)
+            # Every collision point of the path is found in order
+            points = intersection_matrix[lane]['l'][:2]
+            self.assertTrue(table.distance_to_point(0, points[0]) < table.distance_to_point(0, points[1]))
+
+    # A car that follows a path takes its position and direction from the table
+    def test_path_following_car(self):
+        pos_x, pos_y, direction, lane = outside_initial_positions[1]
+        car = Car(name=1, pos_x=pos_x, pos_y=pos_y, direction=direction, lane=lane, intention='r',
+                  channel=Channel(), absolute_speed=10, acceleration_rate=0, graphic_flag=False,
+                  inner_intersection=inner_intersection_rect, full_intersection=full_intersection_rect,
+                  path_following=True)
+        turning_car = Car(name=2, pos_x=pos_x, pos_y=pos_y, direction=direction, lane=lane, intention='r',
+                          channel=Channel(), absolute_speed=10, acceleration_rate=0, graphic_flag=False,
+                          inner_intersection=inner_intersection_rect, full_intersection=full_intersection_rect)
+        self.assertIsNotNone(car.get_path())
+        self.assertIsNone(turning_car.get_path())
+        for tick in range(300):
+            car.move_control()
+            turning_car.move_control()
+            # Both cars go through the same curve
+            self.assertAlmostEqual(turning_car.get_x_coordinate(), car.get_x_coordinate(), delta=4)
+            self.assertAlmostEqual(turning_car.get_y_coordinate(), car.get_y_coordinate(), delta=4)
+        self.assertAlmostEqual(300 * 10 * 0.1 * 2, car.get_path_position())
+        self.assertEqual(car.get_path().position_at(car.get_path_position()),
+                         (car.get_x_coordinate(), car.get_y_coordinate(), car.get_direction()))
+        self.assertAlmostEqual(direction - 90, car.get_direction(), delta=1)
+
+    # The info messages carry the position along the path, the followers don't have to project the car on it
+    def test_path_position_in_info_message(self):
+        pos_x, pos_y, direction, lane = outside_initial_positions[0]
+        car = Car(name=1, pos_x=pos_x, pos_y=pos_y, direction=direction, lane=lane, intention='l',
+                  channel=Channel(), absolute_speed=10, acceleration_rate=0, graphic_flag=False,
+                  inner_intersection=inner_intersection_rect, full_intersection=full_intersection_rect,
+                  path_following=True)
+        for tick in range(100):
+            car.move_control()
+        message = InfoMessage(car)
+        self.assertEqual(car.get_path_position(), message.get_sender_path_position())
+        point = intersection_matrix[lane]['l'][1]
+        known = path_distance_to_point(point, pos_x, pos_y, pos_x, pos_y, direction, lane, 'l',
+                                       inner_intersection_rect, path_position=message.get_sender_path_position())
+        projected = path_distance_to_point(point, car.get_x_coordinate(), car.get_y_coordinate(), pos_x, pos_y,
+                                           direction, lane, 'l', inner_intersection_rect)
+        self.assertEqual(car.path_distance_to_point(point), known)
+        self.assertAlmostEqual(known, projected, delta=car.get_path().step)
+        self.assertIsNone(InfoMessage(Car(name=2, graphic_flag=False)).get_sender_path_position())
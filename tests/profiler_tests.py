@@ -0,0 +1,54 @@
+import unittest
+from models.profiler import PhaseProfiler, round_phases
+from functions.simulation_functions import run_simulation
+from models.channel import Channel
+from utils.utils import random_car
+
+
+class TestProfiler(unittest.TestCase):
+
+    def car_states(self, channel):
+        return [(car.get_name(), car.get_position(), car.get_speed(), car.get_direction(),
+                 sorted(car.get_following_cars())) for car in channel.get_cars()]
+
+    # A profiled run ends like the run without profiler
+    def test_same_run(self):
+        for vectorized in [False, True]:
+            channel = run_simulation(1000, graphic_display=False, limit=80, vectorized=vectorized)
+            profiler = PhaseProfiler()
+            profiled_channel = run_simulation(1000, graphic_display=False, limit=80, vectorized=vectorized,
+                                              profiler=profiler)
+            self.assertEqual(self.car_states(channel), self.car_states(profiled_channel))
+            self.assertEqual(list(range(80)), profiler.get_ticks())
+            for phase in round_phases:
+                self.assertEqual(80, len(profiler.get_series()[phase]))
+                self.assertAlmostEqual(sum(profiler.get_series()[phase]), profiler.get_totals()[phase])
+            self.assertTrue(profiler.get_totals()['controller'] > 0)
+            shares = sum(row['share'] for row in profiler.summary())
+            self.assertAlmostEqual(1.0, shares)
+
+    # Only the ticks where the profiler is enabled are measured
+    def test_switch(self):
+        profiler = PhaseProfiler(enabled=False)
+
+        # Enables the profiler for the ticks 20 to 29
+        class SwitchingProfiler(PhaseProfiler):
+            def set_tick(self, tick):
+                super(SwitchingProfiler, self).set_tick(tick)
+                if tick == 20:
+                    self.enable()
+                elif tick == 30:
+                    self.disable()
+        run_simulation(100, graphic_display=False, limit=50, profiler=profiler)
+        self.assertEqual([], profiler.get_ticks())
+        profiler = SwitchingProfiler(enabled=False)
+        run_simulation(100, graphic_display=False, limit=50, profiler=profiler)
+        self.assertEqual(list(range(20, 30)), profiler.get_ticks())
+        self.assertEqual(len(round_phases) + 1, len(profiler.format_summary().splitlines()) - 1)
+
+    # The car calls the timer at the end of each of its phases, in the order of the tick
+    def test_car_phases(self):
+        phases = []
+        car = random_car(name=1, channel=Channel(), lane=0, intention='s', graphic_flag=False)
+        car.update(phases.append)
+        self.assertEqual(round_phases[1:], phases)
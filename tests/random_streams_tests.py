@@ -0,0 +1,50 @@
+import unittest
+import os
+import random
+import tempfile
+from models.channel import Channel
+from models.random_streams import RandomStreams
+from models.scenario import BinaryScenario
+from functions.simulation_functions import next_time, generate_simulation_file
+from utils.utils import random_car
+
+
+class TestRandomStreams(unittest.TestCase):
+
+    def car_values(self, streams, amount):
+        channel = Channel()
+        cars = [random_car(name=name, channel=channel, graphic_flag=False, streams=streams) for name in range(amount)]
+        return [(car.get_lane(), car.get_intention(), car.get_speed(), car.get_acceleration()) for car in cars]
+
+    # The same seed gives the same cars, whatever is drawn from the random module or from other streams
+    def test_same_seed_same_cars(self):
+        cars = self.car_values(RandomStreams(7), 20)
+        streams = RandomStreams(7)
+        streams.get('arrivals').random()
+        next_time(1, streams.get('arrivals'))
+        random.random()
+        self.assertEqual(cars, self.car_values(streams, 20))
+        self.assertNotEqual(cars, self.car_values(RandomStreams(8), 20))
+
+    # Each stream only depends on its name, drawing from one doesn't move the others
+    def test_independent_streams(self):
+        streams = RandomStreams('run')
+        speeds = [streams.get('speeds').random() for _ in range(5)]
+        other_streams = RandomStreams('run')
+        [other_streams.get('lanes').random() for _ in range(100)]
+        self.assertEqual(speeds, [other_streams.get('speeds').random() for _ in range(5)])
+        self.assertEqual(RandomStreams('run').spawn('worker 3').get('speeds').random(),
+                         RandomStreams('run').spawn('worker 3').get('speeds').random())
+        self.assertNotEqual(RandomStreams('run').spawn('worker 3').get_seed(),
+                            RandomStreams('run').spawn('worker 4').get_seed())
+
+    def test_generated_scenario(self):
+        directory = tempfile.mkdtemp()
+        file_names = [os.path.join(directory, str(index) + '.bin') for index in range(2)]
+        for file_name in file_names:
+            generate_simulation_file(file_name, 500, demand=0.5, streams=RandomStreams(11))
+        records = [BinaryScenario(file_name).get_records().tolist() for file_name in file_names]
+        self.assertEqual(records[0], records[1])
+        for file_name in file_names:
+            os.remove(file_name)
+        os.rmdir(directory)
@@ -0,0 +1,50 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from models.recorder import TraceRecorder, load_trace, message_types, role_codes
+from functions.simulation_functions import run_simulation
+
+
+class TestRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # The trace has the state of every car in every tick and the messages delivered, split in chunks
+    def test_recorded_simulation(self):
+        recorder = TraceRecorder(self.directory, chunk_ticks=25)
+        channel = run_simulation(100, graphic_display=False, limit=60, recorder=recorder)
+        self.assertEqual([(0, 24, 'chunk_000000.npz'), (25, 49, 'chunk_000001.npz'), (50, 59, 'chunk_000002.npz')],
+                         recorder.get_chunks())
+        trace = load_trace(self.directory)
+        cars = trace['cars']
+        self.assertEqual(sorted(set(cars['tick'].tolist())), list(range(len(set(cars['tick'].tolist())))))
+        last_tick = cars['tick'] == 59
+        for car in channel.get_cars():
+            row = np.nonzero(last_tick & (cars['name'] == car.get_name()))[0]
+            self.assertEqual(1, len(row))
+            self.assertAlmostEqual(car.get_x_coordinate(), cars['pos_x'][row[0]], places=3)
+            self.assertAlmostEqual(car.get_speed(), cars['speed'][row[0]], places=3)
+            self.assertEqual(car.get_controller().__name__, trace['controllers'][cars['controller'][row[0]]])
+        self.assertTrue(role_codes['supervisor'] in cars['role'])
+        messages = trace['messages']
+        self.assertTrue(len(messages['tick']) > 0)
+        self.assertTrue(message_types.index('InfoMessage') in messages['type'])
+        self.assertTrue((messages['tick'][1:] >= messages['tick'][:-1]).all())
+
+        # Only the chunks of the range are read
+        partial = load_trace(self.directory, first_tick=30, last_tick=40)
+        self.assertEqual(list(range(30, 41)), sorted(set(partial['cars']['tick'].tolist())))
+        self.assertEqual(int(np.sum((cars['tick'] >= 30) & (cars['tick'] <= 40))), len(partial['cars']['tick']))
+
+    def test_writer_errors(self):
+        recorder = TraceRecorder(os.path.join(self.directory, 'trace'), chunk_ticks=1)
+        shutil.rmtree(recorder.get_directory())
+        recorder.record_tick(0, [])
+        recorder.record_tick(1, [])
+        self.assertRaises(OSError, recorder.close)
@@ -0,0 +1,40 @@
+import unittest
+import shutil
+import tempfile
+from models.recorder import TraceRecorder, load_trace
+from models.replay import TraceReplay, playback_tick
+from functions.simulation_functions import run_simulation
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        run_simulation(100, graphic_display=False, limit=60,
+                       recorder=TraceRecorder(self.directory, chunk_ticks=20))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # Seeking to any tick, in any order, gives the rows of that tick
+    def test_frames(self):
+        trace = load_trace(self.directory)
+        replay = TraceReplay(self.directory, cached_chunks=1)
+        self.assertEqual(0, replay.get_first_tick())
+        self.assertEqual(59, replay.get_last_tick())
+        for tick in [45, 3, 59, 20, 19, 0]:
+            frame = replay.frame(tick)
+            rows = trace['cars']['tick'] == tick
+            for column in ['name', 'pos_x', 'pos_y', 'direction', 'role']:
+                self.assertEqual(trace['cars'][column][rows].tolist(), frame[column].tolist())
+            rows = trace['messages']['tick'] == tick
+            self.assertEqual(trace['messages']['sender'][rows].tolist(), replay.messages(tick)['sender'].tolist())
+        self.assertEqual(1, len(replay.loaded))
+        self.assertEqual(0, len(replay.frame(60)['name']))
+        self.assertEqual(0, len(replay.frame(-1)['name']))
+
+    def test_playback_tick(self):
+        # At 30 ticks per second, a frame that takes 0.1 seconds skips 3 ticks
+        self.assertAlmostEqual(13, playback_tick(10, 0.1, 30, 0, 59))
+        self.assertEqual(59, playback_tick(50, 1, 30, 0, 59))
+        self.assertEqual(0, playback_tick(10, 1, -30, 0, 59))
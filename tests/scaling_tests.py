@@ -0,0 +1,39 @@
+import unittest
+import os
+import shutil
+import tempfile
+from benchmarks.scaling import scaling_run, fit_complexity, phases
+from functions.simulation_functions import read_simulation_file, write_scenario_lines
+
+
+class TestScaling(unittest.TestCase):
+
+    # The model with the same shape as the times fits best
+    def test_fit_complexity(self):
+        cars = list(range(1, 40)) * 2
+        fit = fit_complexity(cars, [0.001 + 0.0002 * amount * amount for amount in cars])
+        self.assertEqual('O(N^2)', fit['best'])
+        self.assertAlmostEqual(1.0, fit['models']['O(N^2)']['r_squared'])
+        self.assertEqual(39, fit['points'])
+        fit = fit_complexity(cars, [0.0003 * amount for amount in cars])
+        self.assertEqual('O(N)', fit['best'])
+        self.assertAlmostEqual(1.0, fit['exponent'])
+
+    # Every tick is measured and the phases are part of the time of the tick
+    def test_scaling_run(self):
+        directory = tempfile.mkdtemp()
+        try:
+            scenario = os.path.join(directory, '100_ticks.jsonl')
+            write_scenario_lines(read_simulation_file(100)['cars'], scenario)
+            series, profiler, error = scaling_run(scenario, 100, car_limit=15)
+        finally:
+            shutil.rmtree(directory)
+        self.assertIsNone(error)
+        self.assertEqual(100, len(series['wall_time']))
+        self.assertEqual(list(range(100)), profiler.get_ticks())
+        for tick in range(100):
+            phases_time = sum(series[phase][tick] for phase in phases)
+            self.assertTrue(0 <= phases_time <= series['wall_time'][tick])
+            self.assertTrue(series['concurrent_cars'][tick] <= series['cars'][tick])
+        self.assertTrue(sum(series['messages']) > 0)
+        self.assertTrue(max(series['graph_size']) > 1)
@@ -0,0 +1,136 @@
+import unittest
+import os
+import tempfile
+from models.car import *
+from models.scenario import ScenarioReader, SpawnQueues, BinaryScenario, open_scenario, write_binary_scenario, \
+    json_to_binary_scenario, binary_to_json_scenario
+from functions.simulation_functions import read_simulation_file, write_scenario_lines, run_simulation, \
+    generate_simulation_file
+from utils.utils import outside_initial_positions
+
+
+class TestScenario(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, '100_ticks.jsonl')
+        self.cars = read_simulation_file(100)['cars']
+        write_scenario_lines(self.cars, self.file_name)
+
+    def tearDown(self):
+        for file_name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, file_name))
+        os.rmdir(self.directory)
+
+    def test_read_lines(self):
+        with ScenarioReader(self.file_name) as reader:
+            self.assertEqual(self.cars[:3], [next(reader) for _ in range(3)])
+            position = reader.tell()
+            rest = list(reader)
+            self.assertEqual(self.cars[3:], rest)
+            reader.seek(position)
+            self.assertEqual(self.cars[3], next(reader))
+
+    def test_unordered_file(self):
+        file_name = os.path.join(self.directory, 'unordered.jsonl')
+        write_scenario_lines([self.cars[1], self.cars[0]], file_name)
+        with ScenarioReader(file_name) as reader:
+            next(reader)
+            self.assertRaises(ValueError, next, reader)
+
+    # The cars of a lane are created in order and only when the last car of the lane left room for them
+    def test_spawn_queues(self):
+        cars = []
+        for name, lane in enumerate([0, 0, 1, 0]):
+            pos_x, pos_y, direction, lane = outside_initial_positions[lane]
+            cars.append({'name': name, 'lane': lane, 'creation_time': name // 2,
+                         'initial_coordinates': {'x_coordinate': pos_x, 'y_coordinate': pos_y,
+                                                 'direction': direction}})
+        spawn_queues = SpawnQueues(cars)
+        recent_entering = {0: None, 1: None, 2: None, 3: None}
+        spawn_queues.arrive(0)
+        self.assertEqual(2, len(spawn_queues))
+        self.assertIs(cars[0], spawn_queues.pop_ready(recent_entering))
+        pos_x, pos_y, direction, lane = outside_initial_positions[0]
+        recent_entering[0] = Car(name=0, pos_x=pos_x, pos_y=pos_y, direction=direction, lane=0, graphic_flag=False)
+        self.assertIsNone(spawn_queues.pop_ready(recent_entering))
+        spawn_queues.arrive(1)
+        self.assertIs(cars[2], spawn_queues.pop_ready(recent_entering))
+        recent_entering[0].set_y_coordinate(pos_y - 100)
+        recent_entering[0].new_image()
+        self.assertIs(cars[1], spawn_queues.pop_ready(recent_entering))
+        self.assertIs(cars[3], spawn_queues.pop_ready(recent_entering))
+        self.assertTrue(spawn_queues.is_exhausted())
+
+    # Streaming the scenario creates the same cars as reading it whole
+    def test_streamed_simulation(self):
+        channel = run_simulation(100, graphic_display=False, limit=60)
+        streamed_channel = run_simulation(100, graphic_display=False, limit=60, scenario=self.file_name)
+        self.assertEqual([car.get_name() for car in channel.get_cars()],
+                         [car.get_name() for car in streamed_channel.get_cars()])
+        self.assertEqual([car.get_position() for car in channel.get_cars()],
+                         [car.get_position() for car in streamed_channel.get_cars()])
+
+    def test_binary_scenario(self):
+        binary_file_name = os.path.join(self.directory, '100_ticks.bin')
+        self.assertEqual(len(self.cars), json_to_binary_scenario(self.file_name, binary_file_name))
+        scenario = open_scenario(binary_file_name)
+        self.assertTrue(isinstance(scenario, BinaryScenario))
+        self.assertEqual(len(self.cars), len(scenario))
+        for car, binary_car in zip(self.cars, scenario):
+            self.assertEqual(int(car['name']), binary_car['name'])
+            self.assertEqual(int(car['lane']), binary_car['lane'])
+            self.assertEqual(car['intention'], binary_car['intention'])
+            self.assertEqual(int(car['creation_time']), binary_car['creation_time'])
+            for key, value in car['initial_coordinates'].items():
+                self.assertEqual(float(value), binary_car['initial_coordinates'][key])
+        # Back to json and to binary again gives the same records
+        json_file_name = os.path.join(self.directory, '100_ticks')
+        binary_to_json_scenario(binary_file_name, json_file_name)
+        other_binary_file_name = os.path.join(self.directory, 'other.bin')
+        json_to_binary_scenario(json_file_name, other_binary_file_name)
+        self.assertEqual(scenario.get_records().tolist(), BinaryScenario(other_binary_file_name).get_records().tolist())
+        # Written in several chunks
+        chunked_file_name = os.path.join(self.directory, 'chunked.bin')
+        write_binary_scenario(self.cars, chunked_file_name, chunk_size=7)
+        self.assertEqual(scenario.get_records().tolist(), BinaryScenario(chunked_file_name).get_records().tolist())
+        self.assertRaises(ValueError, BinaryScenario, self.file_name)
+        with BinaryScenario(chunked_file_name) as chunked_scenario:
+            self.assertEqual(len(self.cars), len(chunked_scenario))
+        self.assertTrue(chunked_scenario.is_closed())
+        self.assertRaises(ValueError, len, chunked_scenario)
+        # Files that were cut, or that have more bytes than the cars of their header, aren't read
+        with open(chunked_file_name, 'rb') as chunked_file:
+            data = chunked_file.read()
+        broken_file_name = os.path.join(self.directory, 'broken.bin')
+        for broken_data in [data[:-1], data[:10], data + b'0']:
+            with open(broken_file_name, 'wb') as broken_file:
+                broken_file.write(broken_data)
+            self.assertRaises(ValueError, BinaryScenario, broken_file_name)
+
+        channel = run_simulation(100, graphic_display=False, limit=60)
+        binary_channel = run_simulation(100, graphic_display=False, limit=60, scenario=binary_file_name)
+        self.assertEqual([car.get_position() for car in channel.get_cars()],
+                         [car.get_position() for car in binary_channel.get_cars()])
+
+    def test_generated_scenario(self):
+        binary_file_name = os.path.join(self.directory, 'generated.bin')
+        # Only cars from lane 0 to lane 2, going straight, and no demand in odd ticks
+        od_matrix = [[0, 0, 1, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
+        count = generate_simulation_file(binary_file_name, 1000, demand=[2, 0], od_matrix=od_matrix, seed=3,
+                                         chunk_ticks=300)
+        records = BinaryScenario(binary_file_name).get_records()
+        self.assertEqual(count, len(records))
+        self.assertTrue(800 < count < 1200)
+        self.assertEqual(list(range(count)), records['name'].tolist())
+        self.assertEqual({0}, set(records['lane'].tolist()))
+        self.assertEqual({'s'}, set(car['intention'] for car in BinaryScenario(binary_file_name)))
+        self.assertEqual({0}, set((records['creation_time'] % 2).tolist()))
+        self.assertTrue((records['creation_time'][1:] >= records['creation_time'][:-1]).all())
+        # Same seed, same scenario in both formats
+        lines_file_name = os.path.join(self.directory, 'generated.jsonl')
+        generate_simulation_file(lines_file_name, 1000, demand=[2, 0], od_matrix=od_matrix, seed=3)
+        with ScenarioReader(lines_file_name) as reader:
+            self.assertEqual(list(BinaryScenario(binary_file_name)), list(reader))
+        self.assertRaises(ValueError, generate_simulation_file, binary_file_name, 10, od_matrix=[[1, 0], [0, 1]])
+        run_simulation(1000, graphic_display=False, limit=30, scenario=binary_file_name)
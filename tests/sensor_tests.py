@@ -3,7 +3,7 @@ from models.car import *
 from models.sensor import ProximitySensor
 from models.sensor import ProximitySensor
 from models.channel import Channel
-from random import randint, choice
+from models.random_streams import RandomStreams
 from utils.utils import do_round, random_car
 import pygame
 
@@ -14,6 +14,7 @@ import pygame
 # outside_initial_positions = [(435, 868, 0, 0), (868, 345, 90, 1), (345, -100, 180, 2), (-100, 435, 270, 3)]
 class TestSensor(unittest.TestCase):
     def setUp(self):
+        self.streams = RandomStreams(self.id())
         self.full_intersection_rect = pygame.Rect(0, 0, 768, 768)
         self.inner_intersection_rect = pygame.Rect(280, 280, 210, 210)
 
@@ -26,10 +27,11 @@ class TestSensor(unittest.TestCase):
         first_car = random_car(name=1,
                                pos_y=before_intersection_y, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
-                               inner_intersection=self.inner_intersection_rect, lane=0, intention='s')
+                               inner_intersection=self.inner_intersection_rect, lane=0, intention='s',
+                               streams=self.streams)
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=0, intention='s')
+                                  lane=0, intention='s', streams=self.streams)
         sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
         follower_car.set_sensor(sensor)
         self.assertEqual(30, sensor.ticks_to_crash())
@@ -39,10 +41,11 @@ class TestSensor(unittest.TestCase):
         before_intersection_x = self.inner_intersection_rect.left + self.inner_intersection_rect.width + 30
         first_car = random_car(name=1, pos_x=before_intersection_x, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
-                               inner_intersection=self.inner_intersection_rect, lane=1, intention='s')
+                               inner_intersection=self.inner_intersection_rect, lane=1, intention='s',
+                               streams=self.streams)
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=1, intention='s')
+                                  lane=1, intention='s', streams=self.streams)
         sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
         follower_car.set_sensor(sensor)
         self.assertEqual(30, sensor.ticks_to_crash())
@@ -54,10 +57,11 @@ class TestSensor(unittest.TestCase):
         first_car = random_car(name=1, pos_x=before_intersection_x,
                                pos_y=before_intersection_y, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
-                               inner_intersection=self.inner_intersection_rect, lane=2, intention='s')
+                               inner_intersection=self.inner_intersection_rect, lane=2, intention='s',
+                               streams=self.streams)
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=2, intention='s')
+                                  lane=2, intention='s', streams=self.streams)
         sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
         follower_car.set_sensor(sensor)
         self.assertEqual(31, sensor.ticks_to_crash())
@@ -67,10 +71,11 @@ class TestSensor(unittest.TestCase):
         before_intersection_x = self.inner_intersection_rect.left - 30
         first_car = random_car(name=1, pos_x=before_intersection_x, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
-                               inner_intersection=self.inner_intersection_rect, lane=3, intention='s')
+                               inner_intersection=self.inner_intersection_rect, lane=3, intention='s',
+                               streams=self.streams)
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=3, intention='s')
+                                  lane=3, intention='s', streams=self.streams)
         sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
         follower_car.set_sensor(sensor)
         self.assertEqual(31, sensor.ticks_to_crash())
@@ -85,10 +90,11 @@ class TestSensor(unittest.TestCase):
         first_car = random_car(name=1, pos_x=before_intersection_x,
                                pos_y=before_intersection_y, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
-                               inner_intersection=self.inner_intersection_rect, lane=0, intention='s')
+                               inner_intersection=self.inner_intersection_rect, lane=0, intention='s',
+                               streams=self.streams)
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=0, intention='s')
+                                  lane=0, intention='s', streams=self.streams)
         sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
         follower_car.set_sensor(sensor)
         self.assertTrue(sensor.sensor_condition(follower_car.get_x_coordinate(), follower_car.get_y_coordinate(),
@@ -103,10 +109,11 @@ class TestSensor(unittest.TestCase):
         first_car = random_car(name=1, pos_x=before_intersection_x,
                                pos_y=before_intersection_y, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
-                               inner_intersection=self.inner_intersection_rect, lane=1, intention='s')
+                               inner_intersection=self.inner_intersection_rect, lane=1, intention='s',
+                               streams=self.streams)
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=1, intention='s')
+                                  lane=1, intention='s', streams=self.streams)
         sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
         follower_car.set_sensor(sensor)
         self.assertTrue(sensor.sensor_condition(follower_car.get_x_coordinate(), follower_car.get_y_coordinate(),
@@ -120,10 +127,11 @@ class TestSensor(unittest.TestCase):
         first_car = random_car(name=1, pos_x=before_intersection_x,
                                pos_y=before_intersection_y, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
-                               inner_intersection=self.inner_intersection_rect, lane=2, intention='s')
+                               inner_intersection=self.inner_intersection_rect, lane=2, intention='s',
+                               streams=self.streams)
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=2, intention='s')
+                                  lane=2, intention='s', streams=self.streams)
         sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
         follower_car.set_sensor(sensor)
         self.assertTrue(sensor.sensor_condition(follower_car.get_x_coordinate(), follower_car.get_y_coordinate(),
@@ -137,13 +145,63 @@ class TestSensor(unittest.TestCase):
         first_car = random_car(name=1, pos_x=before_intersection_x,
                                pos_y=before_intersection_y, initial_speed=0, acceleration_rate=0,
                                full_intersection=self.full_intersection_rect, channel=channel,
-                               inner_intersection=self.inner_intersection_rect, lane=3, intention='s')
+                               inner_intersection=self.inner_intersection_rect, lane=3, intention='s',
+                               streams=self.streams)
         follower_car = random_car(name=2, initial_speed=40, full_intersection=self.full_intersection_rect,
                                   channel=channel, inner_intersection=self.inner_intersection_rect,
-                                  lane=3, intention='s')
+                                  lane=3, intention='s', streams=self.streams)
         sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
         follower_car.set_sensor(sensor)
         self.assertTrue(sensor.sensor_condition(follower_car.get_x_coordinate(), follower_car.get_y_coordinate(),
                                                 follower_car.get_direction() * pi / 180,
                                                 first_car.get_x_coordinate(), first_car.get_y_coordinate(),
                                                 first_car.get_direction() * pi / 180))
+
+    # The closed form gives the same ticks as moving the cars tick by tick, for the same cars of the lane tests
+    def test_analytic_ticks_to_crash(self):
+        positions = {0: (None, self.inner_intersection_rect.top + self.inner_intersection_rect.height + 30),
+                     1: (self.inner_intersection_rect.left + self.inner_intersection_rect.width + 30, None),
+                     2: (335, self.inner_intersection_rect.top - 30),
+                     3: (self.inner_intersection_rect.left - 30, None)}
+        for lane in range(4):
+            for speed in [40, 25, 7.5]:
+                channel = Channel()
+                pos_x, pos_y = positions[lane]
+                first_car = random_car(name=1, pos_x=pos_x, pos_y=pos_y, initial_speed=0,
+                                       full_intersection=self.full_intersection_rect, channel=channel,
+                                       inner_intersection=self.inner_intersection_rect, lane=lane, intention='s',
+                                       streams=self.streams)
+                follower_car = random_car(name=2, initial_speed=speed, full_intersection=self.full_intersection_rect,
+                                          channel=channel, inner_intersection=self.inner_intersection_rect,
+                                          lane=lane, intention='s', streams=self.streams)
+                sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
+                self.assertEqual(sensor.iterative_ticks_to_crash(), sensor.analytic_ticks_to_crash())
+                self.assertEqual(sensor.iterative_ticks_to_crash(), sensor.ticks_to_crash())
+                # If the car in front is faster the gap never closes
+                first_car.set_speed(speed + 1)
+                self.assertEqual(-1, sensor.ticks_to_crash())
+
+    # Cars in a turn aren't aligned with the lanes, the closed form still gives the ticks of the loop
+    def test_analytic_ticks_to_crash_off_axis(self):
+        for direction, other_direction in [(30, 30), (45, 20), (300, 315), (170, 200)]:
+            for speed in [40, 25, 7.5]:
+                channel = Channel()
+                first_car = random_car(name=1, initial_speed=0, full_intersection=self.full_intersection_rect,
+                                       channel=channel, inner_intersection=self.inner_intersection_rect, lane=0,
+                                       intention='l', pos_x=400, pos_y=400, streams=self.streams)
+                first_car.set_direction(other_direction)
+                follower_car = random_car(name=2, initial_speed=speed, full_intersection=self.full_intersection_rect,
+                                          channel=channel, inner_intersection=self.inner_intersection_rect, lane=0,
+                                          intention='l', streams=self.streams)
+                follower_car.set_direction(direction)
+                # The back of the follower heads to the front of the car in front of it
+                rad = direction * pi / 180
+                other_rad = other_direction * pi / 180
+                distance = 150 + follower_car.get_car_length() / 2.0
+                front_length = first_car.get_car_length() / 2.0
+                follower_car.set_x_coordinate(400 + sin(other_rad) * front_length + sin(rad) * distance)
+                follower_car.set_y_coordinate(400 + cos(other_rad) * front_length + cos(rad) * distance)
+                sensor = ProximitySensor(owner_car=follower_car, closest_car=first_car)
+                ticks = sensor.ticks_to_crash()
+                self.assertGreater(ticks, 0)
+                self.assertEqual(sensor.iterative_ticks_to_crash(), ticks)
@@ -0,0 +1,64 @@
+import unittest
+from models.car import *
+from models.channel import Channel
+from models.world import World
+from utils.utils import random_car, inner_intersection_rect, full_intersection_rect
+from functions.simulation_functions import run_simulation
+
+
+class TestWorld(unittest.TestCase):
+    def setUp(self):
+        self.intention_list = ['l', 's', 'r']
+
+    def create_cars(self, world=None):
+        channel = Channel()
+        cars = []
+        name = 0
+        for lane in range(4):
+            for intention in self.intention_list:
+                car = random_car(name=name, channel=channel, lane=lane, intention=intention, initial_speed=10 + name,
+                                 initial_acceleration_rate=name / 4.0, full_intersection=full_intersection_rect,
+                                 inner_intersection=inner_intersection_rect, graphic_flag=False)
+                if world is not None:
+                    world.add_car(car)
+                cars.append(car)
+                name += 1
+        return cars
+
+    # The vectorized step has to move the cars like move_control does, turns included
+    def test_step_same_as_move_control(self):
+        world = World(inner_intersection=inner_intersection_rect, capacity=4)
+        cars = self.create_cars()
+        world_cars = self.create_cars(world)
+        self.assertEqual(len(cars), world.get_size())
+        for _ in range(300):
+            for car in cars:
+                car.move_control()
+            world.step()
+            for car, world_car in zip(cars, world_cars):
+                self.assertAlmostEqual(car.get_x_coordinate(), world_car.get_x_coordinate(), places=6)
+                self.assertAlmostEqual(car.get_y_coordinate(), world_car.get_y_coordinate(), places=6)
+                self.assertAlmostEqual(car.get_direction(), world_car.get_direction(), places=6)
+                self.assertAlmostEqual(car.get_speed(), world_car.get_speed(), places=6)
+
+    def test_remove_car(self):
+        world = World(inner_intersection=inner_intersection_rect)
+        cars = self.create_cars(world)
+        first = cars[0]
+        position = first.get_position()
+        world.remove_car(first)
+        self.assertIsNone(first.get_world())
+        self.assertEqual(position, first.get_position())
+        self.assertEqual(len(cars) - 1, world.get_size())
+        last = cars[-1]
+        self.assertEqual(0, last.get_world_index())
+        self.assertEqual(last, world.get_cars()[0])
+        last.set_speed(7.0)
+        self.assertEqual(7.0, world.speed[0])
+
+    # The shipped scenarios run to the end with the vectorized step, every car that is left is in the world
+    def test_vectorized_scenarios(self):
+        for scenario in [100, 1000]:
+            channel = run_simulation(scenario, graphic_display=False, vectorized=True)
+            for car in channel.get_cars():
+                self.assertIsNotNone(car.get_world())
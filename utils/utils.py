@@ -1,9 +1,9 @@
-from random import randint, uniform
 from models.car import Car
 from models.sensor import ProximitySensor, DistanceSensor
 import pygame
 import os
 from models.controller import default_controller
+from models.geometry import Rect
 
 
 white = (255, 255, 255)  # RGB white color representation
@@ -26,10 +26,10 @@ inner_left_coordinate = 280
 inner_top_coordinate = 280
 
 # 768 is the width and height, 0 0 is from that point
-full_intersection_rect = pygame.Rect(background_left_coordinate, background_top_coordinate,
-                                     background_width, background_height)
-inner_intersection_rect = pygame.Rect(inner_left_coordinate, inner_top_coordinate,
-                                      inner_intersection_width, inner_intersection_height)
+full_intersection_rect = Rect(background_left_coordinate, background_top_coordinate,
+                              background_width, background_height)
+inner_intersection_rect = Rect(inner_left_coordinate, inner_top_coordinate,
+                               inner_intersection_width, inner_intersection_height)
 
 
 # initial positions outside the intersection
@@ -117,12 +117,40 @@ intersection_matrix = [{'s': [entry_collision_points[0], exit_collision_points[2
                               inner_square_collision_points[3]]}]
 
 
+# There are only 4 lanes and 3 intentions, so the conflicts between every pair of paths are computed once.
+lanes = [0, 1, 2, 3]
+intentions = ['l', 's', 'r']
+lane_to_int_dict = {"l": 0, "s": 1, "r": 2}
+# Tables of cars_cross_path, the index is the difference between the lanes
+cross_path_tables = [[[True, True, True], [True, True, True], [True, True, True]],
+                     [[True, True, False], [True, True, False], [False, True, False]],
+                     [[True, True, True], [True, False, False], [True, False, False]],
+                     [[True, True, False], [True, True, True], [False, False, False]]]
+
+
+# Builds a table indexed by [car_lane][car_intention][other_lane][other_intention] with the value of the function
+def pairwise_table(function):
+    return [{intention: [{other_intention: function(lane, intention, other_lane, other_intention)
+                          for other_intention in intentions}
+                         for other_lane in lanes]
+             for intention in intentions}
+            for lane in lanes]
+
+
+# Points shared by the paths of two cars, in the order of the path of the first one
+collision_points_table = pairwise_table(
+    lambda lane, intention, other_lane, other_intention: tuple(
+        p for p in intersection_matrix[lane][intention] if p in intersection_matrix[other_lane][other_intention]))
+
+# True if the paths of two cars cross
+cross_path_table = pairwise_table(
+    lambda lane, intention, other_lane, other_intention: cross_path_tables[(lane - other_lane) % 4][
+        lane_to_int_dict[intention]][lane_to_int_dict[other_intention]])
+
+
 # returns the points that both cars have to go through
 def collision_points(car_intention, car_lane, follow_intention, follow_lane):
-    first_points = intersection_matrix[car_lane][car_intention]
-    follower_points = intersection_matrix[follow_lane][follow_intention]
-    mutual_points = [p for p in first_points if p in follower_points]
-    return mutual_points
+    return collision_points_table[car_lane][car_intention][follow_lane][follow_intention]
 
 
 # gets the radio of the circumference that the car has to follow to turn to the right. Entry point represents
@@ -198,20 +226,45 @@ def cars_cross_path(car_lane, car_intention, other_car_lane, other_car_intention
     :param other_car_lane: the lane at which the other car star its way.
     :return: True if the paths does not crosses, False otherwise.
     """
-    lane_to_int_dict = {"l": 0, "s": 1, "r": 2}
-    table0 = [[True, True, True], [True, True, True], [True, True, True]]
-    table1 = [[True, True, False], [True, True, False], [False, True, False]]
-    table2 = [[True, True, True], [True, False, False], [True, False, False]]
-    table3 = [[True, True, False], [True, True, True], [False, False, False]]
-    all_tables = [table0, table1, table2, table3]
-    return all_tables[(car_lane - other_car_lane) % 4][lane_to_int_dict[car_intention]][
-        lane_to_int_dict[other_car_intention]]
+    return cross_path_table[car_lane][car_intention][other_car_lane][other_car_intention]
+
+
+# With an enabled PhaseProfiler the time of each phase of the round is measured
+def do_round(cars, channel, profiler=None):
+    timer = None
+    if profiler is not None and profiler.is_enabled():
+        timer = profiler.start_tick()
+    channel.do_round()
+    if timer is not None:
+        timer('channel')
+    for car in cars:
+        car.update(timer)
+    if timer is not None:
+        profiler.end_tick(len(cars))
 
 
-def do_round(cars, channel):
+# Same as do_round but the cars of the world are moved all together with the vectorized step. First every car
+# decides its acceleration, then all of them move and at last every car checks its position and sends its messages.
+def do_world_round(world, channel, profiler=None):
+    timer = None
+    if profiler is not None and profiler.is_enabled():
+        timer = profiler.start_tick()
     channel.do_round()
+    if timer is not None:
+        timer('channel')
+    cars = list(world.get_cars())
+    for car in cars:
+        car.control(timer)
+    world.step()
+    if timer is not None:
+        timer('move')
     for car in cars:
-        car.update()
+        car.draw_car()
+        if timer is not None:
+            timer('draw')
+        car.communicate(timer)
+    if timer is not None:
+        profiler.end_tick(len(cars))
 
 
 def random_car(name, channel, pos_x=None, pos_y=None, initial_acceleration_rate=None, min_acceleration = 0.0,
@@ -219,7 +272,7 @@ def random_car(name, channel, pos_x=None, pos_y=None, initial_acceleration_rate=
                min_speed=0, max_speed=20, creation_time=0, number_of_lanes=4,
                full_intersection=full_intersection_rect,
                inner_intersection=inner_intersection_rect, create_sensor_flag=False,
-               controller=default_controller, **kwargs):
+               controller=default_controller, graphic_flag=True, streams=None, **kwargs):
     """
     Generates a random car with the given name. The max speed is used to give an speed not giver than the maximum a the
     car. the lane can be passed in kwargs value if the lane wants to be specified.
@@ -227,6 +280,7 @@ def random_car(name, channel, pos_x=None, pos_y=None, initial_acceleration_rate=
     :param controller: function which controls if the car needs to speed up or slow down depending of what is
     defined in the function
     :param create_sensor_flag: specifies if the car needs to be created with a sensor, False is used for some tests
+    :param graphic_flag: specifies if the car loads its image to be drawn, False creates a headless car
     :param number_of_lanes: number of lanes at the simulation
     :param pos_x: x coordinate of spawn
     :param pos_y: y coordinate of spawn
@@ -239,19 +293,21 @@ def random_car(name, channel, pos_x=None, pos_y=None, initial_acceleration_rate=
     :param max_speed: maximum speed of the car.
     :param full_intersection: rectangle that represents the full screen of the display
     :param inner_intersection: rectangle that represents the area where collisions can happen when cars turn
+    :param streams: RandomStreams that draws the random values, by default the random module is used.
     :param kwargs: the lane can be passed in this argument in the "lane" argument.
     :return: a Car object.
     """
+    from models.random_streams import get_stream
     if "lane" in kwargs:
         tmp_x, tmp_y, direction, lane = outside_initial_positions[kwargs["lane"]]
 
     else:
-        new_lane = randint(0, number_of_lanes - 1)
+        new_lane = get_stream(streams, 'lanes').randint(0, number_of_lanes - 1)
         tmp_x, tmp_y, direction, lane = outside_initial_positions[new_lane]
     if initial_speed is None:
-        initial_speed = randint(min_speed, max_speed)
+        initial_speed = get_stream(streams, 'speeds').randint(min_speed, max_speed)
     if initial_acceleration_rate is None:
-        initial_acceleration_rate = uniform(min_acceleration, max_acceleration)
+        initial_acceleration_rate = get_stream(streams, 'accelerations').uniform(min_acceleration, max_acceleration)
     if "initial_speed" in kwargs:
         initial_speed = kwargs["initial_speed"]
     if "intention" in kwargs:
@@ -259,7 +315,7 @@ def random_car(name, channel, pos_x=None, pos_y=None, initial_acceleration_rate=
     else:
         intention = "s"
         if number_of_lanes == 4:
-            random_intention = randint(0, 2)
+            random_intention = get_stream(streams, 'intentions').randint(0, 2)
             if random_intention == 0:
                 intention = "l"
             elif random_intention == 1:
@@ -271,7 +327,8 @@ def random_car(name, channel, pos_x=None, pos_y=None, initial_acceleration_rate=
     return Car(name, pos_x, pos_y, acceleration_rate=initial_acceleration_rate,
                channel=channel, direction=direction, lane=lane, absolute_speed=initial_speed,
                intention=intention, creation_time=creation_time, full_intersection=full_intersection,
-               inner_intersection=inner_intersection, sensor_flag=create_sensor_flag, controller=controller)
+               inner_intersection=inner_intersection, sensor_flag=create_sensor_flag, controller=controller,
+               graphic_flag=graphic_flag)
 
 
 def fix_acceleration(ticks_to_crash, actual_speed, time_step=0.1, other_speed=0, speed_factor=2):